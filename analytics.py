@@ -0,0 +1,245 @@
+"""
+Append-only analytics event log for the search -> connect -> pay funnel.
+
+Request handlers call ``EventLog.emit()``, which only appends to an in-memory
+buffer. A background thread flushes the buffer in batches to a separate SQLite
+file and folds each batch into hourly aggregate tables in the same transaction,
+so admin reports read small pre-aggregated tables and never touch the
+application (OLTP) database.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+# Funnel stages, in order, and the aggregate column each one increments
+EVENT_COLUMNS = {
+    'search': 'searches',
+    'connect': 'connects',
+    'payment_created': 'payments_created',
+    'payment_completed': 'payments_completed',
+    'payment_failed': 'payments_failed',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    hour TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    user_id INTEGER,
+    tutor_id INTEGER,
+    payment_id INTEGER,
+    subject TEXT,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_events_payment ON events (payment_id, event_type);
+CREATE TABLE IF NOT EXISTS funnel_hourly (
+    hour TEXT PRIMARY KEY,
+    searches INTEGER NOT NULL DEFAULT 0,
+    connects INTEGER NOT NULL DEFAULT 0,
+    payments_created INTEGER NOT NULL DEFAULT 0,
+    payments_completed INTEGER NOT NULL DEFAULT 0,
+    payments_failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS subject_demand_hourly (
+    hour TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    searches INTEGER NOT NULL DEFAULT 0,
+    connects INTEGER NOT NULL DEFAULT 0,
+    payments_created INTEGER NOT NULL DEFAULT 0,
+    payments_completed INTEGER NOT NULL DEFAULT 0,
+    payments_failed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, subject)
+);
+"""
+
+AGGREGATE_COLUMNS = list(EVENT_COLUMNS.values())
+
+
+def hour_bucket(ts):
+    """Return the UTC hour bucket ('YYYY-MM-DDTHH:00') for a unix timestamp"""
+    return datetime.utcfromtimestamp(ts).strftime('%Y-%m-%dT%H:00')
+
+
+def normalize_subject(subject):
+    if not subject:
+        return None
+    return ' '.join(subject.split()).lower()
+
+
+class EventLog:
+    """Buffered, batch-flushed writer for funnel events"""
+
+    def __init__(self, db_path, batch_size=200, flush_interval=5.0, max_buffer=10000, logger=None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.logger = logger
+        self.dropped = 0
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._schema_ready = False
+
+    def emit(self, event_type, user_id=None, tutor_id=None, payment_id=None, subject=None, **payload):
+        """Queue an event; never blocks on I/O"""
+        if event_type not in EVENT_COLUMNS:
+            raise ValueError(f"Unknown analytics event: {event_type}")
+        event = (
+            time.time(), event_type, user_id, tutor_id, payment_id,
+            normalize_subject(subject), json.dumps(payload) if payload else None
+        )
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # Writer has fallen behind; the bounded deque sheds the oldest event on append
+                self.dropped += 1
+            self._buffer.append(event)
+            pending = len(self._buffer)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered events and fold them into the hourly aggregates"""
+        with self._lock:
+            batch, self._buffer = self._buffer, deque(maxlen=self.max_buffer)
+        if not batch:
+            return 0
+        with self._flush_lock:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        self._write_batch(conn, batch)
+                finally:
+                    conn.close()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Analytics flush failed, {len(batch)} events dropped: {e}")
+                self.dropped += len(batch)
+                return 0
+        return len(batch)
+
+    def close(self):
+        self._wakeup.set()
+        self.flush()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _write_batch(self, conn, batch):
+        rows = [
+            (ts, hour_bucket(ts), event_type, user_id, tutor_id, payment_id, subject, payload)
+            for ts, event_type, user_id, tutor_id, payment_id, subject, payload in batch
+        ]
+        conn.executemany(
+            "INSERT INTO events (ts, hour, event_type, user_id, tutor_id, payment_id, subject, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+        # Payment outcomes arrive from the webhook without a subject; recover it from
+        # the payment_created event already in the log rather than from the app tables
+        funnel = {}
+        demand = {}
+        for ts, hour, event_type, user_id, tutor_id, payment_id, subject, payload in rows:
+            if subject is None and payment_id is not None and event_type != 'payment_created':
+                found = conn.execute(
+                    "SELECT subject FROM events WHERE payment_id = ? AND event_type = 'payment_created' LIMIT 1",
+                    (payment_id,)
+                ).fetchone()
+                subject = found[0] if found else None
+            column = EVENT_COLUMNS[event_type]
+            funnel.setdefault(hour, dict.fromkeys(AGGREGATE_COLUMNS, 0))[column] += 1
+            if subject:
+                demand.setdefault((hour, subject), dict.fromkeys(AGGREGATE_COLUMNS, 0))[column] += 1
+
+        columns = ', '.join(AGGREGATE_COLUMNS)
+        placeholders = ', '.join('?' for _ in AGGREGATE_COLUMNS)
+        increments = ', '.join(f"{c} = {c} + excluded.{c}" for c in AGGREGATE_COLUMNS)
+        conn.executemany(
+            f"INSERT INTO funnel_hourly (hour, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(hour) DO UPDATE SET {increments}",
+            [(hour, *(counts[c] for c in AGGREGATE_COLUMNS)) for hour, counts in funnel.items()]
+        )
+        conn.executemany(
+            f"INSERT INTO subject_demand_hourly (hour, subject, {columns}) VALUES (?, ?, {placeholders}) "
+            f"ON CONFLICT(hour, subject) DO UPDATE SET {increments}",
+            [(hour, subject, *(counts[c] for c in AGGREGATE_COLUMNS)) for (hour, subject), counts in demand.items()]
+        )
+
+    def _ensure_thread(self):
+        # Started lazily so each gunicorn worker gets its own flusher after fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='analytics-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def _since_hour(hours):
+    return (datetime.utcnow() - timedelta(hours=hours)).strftime('%Y-%m-%dT%H:00')
+
+
+def funnel_report(db_path, hours=24):
+    """Hourly funnel rows for the last ``hours`` hours, read from the aggregates only"""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            "SELECT * FROM funnel_hourly WHERE hour >= ? ORDER BY hour",
+            (_since_hour(hours),)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def subject_demand_report(db_path, hours=24, limit=20):
+    """Per-subject totals for the last ``hours`` hours, busiest subjects first"""
+    if not os.path.exists(db_path):
+        return []
+    sums = ', '.join(f"SUM({c}) AS {c}" for c in AGGREGATE_COLUMNS)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            f"SELECT subject, {sums} FROM subject_demand_hourly WHERE hour >= ? "
+            "GROUP BY subject ORDER BY searches + connects DESC LIMIT ?",
+            (_since_hour(hours), limit)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
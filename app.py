@@ -1,14 +1,41 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from functools import wraps
+from passwords import PasswordHasher, HashPolicy, HasherBusy
 import requests
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 # numpy and sentence_transformers removed for deployment compatibility
 import re
-from intasend import APIService
+from intasend_client import APIService
+from analytics import EventLog, funnel_report, subject_demand_report
+from counters import CounterBuffer
+from tutor_serializer import tutor_select, fetch_rows, row_to_dict, rows_to_dicts, json_response
+from directory_snapshot import DirectoryGeneration, DirectorySnapshot, GenerationCache, snapshot_response
+from geo import load_place_index, TutorPlaces
+from availability import parse_availability, parse_moment, parse_window, IntervalTree
+from bookings import BookingError, parse_slot, reserve_slot, confirm_slot, HELD, SCHEDULED, CANCELLED, REFUND_PENDING
+from calendar_feed import stream_calendar, session_end
+from suggest import SuggestIndex
+from fuzzy import FuzzyIndex
+from recommendations import interactions_select, record_interaction
+from chatbot import ChatIndex
+from ratelimit import RateLimiter, MemoryBackend, SQLiteBackend, Limit, parse_limits
+from principals import Principal, PrincipalCache
+from metrics import RequestMetrics
+from query_audit import QueryAuditor
+from profiler import RequestProfiler, folded
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy.orm import aliased
+import base64
+import hashlib
+import hmac
+from locations import structured_location, normalize_place, normalize_county, place_key, price_bucket_label, DEFAULT_PRICE_BUCKETS
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from dotenv import load_dotenv
 
 
@@ -35,6 +62,110 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Route latency, SQL statements per request and gateway latency, scraped from /metrics
+metrics = RequestMetrics()
+metrics.init_app(app)
+with app.app_context():
+    metrics.instrument_engine(db.engine)
+# Bearer token Prometheus must send to /metrics; unset leaves the endpoint open
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Repeated statements per request (N+1) and slow statements with their query plan.
+# QUERY_AUDIT=off|warn|raise; unset raises under app.testing, warns under debug, else only logs slow queries
+query_auditor = QueryAuditor(
+    mode=os.getenv('QUERY_AUDIT') or None,
+    threshold=int(os.getenv('QUERY_AUDIT_THRESHOLD', '5')),
+    slow_ms=float(os.getenv('SLOW_QUERY_MS', '250')),
+    logger=app.logger
+)
+query_auditor.init_app(app)
+with app.app_context():
+    query_auditor.instrument_engine(db.engine)
+
+# Analytics event log lives in its own SQLite file so reports never touch the app tables
+ANALYTICS_DB_PATH = os.getenv('ANALYTICS_DB_PATH', os.path.join(os.path.dirname(db_path), 'edubridge_analytics.db'))
+ANALYTICS_ENABLED = os.getenv('ANALYTICS_ENABLED', 'true').lower() == 'true'
+event_log = EventLog(
+    ANALYTICS_DB_PATH,
+    batch_size=int(os.getenv('ANALYTICS_BATCH_SIZE', '200')),
+    flush_interval=float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '5')),
+    logger=app.logger
+)
+
+def track_event(event_type, **fields):
+    """Record a funnel event without ever failing the request"""
+    if not ANALYTICS_ENABLED:
+        return
+    try:
+        event_log.emit(event_type, **fields)
+    except Exception as e:
+        app.logger.warning(f"Failed to record analytics event {event_type}: {e}")
+
+# How long a booked slot is held for a pending payment
+BOOKING_HOLD_MINUTES = int(os.getenv('BOOKING_HOLD_MINUTES', '15'))
+
+# Comma-separated list of emails allowed to use the admin endpoints
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv('ADMIN_EMAILS', '').split(',') if e.strip()}
+
+def is_admin(user):
+    return user.is_authenticated and (user.email or '').lower() in ADMIN_EMAILS
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if not is_admin(current_user):
+            return jsonify({'error': 'Unauthorized'}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+# Sampling profiler: admins send "X-Profile: 1", or PROFILE_SAMPLE_RATE of all requests is captured.
+# Captures go to a ring of PROFILE_MAX_CAPTURES files shared by the workers, see /api/admin/profiles
+profiler = RequestProfiler(
+    os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(db_path), 'edubridge_profiles')),
+    max_captures=int(os.getenv('PROFILE_MAX_CAPTURES', '50')),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+    authorize=lambda: is_admin(current_user),
+    logger=app.logger
+)
+profiler.init_app(app)
+
+# Token-bucket limits for public endpoints, overridable with RATE_LIMITS="name=30/minute:user,..."
+DEFAULT_RATE_LIMITS = {
+    'login': Limit(10, 60),
+    'signup': Limit(5, 600),
+    'search': Limit(60, 60),
+    'chatbot': Limit(20, 60, by='user'),
+}
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+rate_limiter = RateLimiter(
+    # 'sqlite' shares buckets between workers; 'memory' limits each worker separately
+    SQLiteBackend(os.getenv('RATE_LIMIT_DB_PATH', os.path.join(os.path.dirname(db_path), 'edubridge_ratelimit.db')))
+    if RATE_LIMIT_BACKEND == 'sqlite' else MemoryBackend(),
+    parse_limits(os.getenv('RATE_LIMITS', ''), DEFAULT_RATE_LIMITS),
+    enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true',
+    # Render terminates requests at one proxy, which appends the client address to X-Forwarded-For
+    proxy_hops=int(os.getenv('RATE_LIMIT_PROXY_HOPS', '1' if os.getenv('RENDER') else '0')),
+    logger=app.logger
+)
+rate_limit = rate_limiter.limit
+
+# Password hashing runs in a small per-worker process pool; callers past the queue limit get a 503
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+password_hasher = PasswordHasher(
+    HashPolicy(os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')),
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(max(1, PASSWORD_HASH_WORKERS) * 4))),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+)
+
+def hasher_busy_response():
+    response = jsonify({'success': False, 'message': 'We are handling a lot of sign-ins right now, please try again in a moment'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
 # Hugging Face API configuration removed for deployment compatibility
 
 # IntaSend API configuration
@@ -100,17 +231,33 @@ class Tutor(db.Model):
     availability = db.Column(db.Text, nullable=False)
     whatsapp_number = db.Column(db.String(20), nullable=False)
     location = db.Column(db.String(100), nullable=False)
+    # Normalized copies of the user's location fields, compared case-insensitively
+    county = db.Column(db.String(50, collation='NOCASE'), nullable=True)
+    sub_county = db.Column(db.String(50, collation='NOCASE'), nullable=True)
+    constituency = db.Column(db.String(50, collation='NOCASE'), nullable=True)
+    area = db.Column(db.String(100, collation='NOCASE'), nullable=True)
     bio = db.Column(db.Text, nullable=True)
     rating = db.Column(db.Float, default=0.0)
     total_sessions = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_tutor_county_sub_county_constituency', 'county', 'sub_county', 'constituency'),
+        db.Index('ix_tutor_constituency', 'constituency'),
+        db.Index('ix_tutor_subject_county', 'subject', 'county'),
+        db.Index('ix_tutor_price_per_hour', 'price_per_hour'),
+    )
+
 class Connection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tutor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'tutor_id', name='uq_connection_student_id_tutor_id'),
+    )
+
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -130,14 +277,248 @@ class Session(db.Model):
     tutor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     payment_id = db.Column(db.Integer, db.ForeignKey('payment.id'), nullable=True)
     session_date = db.Column(db.DateTime, nullable=False)
+    end_date = db.Column(db.DateTime, nullable=True)
     duration_hours = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(20), default='scheduled')  # scheduled, completed, cancelled
+    status = db.Column(db.String(20), default='scheduled')  # held, scheduled, completed, cancelled
+    hold_expires_at = db.Column(db.DateTime, nullable=True)  # held slots are released after this
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_session_tutor_id_session_date', 'tutor_id', 'session_date'),
+        db.Index('ix_session_student_id_session_date', 'student_id', 'session_date'),
+        db.Index('ix_session_payment_id', 'payment_id'),
+    )
+
+class TutorAvailability(db.Model):
+    """Weekly availability parsed from Tutor.availability, in minutes from Monday 00:00"""
+    id = db.Column(db.Integer, primary_key=True)
+    tutor_id = db.Column(db.Integer, db.ForeignKey('tutor.id'), nullable=False, index=True)
+    start_minute = db.Column(db.Integer, nullable=False)
+    end_minute = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_tutor_availability_window', 'start_minute', 'end_minute'),
+    )
+
+def save_availability(tutor):
+    """Replace a tutor's parsed availability rows; call after the tutor has an id"""
+    TutorAvailability.query.filter_by(tutor_id=tutor.id).delete()
+    rows = [{'tutor_id': tutor.id, 'start_minute': start, 'end_minute': end}
+            for start, end in parse_availability(tutor.availability)]
+    if rows:
+        # One executemany instead of an INSERT ... RETURNING per window
+        db.session.execute(db.insert(TutorAvailability), rows)
+
+class TutorStats(db.Model):
+    tutor_id = db.Column(db.Integer, db.ForeignKey('tutor.id'), primary_key=True)
+    profile_views = db.Column(db.Integer, nullable=False, default=0)
+    search_impressions = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TutorCooccurrence(db.Model):
+    """Students shared by two tutors, one row per ordered pair (see recommendations.py)"""
+    tutor_id = db.Column(db.Integer, db.ForeignKey('tutor.id'), primary_key=True)
+    other_id = db.Column(db.Integer, db.ForeignKey('tutor.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_tutor_cooccurrence_tutor_id_count', 'tutor_id', 'count', 'other_id'),
+    )
+
+def _write_tutor_stats(rows):
+    """Upsert coalesced counter increments in a single executemany"""
+    now = datetime.utcnow()
+    params = [
+        {'tutor_id': row['key'], 'profile_views': row['profile_views'],
+         'search_impressions': row['search_impressions'], 'updated_at': now}
+        for row in rows
+    ]
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO tutor_stats (tutor_id, profile_views, search_impressions, updated_at) "
+            "VALUES (:tutor_id, :profile_views, :search_impressions, :updated_at) "
+            "ON CONFLICT(tutor_id) DO UPDATE SET "
+            "profile_views = profile_views + excluded.profile_views, "
+            "search_impressions = search_impressions + excluded.search_impressions, "
+            "updated_at = excluded.updated_at"
+        ), params)
+        db.session.commit()
+
+# Popularity counters are buffered per worker; at most TUTOR_STATS_MAX_PENDING increments can be lost
+tutor_stats_buffer = CounterBuffer(
+    _write_tutor_stats,
+    fields=('profile_views', 'search_impressions'),
+    flush_interval=float(os.getenv('TUTOR_STATS_FLUSH_INTERVAL', '10')),
+    max_pending=int(os.getenv('TUTOR_STATS_MAX_PENDING', '5000')),
+    logger=app.logger
+)
+
+def _write_directory_views(rows):
+    """Give every tutor one search impression per buffered /api/tutors view, in one statement"""
+    views = sum(row['views'] for row in rows)
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO tutor_stats (tutor_id, profile_views, search_impressions, updated_at) "
+            "SELECT id, 0, :views, :updated_at FROM tutor WHERE true "
+            "ON CONFLICT(tutor_id) DO UPDATE SET "
+            "search_impressions = search_impressions + excluded.search_impressions, "
+            "updated_at = excluded.updated_at"
+        ), {'views': views, 'updated_at': datetime.utcnow()})
+        db.session.commit()
+
+# The full directory lists every tutor, so a view is one increment rather than one per tutor
+directory_view_buffer = CounterBuffer(
+    _write_directory_views,
+    fields=('views',),
+    flush_interval=float(os.getenv('TUTOR_STATS_FLUSH_INTERVAL', '10')),
+    max_pending=int(os.getenv('TUTOR_STATS_MAX_PENDING', '5000')),
+    logger=app.logger
+)
+
+def _build_directory():
+    return rows_to_dicts(fetch_rows(db.session, tutor_select(Tutor, User).order_by(Tutor.id)))
+
+# Bumped after any commit that changes tutor data; workers rebuild the /api/tutors snapshot lazily
+directory_generation = DirectoryGeneration(
+    os.getenv('DIRECTORY_VERSION_PATH', os.path.join(os.path.dirname(db_path), 'edubridge.directory_version'))
+)
+directory_snapshot = DirectorySnapshot(_build_directory, directory_generation)
+DIRECTORY_CACHE_MAX_AGE = int(os.getenv('DIRECTORY_CACHE_MAX_AGE', '0'))
+# Base URL of the static export (python export_directory.py); the student dashboard reads all.json from it
+DIRECTORY_URL = os.getenv('DIRECTORY_URL', '').rstrip('/')
+
+PRICE_BUCKETS = tuple(int(edge) for edge in os.getenv('PRICE_BUCKETS', ','.join(map(str, DEFAULT_PRICE_BUCKETS))).split(','))
+
+def _build_location_facets():
+    """Facet counts plus a lookup of every known place name to its column"""
+    counties = db.session.execute(
+        db.select(Tutor.county, db.func.count()).where(Tutor.county.isnot(None))
+        .group_by(Tutor.county).order_by(db.func.count().desc())
+    ).all()
+    sub_counties = db.session.execute(
+        db.select(Tutor.county, Tutor.sub_county, db.func.count()).where(Tutor.sub_county.isnot(None))
+        .group_by(Tutor.county, Tutor.sub_county).order_by(db.func.count().desc())
+    ).all()
+    constituencies = db.session.execute(
+        db.select(Tutor.constituency).where(Tutor.constituency.isnot(None)).distinct()
+    ).scalars().all()
+    subjects = db.session.execute(
+        db.select(Tutor.subject, db.func.count()).group_by(Tutor.subject).order_by(db.func.count().desc())
+    ).all()
+
+    edges = (0,) + PRICE_BUCKETS
+    bucket = db.case(
+        *[(Tutor.price_per_hour < upper, i) for i, upper in enumerate(PRICE_BUCKETS)],
+        else_=len(PRICE_BUCKETS)
+    )
+    bucket_counts = dict(db.session.execute(
+        db.select(bucket, db.func.count()).group_by(bucket)
+    ).all())
+    price_buckets = []
+    for i, lower in enumerate(edges):
+        upper = edges[i + 1] if i + 1 < len(edges) else None
+        price_buckets.append({
+            'label': price_bucket_label(lower, upper),
+            'min': lower,
+            'max': upper,
+            'count': bucket_counts.get(i, 0)
+        })
+
+    # Broader places win when the same name is used at several levels
+    places = {}
+    for name in constituencies:
+        places[place_key(name)] = ('constituency', name)
+    for _, name, _ in sub_counties:
+        places[place_key(name)] = ('sub_county', name)
+    for name, _ in counties:
+        places[place_key(name)] = ('county', name)
+
+    return {
+        'facets': {
+            'counties': [{'value': name, 'count': count} for name, count in counties],
+            'sub_counties': [{'county': county, 'value': name, 'count': count} for county, name, count in sub_counties],
+            'subjects': [{'value': name, 'count': count} for name, count in subjects],
+            'price_buckets': price_buckets
+        },
+        'places': places
+    }
+
+location_facets = GenerationCache(_build_location_facets, directory_generation)
+
+def _build_tutor_places():
+    rows = db.session.execute(db.select(Tutor.id, Tutor.county, Tutor.constituency)).all()
+    return TutorPlaces(load_place_index(), rows)
+
+tutor_places = GenerationCache(_build_tutor_places, directory_generation)
+
+def _build_availability_index():
+    rows = db.session.execute(
+        db.select(TutorAvailability.start_minute, TutorAvailability.end_minute, TutorAvailability.tutor_id)
+    ).all()
+    return IntervalTree([tuple(row) for row in rows])
+
+availability_index = GenerationCache(_build_availability_index, directory_generation)
+
+def _build_suggest_index():
+    subjects = db.session.execute(db.select(Tutor.subject, db.func.count()).group_by(Tutor.subject)).all()
+    # Structured places where we have them; the free-text location only for tutors without
+    locations = db.session.execute(
+        db.select(Tutor.location, db.func.count()).where(Tutor.county.is_(None)).group_by(Tutor.location)
+    ).all()
+    for column in (Tutor.county, Tutor.sub_county, Tutor.constituency, Tutor.area):
+        locations.extend(db.session.execute(
+            db.select(column, db.func.count()).where(column.isnot(None)).group_by(column)
+        ).all())
+    names = db.session.execute(
+        db.select(User.name, Tutor.total_sessions).join(User, Tutor.user_id == User.id)
+    ).all()
+    return SuggestIndex(subjects, locations, names)
+
+suggest_index = GenerationCache(_build_suggest_index, directory_generation)
+
+def _build_fuzzy_index():
+    subjects = db.session.execute(db.select(Tutor.subject, Tutor.id)).all()
+    names = db.session.execute(db.select(User.name, Tutor.id).join(User, Tutor.user_id == User.id)).all()
+    locations = []
+    for column in (Tutor.location, Tutor.county, Tutor.sub_county, Tutor.constituency, Tutor.area):
+        locations.extend(db.session.execute(db.select(column, Tutor.id).where(column.isnot(None))).all())
+    return FuzzyIndex(subjects, names, locations)
+
+fuzzy_index = GenerationCache(_build_fuzzy_index, directory_generation)
+FUZZY_THRESHOLD = float(os.getenv('FUZZY_THRESHOLD', '0.3'))
+
+def _build_chat_index():
+    rows = fetch_rows(db.session, tutor_select(Tutor, User).add_columns(Tutor.county).order_by(
+        db.func.coalesce(Tutor.rating, 0).desc(), Tutor.total_sessions.desc(), Tutor.id
+    ))
+    return ChatIndex(rows)
+
+chat_index = GenerationCache(_build_chat_index, directory_generation)
+
+# Larger availability matches are filtered in Python instead of binding thousands of ids
+MAX_SQL_ID_FILTER = 500
+
+def _load_principal_row(user_id):
+    return db.session.execute(
+        db.select(*(getattr(User, field) for field in Principal.FIELDS)).where(User.id == user_id)
+    ).first()
+
+# Logged-in users are served from a per-worker cache; call principal_cache.invalidate(user_id) after changing a user
+principal_cache = PrincipalCache(
+    _load_principal_row,
+    DirectoryGeneration(os.getenv('PRINCIPAL_VERSION_PATH', os.path.join(os.path.dirname(db_path), 'edubridge.principal_version'))),
+    ttl=float(os.getenv('PRINCIPAL_CACHE_TTL', '60')),
+    max_entries=int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    try:
+        return principal_cache.get(int(user_id))
+    except ValueError:
+        return None
 
 # Routes
 @app.route('/')
@@ -145,6 +526,7 @@ def landing():
     return render_template('landing.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', methods=('POST',))
 def login():
     if request.method == 'POST':
         data = request.get_json()
@@ -152,15 +534,28 @@ def login():
         password = data.get('password')
         
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            valid = bool(user and password and password_hasher.verify(user.password_hash, password))
+        except HasherBusy:
+            return hasher_busy_response()
+        if valid:
+            if password_hasher.needs_rehash(user.password_hash):
+                # Upgrade hashes made under an older policy while the password is at hand
+                try:
+                    user.password_hash = password_hasher.hash(password)
+                    # The cached principal holds no password hash, so it stays valid
+                    db.session.commit()
+                except HasherBusy:
+                    pass
             login_user(user)
             return jsonify({'success': True, 'redirect': url_for('dashboard')})
         else:
             return jsonify({'success': False, 'message': 'Invalid email or password'})
     
-    return render_template('login.html')
+    return render_template('landing.html')
 
 @app.route('/signup', methods=['GET', 'POST'])
+@rate_limit('signup', methods=('POST',))
 def signup():
     if request.method == 'POST':
         data = request.get_json()
@@ -177,10 +572,15 @@ def signup():
         if User.query.filter_by(email=email).first():
             return jsonify({'success': False, 'message': 'Email already registered'})
         
+        try:
+            password_hash = password_hasher.hash(password)
+        except HasherBusy:
+            return hasher_busy_response()
+        
         user = User(
             name=name,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=password_hash,
             user_type=user_type,
             phone=phone,
             county=county,
@@ -189,26 +589,39 @@ def signup():
             location=location
         )
         db.session.add(user)
-        db.session.commit()
         
-        # If user is a tutor, create tutor profile
-        if user_type == 'tutor':
-            subject = data.get('subject')
-            price_per_hour = data.get('price_per_hour')
-            availability = data.get('availability')
-            bio = data.get('bio')
-            
-            tutor = Tutor(
-                user_id=user.id,
-                subject=subject,
-                price_per_hour=price_per_hour,
-                availability=availability,
-                bio=bio,
-                whatsapp_number=phone,
-                location=f"{county}, {sub_county}, {constituency}, {location}"
-            )
-            db.session.add(tutor)
+        # The user and tutor profile are written in one transaction so a failure can't leave an orphaned account
+        try:
+            # If user is a tutor, create tutor profile
+            if user_type == 'tutor':
+                subject = data.get('subject')
+                price_per_hour = data.get('price_per_hour')
+                availability = data.get('availability')
+                bio = data.get('bio')
+                
+                db.session.flush()
+                tutor = Tutor(
+                    user_id=user.id,
+                    subject=subject,
+                    price_per_hour=price_per_hour,
+                    availability=availability,
+                    bio=bio,
+                    whatsapp_number=phone,
+                    location=f"{county}, {sub_county}, {constituency}, {location}",
+                    **structured_location(county, sub_county, constituency, location)
+                )
+                db.session.add(tutor)
+                db.session.flush()
+                save_availability(tutor)
             db.session.commit()
+        except IntegrityError:
+            # Lost a race with another signup for the same email, or a required field was missing
+            db.session.rollback()
+            if User.query.filter_by(email=email).first():
+                return jsonify({'success': False, 'message': 'Email already registered'})
+            return jsonify({'success': False, 'message': 'Please fill in all required fields'}), 400
+        if user_type == 'tutor':
+            directory_generation.bump()
         
         login_user(user)
         return jsonify({'success': True, 'redirect': url_for('dashboard')})
@@ -225,83 +638,146 @@ def logout():
 @login_required
 def dashboard():
     if current_user.user_type == 'student':
-        return render_template('student_dashboard.html')
+        return render_template('student_dashboard.html', directory_url=DIRECTORY_URL)
     else:
         return render_template('tutor_dashboard.html')
 
 # API Routes
 @app.route('/api/tutors')
 def get_tutors():
-    tutors = Tutor.query.all()
-    tutor_data = []
-    
-    for tutor in tutors:
-        user = User.query.get(tutor.user_id)
-        tutor_data.append({
-            'id': tutor.id,
-            'name': user.name,
-            'subject': tutor.subject,
-            'price_per_hour': tutor.price_per_hour,
-            'availability': tutor.availability,
-            'whatsapp_number': tutor.whatsapp_number,
-            'location': tutor.location,
-            'bio': tutor.bio,
-            'rating': tutor.rating,
-            'total_sessions': tutor.total_sessions
-        })
-    
-    return jsonify(tutor_data)
+    snapshot = directory_snapshot.get()
+    directory_view_buffer.increment('directory', 'views')
+    return snapshot_response(snapshot, request, max_age=DIRECTORY_CACHE_MAX_AGE)
+
+@app.route('/api/tutors/<int:tutor_id>')
+def get_tutor(tutor_id):
+    row = db.session.execute(tutor_select(Tutor, User).where(Tutor.id == tutor_id)).first()
+    if row is None:
+        return jsonify({'error': 'Not found'}), 404
+    tutor_stats_buffer.increment(tutor_id, 'profile_views')
+    return json_response(row_to_dict(row))
 
 @app.route('/api/tutors/search')
+@rate_limit('search')
 def search_tutors():
     query = request.args.get('query', '')
     subject = request.args.get('subject', '')
     location = request.args.get('location', '')
     
-    tutors_query = Tutor.query
+    tutors_query = tutor_select(Tutor, User)
+    
+    # Tutor ids the result must be limited to (availability, fuzzy location); None = no limit
+    allowed_ids = None
     
     if subject:
-        tutors_query = tutors_query.filter(Tutor.subject.ilike(f'%{subject}%'))
+        fuzzy = fuzzy_index.get()['subject']
+        corrected = [value for value, _ in fuzzy.similar(subject, FUZZY_THRESHOLD)] if not fuzzy.contains(subject) else None
+        if corrected:
+            # No subject contains the text: take the close spellings instead ("chemestry")
+            tutors_query = tutors_query.where(Tutor.subject.in_(corrected))
+        else:
+            tutors_query = tutors_query.where(Tutor.subject.ilike(f'%{subject}%'))
+    for field in ('county', 'sub_county', 'constituency'):
+        value = request.args.get(field, '')
+        if value:
+            normalized = normalize_county(value) if field == 'county' else normalize_place(value)
+            tutors_query = tutors_query.where(getattr(Tutor, field) == normalized)
     if location:
-        tutors_query = tutors_query.filter(Tutor.location.ilike(f'%{location}%'))
+        # Known place names become exact lookups on the indexed columns
+        place = location_facets.get()['places'].get(place_key(location))
+        if place:
+            field, value = place
+            tutors_query = tutors_query.where(getattr(Tutor, field) == value)
+        else:
+            fuzzy = fuzzy_index.get()['location']
+            corrected = [value for value, _ in fuzzy.similar(location, FUZZY_THRESHOLD)] if not fuzzy.contains(location) else None
+            if corrected:
+                allowed_ids = fuzzy.tutor_ids(corrected)
+            else:
+                tutors_query = tutors_query.where(Tutor.location.ilike(f'%{location}%'))
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    if min_price is not None:
+        tutors_query = tutors_query.where(Tutor.price_per_hour >= min_price)
+    if max_price is not None:
+        tutors_query = tutors_query.where(Tutor.price_per_hour <= max_price)
+    
+    # Availability filters are answered by the in-memory interval tree
+    available_at = request.args.get('available_at', '')
+    available_between = request.args.get('available_between', '')
+    if available_at or available_between:
+        tree = availability_index.get()
+        if available_at:
+            moment = parse_moment(available_at)
+            if moment is None:
+                return jsonify({'error': 'available_at must look like "Monday 18:00" or an ISO datetime'}), 400
+            at = set(tree.at(moment))
+            allowed_ids = at if allowed_ids is None else allowed_ids & at
+        if available_between:
+            window = parse_window(available_between)
+            if window is None:
+                return jsonify({'error': 'available_between must look like "Monday 18:00-20:00" or "start/end"'}), 400
+            covering = set(tree.covering(*window))
+            allowed_ids = covering if allowed_ids is None else allowed_ids & covering
+    if allowed_ids is not None and len(allowed_ids) <= MAX_SQL_ID_FILTER:
+        tutors_query = tutors_query.where(Tutor.id.in_(allowed_ids))
+        allowed_ids = None
+    
+    if request.args.get('sort') == 'popular':
+        tutors_query = tutors_query.outerjoin(TutorStats, TutorStats.tutor_id == Tutor.id).order_by(
+            db.func.coalesce(TutorStats.profile_views, 0).desc(),
+            db.func.coalesce(TutorStats.search_impressions, 0).desc()
+        )
     
-    tutors = tutors_query.all()
+    near = request.args.get('near', '')
+    distances = {}
+    if near:
+        # Rank by distance from a county or constituency; SQL only narrows the candidates
+        origin = load_place_index().resolve(near, county=request.args.get('near_county'))
+        if origin is None:
+            return jsonify({'error': f'Unknown location: {near}'}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), 200))
+        filtered = tutors_query.whereclause is not None
+        candidate_ids = set(db.session.execute(tutors_query.with_only_columns(Tutor.id)).scalars()) if filtered else None
+        if allowed_ids is not None:
+            candidate_ids = allowed_ids if candidate_ids is None else candidate_ids & allowed_ids
+        nearest = tutor_places.get().nearest(origin, limit, candidate_ids)
+        distances = dict(nearest)
+        by_id = {row[0]: row for row in fetch_rows(db.session, tutor_select(Tutor, User).where(Tutor.id.in_(distances)))}
+        rows = [by_id[tutor_id] for tutor_id, _ in nearest if tutor_id in by_id]
+    else:
+        rows = fetch_rows(db.session, tutors_query)
+        if allowed_ids is not None:
+            rows = [row for row in rows if row[0] in allowed_ids]
+    tutor_stats_buffer.increment_many([row[0] for row in rows], 'search_impressions')
+    track_event(
+        'search',
+        user_id=current_user.id if current_user.is_authenticated else None,
+        subject=subject,
+        location=location or None,
+        results=len(rows)
+    )
     
     # Semantic search if query is provided and embeddings are available
     if query:
-        tutor_data = []
-        for tutor in tutors:
-            user = User.query.get(tutor.user_id)
-            tutor_text = f"{user.name} {tutor.subject} {tutor.bio or ''} {tutor.location}"
-            tutor_data.append({
-                'tutor': tutor,
-                'user': user,
-                'text': tutor_text
-            })
+        # name, subject, bio and location make up the text each tutor is matched on
+        tutor_texts = [f"{row[1]} {row[2]} {row[7] or ''} {row[6]}" for row in rows]
         
         # Get embeddings
         query_embedding = embed_text([query])
-        tutor_embeddings = embed_text([t['text'] for t in tutor_data])
+        tutor_embeddings = embed_text(tutor_texts)
         
         # Check if embeddings were computed successfully
         if not query_embedding or not tutor_embeddings:
-            # Fall back to basic search if ML features unavailable
-            result = []
-            for tutor in tutors:
-                user = User.query.get(tutor.user_id)
-                result.append({
-                    'id': tutor.id,
-                    'name': user.name,
-                    'subject': tutor.subject,
-                    'price_per_hour': tutor.price_per_hour,
-                    'availability': tutor.availability,
-                    'whatsapp_number': tutor.whatsapp_number,
-                    'location': tutor.location,
-                    'bio': tutor.bio,
-                    'rating': tutor.rating,
-                    'total_sessions': tutor.total_sessions
-                })
-            return jsonify(result)
+            # Without ML features, rank by trigram similarity of each query word to name, subject or location.
+            # The index doesn't cover bios, so tutors without a hit stay in the results, after those with one
+            scores = {}
+            index = fuzzy_index.get()
+            for word in set(query.lower().split()):
+                for tutor_id, score in index.best_scores(word, FUZZY_THRESHOLD).items():
+                    scores[tutor_id] = scores.get(tutor_id, 0) + score
+            ranked = sorted(rows, key=lambda row: -scores.get(row[0], 0))
+            return json_response([row_to_dict(row, match_score=round(scores.get(row[0], 0), 3)) for row in ranked])
         
         # Calculate similarities (simplified without numpy)
         similarities = []
@@ -312,44 +788,33 @@ def search_tutors():
         
         # Sort by similarity
         similarities.sort(reverse=True)  # Sort by similarity score
-        sorted_indices = [idx for _, idx in similarities]
-        sorted_tutors = [tutor_data[i] for i in sorted_indices]
-        
-        result = []
-        for i, item in enumerate(sorted_tutors):
-            tutor = item['tutor']
-            user = item['user']
-            result.append({
-                'id': tutor.id,
-                'name': user.name,
-                'subject': tutor.subject,
-                'price_per_hour': tutor.price_per_hour,
-                'availability': tutor.availability,
-                'whatsapp_number': tutor.whatsapp_number,
-                'location': tutor.location,
-                'bio': tutor.bio,
-                'rating': tutor.rating,
-                'total_sessions': tutor.total_sessions,
-                'similarity_score': float(similarities[i][0]) if i < len(similarities) else 0.0
-            })
+        result = [
+            row_to_dict(rows[idx], similarity_score=float(similarity))
+            for similarity, idx in similarities
+        ]
+    elif distances:
+        result = [row_to_dict(row, distance_km=round(distances[row[0]], 1)) for row in rows]
     else:
-        result = []
-        for tutor in tutors:
-            user = User.query.get(tutor.user_id)
-            result.append({
-                'id': tutor.id,
-                'name': user.name,
-                'subject': tutor.subject,
-                'price_per_hour': tutor.price_per_hour,
-                'availability': tutor.availability,
-                'whatsapp_number': tutor.whatsapp_number,
-                'location': tutor.location,
-                'bio': tutor.bio,
-                'rating': tutor.rating,
-                'total_sessions': tutor.total_sessions
-            })
+        result = rows_to_dicts(rows)
     
-    return jsonify(result)
+    return json_response(result)
+
+@app.route('/api/suggest')
+def suggest():
+    """Autocomplete for the search boxes, answered from the in-memory prefix index"""
+    field = request.args.get('field', 'subject')
+    if field not in SuggestIndex.FIELDS:
+        return jsonify({'error': f"field must be one of {', '.join(SuggestIndex.FIELDS)}"}), 400
+    limit = max(1, min(request.args.get('limit', 8, type=int), 25))
+    suggestions = suggest_index.get().lookup(field, request.args.get('prefix', ''), limit)
+    response = json_response(suggestions)
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+@app.route('/api/tutors/facets')
+def tutor_facets():
+    """Counts per county, sub-county, subject and price bucket, cached until tutor data changes"""
+    return json_response(location_facets.get()['facets'])
 
 @app.route('/api/tutor/profile', methods=['GET', 'POST'])
 @login_required
@@ -371,8 +836,19 @@ def tutor_profile():
         tutor.whatsapp_number = data.get('whatsapp_number')
         tutor.location = data.get('location')
         tutor.bio = data.get('bio')
+        # Structured fields come from the request when sent, otherwise from the account
+        for field, value in structured_location(
+            data.get('county') or current_user.county,
+            data.get('sub_county') or current_user.sub_county,
+            data.get('constituency') or current_user.constituency,
+            data.get('area') or current_user.location
+        ).items():
+            setattr(tutor, field, value)
         
+        db.session.flush()
+        save_availability(tutor)
         db.session.commit()
+        directory_generation.bump()
         return jsonify({'success': True})
     
     # GET request
@@ -391,6 +867,33 @@ def tutor_profile():
     else:
         return jsonify({})
 
+MAX_BULK_CONNECT = 50
+
+def _connect_student(student_id, tutor_ids):
+    """Connect a student to tutors in one INSERT ... ON CONFLICT DO NOTHING; returns the newly connected ids"""
+    earlier_tutors = _student_tutor_ids(student_id)
+    now = datetime.utcnow()
+    connected = db.session.execute(
+        sqlite_insert(Connection)
+        .values([{'student_id': student_id, 'tutor_id': tutor_id, 'timestamp': now} for tutor_id in tutor_ids])
+        .on_conflict_do_nothing(index_elements=['student_id', 'tutor_id'])
+        .returning(Connection.tutor_id)
+    ).scalars().all()
+    for tutor_id in connected:
+        # Pair each new tutor with everything chosen before it, so every pair is counted once
+        if tutor_id not in earlier_tutors:
+            record_interaction(db.session, TutorCooccurrence, tutor_id, earlier_tutors)
+            earlier_tutors.add(tutor_id)
+    db.session.commit()
+    
+    if connected:
+        subjects = dict(db.session.execute(
+            db.select(Tutor.id, Tutor.subject).where(Tutor.id.in_(connected))
+        ).all())
+        for tutor_id in connected:
+            track_event('connect', user_id=student_id, tutor_id=tutor_id, subject=subjects.get(tutor_id))
+    return connected
+
 @app.route('/api/connect', methods=['POST'])
 @login_required
 def connect_tutor():
@@ -398,46 +901,275 @@ def connect_tutor():
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
-    tutor_id = data.get('tutor_id')
-    
-    # Check if connection already exists
-    existing_connection = Connection.query.filter_by(
-        student_id=current_user.id,
-        tutor_id=tutor_id
-    ).first()
+    try:
+        tutor_id = int(data.get('tutor_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'tutor_id is required'}), 400
     
-    if existing_connection:
+    # The unique (student_id, tutor_id) constraint turns a repeated click into a no-op
+    if not _connect_student(current_user.id, [tutor_id]):
         return jsonify({'error': 'Connection already exists'}), 400
     
-    connection = Connection(
-        student_id=current_user.id,
-        tutor_id=tutor_id
-    )
-    db.session.add(connection)
-    db.session.commit()
-    
     return jsonify({'success': True})
 
+@app.route('/api/connect/bulk', methods=['POST'])
+@login_required
+def connect_tutors_bulk():
+    """Connect the current student to several tutors in one transaction"""
+    if current_user.user_type != 'student':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    data = request.get_json() or {}
+    try:
+        tutor_ids = list(dict.fromkeys(int(tutor_id) for tutor_id in data.get('tutor_ids') or []))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'tutor_ids must be a list of tutor ids'}), 400
+    if not tutor_ids:
+        return jsonify({'error': 'tutor_ids is required'}), 400
+    if len(tutor_ids) > MAX_BULK_CONNECT:
+        return jsonify({'error': f'At most {MAX_BULK_CONNECT} tutors per request'}), 400
+    
+    existing = set(db.session.execute(db.select(Tutor.id).where(Tutor.id.in_(tutor_ids))).scalars())
+    unknown = [tutor_id for tutor_id in tutor_ids if tutor_id not in existing]
+    connected = _connect_student(current_user.id, [tutor_id for tutor_id in tutor_ids if tutor_id in existing])
+    
+    return jsonify({
+        'success': True,
+        'connected': connected,
+        'already_connected': [tutor_id for tutor_id in tutor_ids if tutor_id in existing and tutor_id not in connected],
+        'unknown': unknown
+    })
+
+@app.route('/api/connections', methods=['GET'])
+@login_required
+def list_connections():
+    """The current user's connections, newest first, paginated by id"""
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    cursor = request.args.get('cursor', type=int)
+    
+    if current_user.user_type == 'student':
+        stmt = tutor_select(Tutor, User).add_columns(Connection.id, Connection.timestamp).join(
+            Connection, Connection.tutor_id == Tutor.id
+        ).where(Connection.student_id == current_user.id)
+    else:
+        tutor = Tutor.query.filter_by(user_id=current_user.id).first()
+        stmt = db.select(User.id, User.name, User.county, Connection.id, Connection.timestamp).join(
+            Connection, Connection.student_id == User.id
+        ).where(Connection.tutor_id == (tutor.id if tutor else -1))
+    if cursor:
+        stmt = stmt.where(Connection.id < cursor)
+    rows = fetch_rows(db.session, stmt.order_by(Connection.id.desc()).limit(limit + 1))
+    
+    connections = []
+    for row in rows[:limit]:
+        connected_at = row[-1].isoformat() if row[-1] else None
+        if current_user.user_type == 'student':
+            connections.append({'id': row[-2], 'connected_at': connected_at, 'tutor': row_to_dict(row[:-2])})
+        else:
+            connections.append({
+                'id': row[-2],
+                'connected_at': connected_at,
+                'student': {'id': row[0], 'name': row[1], 'county': row[2]}
+            })
+    next_cursor = str(rows[limit - 1][-2]) if len(rows) > limit else None
+    return jsonify({'connections': connections, 'next_cursor': next_cursor})
+
+def _student_tutor_ids(student_id):
+    """Tutors a student has connected with or paid"""
+    rows = db.session.execute(interactions_select(Connection, Payment, student_id=student_id)).all()
+    return {tutor_id for _, tutor_id in rows}
+
+@app.route('/api/tutors/<int:tutor_id>/similar')
+def similar_tutors(tutor_id):
+    """Tutors most often chosen by the same students, read straight off the co-occurrence index"""
+    limit = max(1, min(request.args.get('limit', 6, type=int), 50))
+    rows = fetch_rows(db.session, tutor_select(Tutor, User)
+        .add_columns(TutorCooccurrence.count)
+        .join(TutorCooccurrence, TutorCooccurrence.other_id == Tutor.id)
+        .where(TutorCooccurrence.tutor_id == tutor_id)
+        .order_by(TutorCooccurrence.count.desc(), TutorCooccurrence.other_id.desc())
+        .limit(limit))
+    return json_response([row_to_dict(row[:-1], shared_students=row[-1]) for row in rows])
+
 @app.route('/api/chatbot', methods=['POST'])
+@rate_limit('chatbot')
 def chatbot():
+    data = request.get_json() or {}
+    message = data.get('message', '')
+    
+    # Intents, subjects and counties are matched in one pass; tutors come from the cached index
+    response, intent, tutors = chat_index.get().reply(message)
+    
+    return jsonify({'response': response, 'intent': intent, 'tutors': rows_to_dicts(tutors)})
+
+@app.route('/api/bookings', methods=['POST'])
+@login_required
+def create_booking():
+    """Hold a session slot with a tutor while the student pays"""
+    if current_user.user_type != 'student':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
     data = request.get_json()
-    message = data.get('message', '').lower()
-    
-    # Simple rule-based chatbot
-    if 'math' in message or 'mathematics' in message:
-        response = "I can help you find math tutors! We have tutors specializing in algebra, calculus, geometry, and more. What specific math topic are you looking for?"
-    elif 'science' in message:
-        response = "Great choice! We have excellent science tutors covering physics, chemistry, biology, and more. What science subject interests you?"
-    elif 'english' in message or 'language' in message:
-        response = "Perfect! Our English tutors can help with grammar, literature, writing, and language skills. What specific area do you need help with?"
-    elif 'price' in message or 'cost' in message:
-        response = "Our tutors set their own rates, typically ranging from $20-50 per hour. You can see individual pricing on each tutor's profile."
-    elif 'location' in message or 'where' in message:
-        response = "We have tutors available both online and in-person. You can filter by location to find tutors near you."
-    else:
-        response = "I'm here to help you find the perfect tutor! You can search by subject, location, or ask me about specific topics like math, science, or English."
+    tutor_id = data.get('tutor_id')
+    if not tutor_id or not Tutor.query.get(tutor_id):
+        return jsonify({'error': 'Tutor not found'}), 404
+    try:
+        start, end = parse_slot(data.get('session_date'), data.get('duration_hours', 1))
+    except BookingError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    session_id = reserve_slot(db.session, Session, tutor_id, current_user.id, start, end, BOOKING_HOLD_MINUTES)
+    db.session.commit()
+    if session_id is None:
+        return jsonify({'error': 'This tutor is already booked at that time'}), 409
+    
+    booking = Session.query.get(session_id)
+    return jsonify({
+        'success': True,
+        'booking_id': booking.id,
+        'session_date': booking.session_date.isoformat(),
+        'end_date': booking.end_date.isoformat(),
+        'status': booking.status,
+        'hold_expires_at': booking.hold_expires_at.isoformat()
+    }), 201
+
+def _session_owner_clause(user):
+    """Filter for the sessions a user takes part in (tutor sessions are keyed by Tutor.id)"""
+    if user.user_type == 'student':
+        return Session.student_id == user.id
+    tutor = Tutor.query.filter_by(user_id=user.id).first()
+    return Session.tutor_id == (tutor.id if tutor else -1)
+
+def _session_listing(owner_clause):
+    StudentUser = aliased(User)
+    TutorUser = aliased(User)
+    return (
+        db.select(
+            Session.id, Session.session_date, Session.end_date, Session.duration_hours, Session.status,
+            Session.hold_expires_at, Session.payment_id, Session.notes, Session.updated_at,
+            StudentUser.name, TutorUser.name, Tutor.subject
+        )
+        .outerjoin(StudentUser, StudentUser.id == Session.student_id)
+        .outerjoin(Tutor, Tutor.id == Session.tutor_id)
+        .outerjoin(TutorUser, TutorUser.id == Tutor.user_id)
+        .where(owner_clause)
+    )
+
+def _encode_cursor(session_date, session_id):
+    return base64.urlsafe_b64encode(f"{session_date.isoformat()}|{session_id}".encode()).decode()
+
+def _decode_cursor(cursor):
+    session_date, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(session_date), int(session_id)
+
+@app.route('/api/sessions', methods=['GET'])
+@login_required
+def list_sessions():
+    """Sessions in a date range, oldest first, with keyset cursor pagination"""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else datetime.utcnow() - timedelta(days=1)
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else start + timedelta(days=31)
+        cursor = _decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid start, end or cursor'}), 400
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    
+    stmt = _session_listing(_session_owner_clause(current_user)).where(
+        Session.session_date >= start, Session.session_date < end
+    )
+    if request.args.get('status') != 'all':
+        stmt = stmt.where(db.or_(
+            Session.status.in_((SCHEDULED, 'completed')),
+            db.and_(Session.status == HELD, Session.hold_expires_at > datetime.utcnow())
+        ))
+    if cursor:
+        cursor_date, cursor_id = cursor
+        stmt = stmt.where(db.or_(
+            Session.session_date > cursor_date,
+            db.and_(Session.session_date == cursor_date, Session.id > cursor_id)
+        ))
+    rows = db.session.execute(stmt.order_by(Session.session_date, Session.id).limit(limit + 1)).all()
+    
+    sessions = []
+    for (session_id, session_date, end_date, duration_hours, status, hold_expires_at,
+         payment_id, notes, _, student_name, tutor_name, subject) in rows[:limit]:
+        sessions.append({
+            'id': session_id,
+            'session_date': session_date.isoformat(),
+            'end_date': session_end(session_date, end_date, duration_hours).isoformat(),
+            'duration_hours': duration_hours,
+            'status': status,
+            'hold_expires_at': hold_expires_at.isoformat() if hold_expires_at else None,
+            'payment_id': payment_id,
+            'notes': notes,
+            'student_name': student_name or 'Unknown',
+            'tutor_name': tutor_name or 'Unknown',
+            'subject': subject
+        })
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last[1], last[0])
+    return jsonify({'sessions': sessions, 'next_cursor': next_cursor})
+
+def _calendar_serializer():
+    return URLSafeSerializer(app.config['SECRET_KEY'], salt='calendar-feed')
+
+@app.route('/api/sessions/calendar', methods=['GET'])
+@login_required
+def calendar_feed_url():
+    """Private iCal subscription URL for the current user"""
+    token = _calendar_serializer().dumps(current_user.id)
+    return jsonify({'url': url_for('calendar_feed', token=token, _external=True)})
+
+@app.route('/calendar/<token>.ics', methods=['GET'])
+def calendar_feed(token):
+    """Streamed iCal feed; polls that find nothing new get a bodyless 304"""
+    try:
+        user_id = _calendar_serializer().loads(token)
+    except BadSignature:
+        return jsonify({'error': 'Not found'}), 404
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'Not found'}), 404
     
-    return jsonify({'response': response})
+    owner = _session_owner_clause(user)
+    window_start = datetime.utcnow().date() - timedelta(days=30)
+    window_end = window_start + timedelta(days=400)
+    # Any insert, status change or delete moves one of these, so they make a cheap validator
+    count, last_update, last_id = db.session.execute(
+        db.select(db.func.count(), db.func.max(Session.updated_at), db.func.max(Session.id)).where(owner)
+    ).one()
+    etag = hashlib.sha256(f"{user.id}:{window_start}:{count}:{last_update}:{last_id}".encode()).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        stmt = _session_listing(owner).where(
+            Session.session_date >= window_start,
+            Session.session_date < window_end,
+            Session.status.in_((SCHEDULED, 'completed'))
+        ).order_by(Session.session_date, Session.id).execution_options(yield_per=200)
+        
+        def events():
+            for (session_id, session_date, end_date, duration_hours, status, _, _,
+                 notes, updated_at, student_name, tutor_name, subject) in db.session.execute(stmt):
+                other = tutor_name if user.user_type == 'student' else student_name
+                yield {
+                    'uid': f"session-{session_id}@edubridge",
+                    'start': session_date,
+                    'end': session_end(session_date, end_date, duration_hours),
+                    'stamp': updated_at or session_date,
+                    'summary': f"{subject or 'Tutoring'} session with {other or 'Unknown'}",
+                    'description': notes
+                }
+        
+        response = app.response_class(
+            stream_with_context(stream_calendar(f"EduBridge sessions - {user.name}", events())),
+            mimetype='text/calendar'
+        )
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    return response
 
 # Payment Routes
 @app.route('/api/payments/create', methods=['POST'])
@@ -454,6 +1186,26 @@ def create_payment():
     payment_method = data.get('payment_method', 'mpesa')
     phone_number = data.get('phone_number')
     
+    # Paying for an existing hold: the tutor, slot and price come from the booking, not the request
+    booking_id = data.get('booking_id')
+    booking = None
+    if booking_id:
+        booking = Session.query.get(booking_id)
+        if (not booking or booking.student_id != current_user.id or booking.status != HELD
+                or booking.hold_expires_at <= datetime.utcnow()):
+            return jsonify({'error': 'Booking not found or no longer held'}), 409
+        if tutor_id and str(tutor_id) != str(booking.tutor_id):
+            return jsonify({'error': 'Booking is for a different tutor'}), 400
+        booked_tutor = Tutor.query.get(booking.tutor_id)
+        booked_amount = round((booked_tutor.price_per_hour if booked_tutor else 0) * booking.duration_hours, 2)
+        try:
+            if amount is not None and abs(float(amount) - booked_amount) > 0.01:
+                return jsonify({'error': 'Amount does not match the booked session'}), 400
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Amount must be a number'}), 400
+        tutor_id, amount, duration_hours = booking.tutor_id, booked_amount, booking.duration_hours
+        session_date = booking.session_date.isoformat()
+    
     # Validate input
     if not all([tutor_id, amount, session_date]):
         return jsonify({'error': 'Missing required fields'}), 400
@@ -462,6 +1214,18 @@ def create_payment():
     if payment_method == 'mpesa' and not phone_number:
         return jsonify({'error': 'Phone number required for M-Pesa payment'}), 400
     
+    # Without a hold, hold the requested slot now so it can't be double-booked
+    if booking is None:
+        try:
+            start, end = parse_slot(session_date, duration_hours)
+        except BookingError as e:
+            return jsonify({'error': str(e)}), 400
+        booking_id = reserve_slot(db.session, Session, tutor_id, current_user.id, start, end, BOOKING_HOLD_MINUTES)
+        db.session.commit()
+        if booking_id is None:
+            return jsonify({'error': 'This tutor is already booked at that time'}), 409
+        booking = Session.query.get(booking_id)
+    
     try:
         # Initialize IntaSend API
         intasend = APIService(
@@ -479,11 +1243,22 @@ def create_payment():
             payment_method=payment_method
         )
         db.session.add(payment)
+        db.session.flush()
+        booking.payment_id = payment.id
         db.session.commit()
         
         # Get tutor info
         tutor = Tutor.query.get(tutor_id)
         tutor_user = User.query.get(tutor.user_id) if tutor else None
+        track_event(
+            'payment_created',
+            user_id=current_user.id,
+            tutor_id=tutor_id,
+            payment_id=payment.id,
+            subject=tutor.subject if tutor else None,
+            amount=amount,
+            method=payment_method
+        )
         
         # Create IntaSend collection request for M-Pesa
         if payment_method == 'mpesa' and phone_number:
@@ -505,7 +1280,8 @@ def create_payment():
                 'callback_url': request.host_url + 'api/payments/webhook'
             }
             
-            response = intasend.collection_requests.create(collection_data)
+            with metrics.gateway_call('collection_requests.create'):
+                response = intasend.collection_requests.create(collection_data)
             
             if response.get('state') == 'PENDING':
                 payment.intasend_invoice_id = response.get('id')
@@ -522,6 +1298,7 @@ def create_payment():
                 })
             else:
                 payment.status = 'failed'
+                booking.status = CANCELLED
                 db.session.commit()
                 return jsonify({'error': 'Failed to create M-Pesa payment request'}), 500
         else:
@@ -542,7 +1319,8 @@ def create_payment():
                 }
             }
             
-            response = intasend.invoices.create(invoice_data)
+            with metrics.gateway_call('invoices.create'):
+                response = intasend.invoices.create(invoice_data)
             
             if response.get('state') == 'PENDING':
                 payment.intasend_invoice_id = response.get('id')
@@ -559,19 +1337,79 @@ def create_payment():
                 })
             else:
                 payment.status = 'failed'
+                booking.status = CANCELLED
                 db.session.commit()
                 return jsonify({'error': 'Failed to create payment'}), 500
             
     except Exception as e:
+        db.session.rollback()
+        booking.status = CANCELLED
+        db.session.commit()
         return jsonify({'error': str(e)}), 500
 
+PAYMENT_SETTLED = ('completed', 'failed', REFUND_PENDING)
+# The invoice number create_payment sends as a checkout's api_ref
+CHECKOUT_REF = re.compile(r'^INV-(\d+)$')
+
+def apply_payment_state(payment, state):
+    """Move a payment to IntaSend's state, from the webhook or a status check; side effects run once"""
+    booking = Session.query.filter_by(payment_id=payment.id).first()
+    if payment.status == REFUND_PENDING:
+        # Settled by hand from here on; retried webhooks must not reschedule it
+        app.logger.info(f"Payment {payment.id} awaits a refund, ignoring {state}")
+    elif state in ('COMPLETE', 'COMPLETED'):
+        # IntaSend settles invoices as COMPLETE and retries webhooks; only the first one is a new outcome
+        if payment.status != 'completed':
+            earlier_tutors = _student_tutor_ids(payment.student_id)
+            if payment.tutor_id not in earlier_tutors:
+                record_interaction(db.session, TutorCooccurrence, payment.tutor_id, earlier_tutors)
+            payment.status = 'completed'
+            if booking:
+                # Confirm the slot held when the payment was created, unless the hold lapsed
+                # and another booking took the slot before this webhook arrived
+                if booking.status != SCHEDULED and not confirm_slot(db.session, Session, booking):
+                    payment.status = REFUND_PENDING
+                    booking.status = CANCELLED
+                    app.logger.warning(f"Payment {payment.id} completed after its slot was taken; marked for refund")
+            else:
+                # Payments made before bookings existed have no held slot
+                session = Session(
+                    student_id=payment.student_id,
+                    tutor_id=payment.tutor_id,
+                    payment_id=payment.id,
+                    session_date=payment.created_at,
+                    end_date=payment.created_at + timedelta(hours=1),
+                    duration_hours=1
+                )
+                db.session.add(session)
+            track_event('payment_completed', user_id=payment.student_id, tutor_id=payment.tutor_id,
+                        payment_id=payment.id, amount=payment.amount)
+        app.logger.info(f"Payment {payment.id} completed")
+    elif state == 'FAILED':
+        failed_now = payment.status != 'failed'
+        payment.status = 'failed'
+        if booking and booking.status == HELD:
+            booking.status = CANCELLED
+        if failed_now:
+            track_event('payment_failed', user_id=payment.student_id, tutor_id=payment.tutor_id,
+                        payment_id=payment.id)
+        app.logger.info(f"Payment {payment.id} failed")
+    elif state == 'PENDING':
+        payment.status = 'pending'
+        app.logger.info(f"Payment {payment.id} pending")
+
 @app.route('/api/payments/status/<int:payment_id>', methods=['GET'])
 @login_required
 def get_payment_status(payment_id):
     payment = Payment.query.get_or_404(payment_id)
     
-    # Check if user is authorized to view this payment
-    if payment.student_id != current_user.id and payment.tutor_id != current_user.id:
+    # Check if user is authorized to view this payment; payments are keyed by Tutor.id, like history
+    if current_user.user_type == 'student':
+        authorized = payment.student_id == current_user.id
+    else:
+        tutor = Tutor.query.filter_by(user_id=current_user.id).first()
+        authorized = tutor is not None and payment.tutor_id == tutor.id
+    if not authorized:
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
@@ -582,22 +1420,28 @@ def get_payment_status(payment_id):
             api_url=INTASEND_API_URL
         )
         
-        if payment.intasend_invoice_id:
+        if payment.intasend_invoice_id and payment.status not in PAYMENT_SETTLED:
             # Get payment status from IntaSend
+            state = None
             try:
                 # Try to get collection request status first (for M-Pesa)
-                collection_status = intasend.collection_requests.retrieve(payment.intasend_invoice_id)
-                payment.status = collection_status.get('state', 'pending').lower()
+                with metrics.gateway_call('collection_requests.retrieve'):
+                    collection_status = intasend.collection_requests.retrieve(payment.intasend_invoice_id)
+                state = collection_status.get('state', 'PENDING')
             except:
                 # If not a collection request, try invoice
                 try:
-                    invoice_status = intasend.invoices.retrieve(payment.intasend_invoice_id)
-                    payment.status = invoice_status.get('state', 'pending').lower()
+                    with metrics.gateway_call('invoices.retrieve'):
+                        invoice_status = intasend.invoices.retrieve(payment.intasend_invoice_id)
+                    state = invoice_status.get('state', 'PENDING')
                 except:
                     # If both fail, keep current status
                     pass
             
-            db.session.commit()
+            if state:
+                # Same transition as the webhook, so whichever arrives first confirms the booking
+                apply_payment_state(payment, state.upper())
+                db.session.commit()
         
         return jsonify({
             'payment_id': payment.id,
@@ -630,26 +1474,15 @@ def payment_webhook():
         
         # Find payment by invoice ID
         payment = Payment.query.filter_by(intasend_invoice_id=invoice_id).first()
+        if payment is None:
+            # A checkout only gets its invoice when the customer pays; the api_ref is our invoice number
+            match = CHECKOUT_REF.match(data.get('api_ref') or '')
+            payment = Payment.query.get(int(match.group(1))) if match else None
+            if payment is not None:
+                payment.intasend_invoice_id = invoice_id
         
         if payment:
-            if state == 'COMPLETED':
-                payment.status = 'completed'
-                # Create session record
-                session = Session(
-                    student_id=payment.student_id,
-                    tutor_id=payment.tutor_id,
-                    payment_id=payment.id,
-                    session_date=payment.created_at,  # You might want to get this from the request
-                    duration_hours=1  # Default duration
-                )
-                db.session.add(session)
-                app.logger.info(f"Payment {payment.id} completed, session created")
-            elif state == 'FAILED':
-                payment.status = 'failed'
-                app.logger.info(f"Payment {payment.id} failed")
-            elif state == 'PENDING':
-                payment.status = 'pending'
-                app.logger.info(f"Payment {payment.id} pending")
+            apply_payment_state(payment, state)
             
             db.session.commit()
         else:
@@ -665,28 +1498,84 @@ def payment_webhook():
 @login_required
 def get_payment_history():
     """Get payment history for the current user"""
+    StudentUser = aliased(User)
+    TutorUser = aliased(User)
     if current_user.user_type == 'student':
-        payments = Payment.query.filter_by(student_id=current_user.id).order_by(Payment.created_at.desc()).all()
+        owner_clause = Payment.student_id == current_user.id
     else:
-        payments = Payment.query.filter_by(tutor_id=current_user.id).order_by(Payment.created_at.desc()).all()
+        # Payments are keyed by Tutor.id, like sessions
+        tutor = Tutor.query.filter_by(user_id=current_user.id).first()
+        owner_clause = Payment.tutor_id == (tutor.id if tutor else -1)
+    rows = db.session.execute(
+        db.select(
+            Payment.id, Payment.amount, Payment.currency, Payment.status, Payment.description,
+            Payment.created_at, StudentUser.name, TutorUser.name
+        )
+        .outerjoin(StudentUser, StudentUser.id == Payment.student_id)
+        .outerjoin(Tutor, Tutor.id == Payment.tutor_id)
+        .outerjoin(TutorUser, TutorUser.id == Tutor.user_id)
+        .where(owner_clause)
+        .order_by(Payment.created_at.desc())
+    ).all()
     
     payment_data = []
-    for payment in payments:
-        student = User.query.get(payment.student_id)
-        tutor = User.query.get(payment.tutor_id)
-        
+    for payment_id, amount, currency, status, description, created_at, student_name, tutor_name in rows:
         payment_data.append({
-            'id': payment.id,
-            'amount': payment.amount,
-            'currency': payment.currency,
-            'status': payment.status,
-            'description': payment.description,
-            'created_at': payment.created_at.isoformat(),
-            'student_name': student.name if student else 'Unknown',
-            'tutor_name': tutor.name if tutor else 'Unknown'
+            'id': payment_id,
+            'amount': amount,
+            'currency': currency,
+            'status': status,
+            'description': description,
+            'created_at': created_at.isoformat(),
+            'student_name': student_name or 'Unknown',
+            'tutor_name': tutor_name or 'Unknown'
         })
     
     return jsonify(payment_data)
+
+@app.route('/api/admin/analytics/funnel', methods=['GET'])
+@admin_required
+def analytics_funnel():
+    """Search -> connect -> pay funnel, served from the analytics aggregates only"""
+    hours = min(request.args.get('hours', 24, type=int), 24 * 90)
+    funnel = funnel_report(ANALYTICS_DB_PATH, hours=hours)
+    totals = {}
+    for row in funnel:
+        for key, value in row.items():
+            if key != 'hour':
+                totals[key] = totals.get(key, 0) + value
+    return jsonify({
+        'hours': hours,
+        'totals': totals,
+        'hourly': funnel,
+        'subjects': subject_demand_report(ANALYTICS_DB_PATH, hours=hours)
+    })
+
+@app.route('/api/admin/counters', methods=['GET'])
+@admin_required
+def counter_stats():
+    """Buffer size and flush latency for this worker's popularity counters"""
+    return jsonify(dict(tutor_stats_buffer.stats(), directory_views=directory_view_buffer.stats()))
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Stored request profiles, newest first"""
+    return jsonify({'captures': profiler.captures()})
+
+@app.route('/api/admin/profiles/<capture_id>', methods=['GET'])
+@admin_required
+def download_profile(capture_id):
+    """One capture as collapsed stacks for flamegraph.pl/speedscope, or ?format=json"""
+    document = profiler.load(capture_id)
+    if document is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(document)
+    response = app.response_class(folded(document), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename={capture_id}.folded'
+    return response
+
 import os
 
 # Run db.create_all() only once at first request
@@ -696,6 +1585,9 @@ def init_db_once():
         try:
             db.create_all()
             app.logger.info("Database tables created or already exist.")
+            # Warm the in-memory search indexes so the first searches don't pay for the build
+            suggest_index.get()
+            fuzzy_index.get()
         except Exception as e:
             app.logger.exception("Failed to create DB tables: %s", e)
             # Don't fail the request, just log the error
@@ -716,7 +1608,7 @@ def not_found_error(error):
 def health_check():
     try:
         # Test database connection
-        db.session.execute('SELECT 1')
+        db.session.execute(text('SELECT 1'))
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
@@ -731,6 +1623,13 @@ def health_check():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+@app.route('/metrics')
+def metrics_endpoint():
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    body, content_type = metrics.render()
+    return app.response_class(body, content_type=content_type)
+
 # Local dev runner
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
@@ -0,0 +1,256 @@
+"""
+Free-text tutor availability -> weekly minute-of-week intervals.
+
+"Weekdays 6-9 PM, Weekends 10 AM-2 PM" becomes half-open intervals
+[start, end) measured in minutes from Monday 00:00 (0 .. 10080). Days may
+come before or after their hours ("2-4pm weekdays"); a day only means the
+whole day when it isn't attached to any time range. Parsed
+intervals are stored in a side table when a profile is saved, and an
+``IntervalTree`` over them answers "who is available at / between" queries
+in O(log n + k).
+"""
+
+import re
+from datetime import datetime
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+_DAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+_DAY_ALIASES = {
+    'mon': 0, 'tue': 1, 'tues': 1, 'wed': 2, 'weds': 2, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'fri': 4, 'sat': 5, 'sun': 6,
+}
+_DAY_ALIASES.update({name: i for i, name in enumerate(_DAY_NAMES)})
+
+_DAY = r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tues?|weds?|thu(?:rs?)?|fri|sat|sun)s?'
+_CLOCK = r'(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?m?\.?'
+_CLOCK_RANGE = _CLOCK + r'\s*(?:-|–|to)\s*' + _CLOCK
+
+_TOKENS = re.compile(
+    rf'(?P<range>{_CLOCK_RANGE})'
+    rf'|(?P<dayrange>\b{_DAY}\s*(?:-|–|to|through)\s*{_DAY}\b)'
+    rf'|(?P<group>\bweekdays?\b|\bweekends?\b|\bdaily\b|\bevery\s*day\b)'
+    rf'|(?P<day>\b{_DAY}\b)',
+    re.IGNORECASE
+)
+# Between the days of one list ("Mon, Wed & Fri") and between days and the hours they lead ("Sat from 10-2")
+_DAY_LIST_GAP = re.compile(r'^[\s,&/]*(?:and\b)?[\s,&/]*$', re.IGNORECASE)
+_LEAD_GAP = re.compile(r'^\s*(?:from|at|:)?\s*$', re.IGNORECASE)
+_MOMENT = re.compile(rf'^\s*(?P<day>{_DAY})\s+{_CLOCK}\s*$', re.IGNORECASE)
+_WINDOW = re.compile(rf'^\s*(?P<day>{_DAY})\s+{_CLOCK_RANGE}\s*$', re.IGNORECASE)
+
+
+def _day_index(token):
+    token = token.lower().rstrip('s') if token.lower() not in _DAY_ALIASES else token.lower()
+    return _DAY_ALIASES.get(token, _DAY_ALIASES.get(token + 's'))
+
+
+def _to_minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+    return hour * 60 + minute
+
+
+def _clock_range(groups):
+    """(start, end) minutes of day for a matched _CLOCK_RANGE; end may pass midnight"""
+    h1, m1, ap1, h2, m2, ap2 = groups
+    if ap2 and not ap1:
+        # "6-9 PM" shares the meridiem, unless that would put the start after the end ("10-2 PM")
+        ap1 = ap2
+        if _to_minutes(h1, m1, ap1) >= _to_minutes(h2, m2, ap2):
+            ap1 = 'a' if ap2.lower() == 'p' else 'p'
+    start, end = _to_minutes(h1, m1, ap1), _to_minutes(h2, m2, ap2)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _wrap(start, end):
+    """Split an interval that runs past Sunday midnight back to the start of the week"""
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+
+
+def _token_days(kind, token):
+    if kind == 'dayrange':
+        first, last = re.split(r'\s*(?:-|–|to|through)\s*', token, maxsplit=1)
+        first, last = _day_index(first), _day_index(last)
+        return [(first + i) % 7 for i in range((last - first) % 7 + 1)]
+    if kind == 'group':
+        if token.startswith('weekday'):
+            return list(range(5))
+        if token.startswith('weekend'):
+            return [5, 6]
+        return list(range(7))
+    return [_day_index(token)]
+
+
+def _items(text):
+    """('range', (start, end), span) and ('days', [day, ...], span) in text order; a day list is one item"""
+    items = []
+    for match in _TOKENS.finditer(text):
+        kind = match.lastgroup
+        if kind == 'range':
+            items.append(('range', _clock_range(match.groups()[1:7]), match.span()))
+            continue
+        days = _token_days(kind, match.group(kind).lower())
+        if items and items[-1][0] == 'days' and _DAY_LIST_GAP.match(text[items[-1][2][1]:match.start()]):
+            items[-1] = ('days', items[-1][1] + days, (items[-1][2][0], match.end()))
+        else:
+            items.append(('days', days, match.span()))
+    return items
+
+
+def parse_availability(text):
+    """Parse free text into merged, sorted minute-of-week intervals"""
+    if not text:
+        return []
+    items = _items(text)
+    clauses = []       # [start, end, days]; days None until known
+    leading = []       # days waiting for the time range right after them
+    whole_days = []    # days attached to no time range
+    for i, (kind, value, span) in enumerate(items):
+        if kind == 'range':
+            clauses.append([value[0], value[1], leading or None])
+            leading = []
+            continue
+        following = items[i + 1] if i + 1 < len(items) else None
+        if following and following[0] == 'range' and _LEAD_GAP.match(text[span[1]:following[2][0]]):
+            # "Weekends 10 AM-2 PM"
+            leading = value
+        elif clauses and clauses[-1][2] is None:
+            # "2-4pm weekdays": the days follow the hours they belong to
+            clauses[-1][2] = value
+        else:
+            # "Saturdays" on its own
+            whole_days.extend(value)
+    intervals = []
+    previous_days = list(range(7))
+    for start, end, days in clauses:
+        # A range with no days repeats the days before it ("Weekdays 6-9 PM, 10-11 PM"), or every day
+        days = previous_days if days is None else days
+        for day in days:
+            intervals.extend(_wrap(day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end))
+        previous_days = days
+    for day in whole_days:
+        intervals.append((day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY))
+    return _merge(intervals)
+
+
+def parse_moment(value):
+    """Minute of week for 'Monday 18:00', 'mon 6pm' or an ISO datetime; None if unparseable"""
+    try:
+        moment = datetime.fromisoformat(value)
+        return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+    except (TypeError, ValueError):
+        pass
+    match = _MOMENT.match(value or '')
+    if not match:
+        return None
+    h, m, ap = match.groups()[1:4]
+    return _day_index(match.group('day')) * MINUTES_PER_DAY + _to_minutes(h, m, ap)
+
+
+def parse_window(value):
+    """(start, end) minutes of week for 'Monday 18:00-20:00' or 'ISO/ISO'; None if unparseable"""
+    if value and '/' in value:
+        first, second = value.split('/', 1)
+        start, end = parse_moment(first), parse_moment(second)
+        if start is None or end is None:
+            return None
+        return start, end if end > start else end + MINUTES_PER_WEEK
+    match = _WINDOW.match(value or '')
+    if not match:
+        return None
+    start, end = _clock_range(match.groups()[1:7])
+    offset = _day_index(match.group('day')) * MINUTES_PER_DAY
+    return offset + start, offset + end
+
+
+class _Node:
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+
+class IntervalTree:
+    """Static centered interval tree over half-open (start, end, value) intervals"""
+
+    def __init__(self, intervals):
+        self.size = len(intervals)
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(p for start, end, _ in intervals for p in (start, end))
+        node = _Node()
+        # Lower median: guarantees at least one interval leaves each side, so recursion terminates
+        node.center = endpoints[(len(endpoints) - 1) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= node.center:
+                left.append(interval)
+            elif interval[0] > node.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        node.by_start = sorted(here, key=lambda i: i[0])
+        node.by_end = sorted(here, key=lambda i: i[1], reverse=True)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def at(self, point):
+        """Values of every interval containing ``point``"""
+        found = []
+        node = self.root
+        while node is not None:
+            if point < node.center:
+                for start, _, value in node.by_start:
+                    if start > point:
+                        break
+                    found.append(value)
+                node = node.left
+            else:
+                for _, end, value in node.by_end:
+                    if end <= point:
+                        break
+                    found.append(value)
+                node = node.right
+        return found
+
+    def covering(self, start, end):
+        """Values of intervals that contain the whole window [start, end)"""
+        if end > MINUTES_PER_WEEK:
+            # Window runs past Sunday midnight: both halves must be covered
+            return set(self.covering(start, MINUTES_PER_WEEK)) & set(self.covering(0, end - MINUTES_PER_WEEK))
+        found = []
+        node = self.root
+        while node is not None:
+            if start < node.center:
+                for s, e, value in node.by_start:
+                    if s > start:
+                        break
+                    if e >= end:
+                        found.append(value)
+                node = node.left
+            else:
+                for s, e, value in node.by_end:
+                    if e < end:
+                        break
+                    if s <= start:
+                        found.append(value)
+                node = node.right
+        return found
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Concurrency check for session booking.
+
+Forks several worker processes (like gunicorn workers) that share one SQLite
+file, and has every student in every process try to book the same tutor slot
+at the same instant. Exactly one booking must win; everyone else must get
+409. A second round books non-overlapping slots to confirm they all succeed.
+tests/test_booking_concurrency.py runs the same rounds under pytest.
+
+Usage: python benchmarks/bench_booking_concurrency.py [--processes 4] [--threads 8]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIGNUP = {
+    'password': 'password123', 'phone': '0712345678', 'county': 'Nairobi',
+    'sub_county': 'Westlands', 'constituency': 'Westlands', 'location': 'Parklands',
+}
+
+
+def signup(client, email, user_type, **extra):
+    data = dict(SIGNUP, name=email.split('@')[0], email=email, user_type=user_type, **extra)
+    response = client.post('/signup', json=data)
+    assert response.get_json()['success'], response.get_json()
+
+
+def student_email(prefix, worker_id, index):
+    return f"{prefix}student{worker_id}-{index}@bench.local"
+
+
+def prepare(app_module, processes, threads, prefix=''):
+    """Sign up the tutor and every worker's students; returns the tutor's id"""
+    client = app_module.app.test_client()
+    signup(client, f"{prefix}tutor@bench.local", 'tutor', subject='Mathematics', price_per_hour=500,
+           availability='Daily 8 AM-8 PM', bio='')
+    with app_module.app.app_context():
+        tutor_id = app_module.Tutor.query.join(app_module.User, app_module.User.id == app_module.Tutor.user_id) \
+            .filter(app_module.User.email == f"{prefix}tutor@bench.local").one().id
+    for w in range(processes):
+        for i in range(threads):
+            signup(app_module.app.test_client(), student_email(prefix, w, i), 'student')
+    # Children must not share the parent's pooled SQLite connections
+    with app_module.app.app_context():
+        app_module.db.engine.dispose()
+    return tutor_id
+
+
+def worker(worker_id, threads, barrier, tutor_id, slot_start, staggered, prefix, results):
+    import app as app_module
+
+    try:
+        clients = []
+        for i in range(threads):
+            client = app_module.app.test_client()
+            response = client.post('/login', json={
+                'email': student_email(prefix, worker_id, i), 'password': SIGNUP['password']
+            })
+            assert response.get_json()['success'], response.get_json()
+            clients.append(client)
+
+        def book(index, client):
+            start = slot_start + timedelta(hours=2 * (worker_id * threads + index)) if staggered else slot_start
+            barrier.wait()
+            response = client.post('/api/bookings', json={
+                'tutor_id': tutor_id, 'session_date': start.isoformat(), 'duration_hours': 1.5
+            })
+            results.put(response.status_code)
+
+        pool = [threading.Thread(target=book, args=(i, c)) for i, c in enumerate(clients)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        code = 0
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    # The forked child's hashing pool, flusher threads and inherited atexit hooks can each keep it
+    # from exiting: stop the pool's processes, flush the result queue and leave without the hooks
+    app_module.password_hasher.shutdown(wait=True)
+    results.close()
+    results.join_thread()
+    os._exit(code)
+
+
+def run_round(processes, threads, tutor_id, slot_start, staggered, prefix=''):
+    """Book from ``processes`` forked workers x ``threads`` threads at once; returns {status: count}"""
+    context = multiprocessing.get_context('fork')
+    total = processes * threads
+    barrier = context.Barrier(total)
+    results = context.Queue()
+    children = [
+        context.Process(target=worker, args=(w, threads, barrier, tutor_id, slot_start, staggered, prefix, results))
+        for w in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        codes = [results.get(timeout=120) for _ in range(total)]
+    finally:
+        for child in children:
+            child.join(timeout=30)
+            if child.is_alive():
+                child.kill()
+    return {code: codes.count(code) for code in sorted(set(codes))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fire simultaneous bookings at one tutor')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-booking-'))
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['ANALYTICS_ENABLED'] = 'false'
+    import app as app_module
+
+    tutor_id = prepare(app_module, args.processes, args.threads)
+    slot = (datetime.utcnow() + timedelta(days=7)).replace(minute=0, second=0, microsecond=0)
+    total = args.processes * args.threads
+
+    started = time.perf_counter()
+    contested = run_round(args.processes, args.threads, tutor_id, slot, staggered=False)
+    print(f"{'same slot':<22} {total} bookings, {time.perf_counter() - started:.2f}s including logins -> {contested}")
+    ok = contested.get(201) == 1 and contested.get(409) == total - 1
+
+    # Stagger the second round past the contested slot so every booking is free
+    started = time.perf_counter()
+    staggered = run_round(args.processes, args.threads, tutor_id, slot + timedelta(days=1), staggered=True)
+    print(f"{'non-overlapping slots':<22} {total} bookings, {time.perf_counter() - started:.2f}s including logins "
+          f"-> {staggered}")
+    ok = ok and staggered.get(201) == total
+
+    app_module.password_hasher.shutdown()
+    print("✅ No double bookings" if ok else "❌ Booking conflict detection failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
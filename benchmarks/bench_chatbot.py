@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the /api/chatbot intent engine.
+
+Builds a ChatIndex from synthetic tutors (no database needed) and measures
+messages per second for classification and full replies, next to the old
+``if 'math' in message ... elif`` chain. --extra-subjects adds that many
+distinct tutor subjects, each of which becomes another keyword, to show the
+single compiled pass staying flat while a chain of substring checks would
+grow with every entry.
+
+Usage: python benchmarks/bench_chatbot.py [--tutors 20000] [--extra-subjects 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MESSAGES = (
+    'I need a maths tutor in Nairobi, how much does it cost?',
+    'Do you have chemistry tutors near me?',
+    'hello',
+    'looking for someone to help my daughter with kiswahili insha in Kisumu',
+    'how do I pay with mpesa',
+    'science tutors in Nakuru please',
+    'can I book a lesson for saturday',
+    'asdf qwerty',
+    'python programming classes online',
+    'My son is struggling with KCSE geography and history and government, we live in Murang\'a county',
+)
+
+
+def legacy_reply(message):
+    message = message.lower()
+    if 'math' in message or 'mathematics' in message:
+        return 'math'
+    elif 'science' in message:
+        return 'science'
+    elif 'english' in message or 'language' in message:
+        return 'english'
+    elif 'price' in message or 'cost' in message:
+        return 'price'
+    elif 'location' in message or 'where' in message:
+        return 'location'
+    return 'fallback'
+
+
+def synthetic_rows(count, extra_subjects, rng):
+    from chatbot import SUBJECT_SYNONYMS
+    from locations import KENYAN_COUNTIES
+
+    subjects = list(SUBJECT_SYNONYMS) + [f"Special Topic {i}" for i in range(extra_subjects)]
+    rows = []
+    for i in range(1, count + 1):
+        rows.append((i, f"Tutor {i}", rng.choice(subjects), float(rng.randint(300, 3000)), 'Weekdays 6-9 PM',
+                     '0700000000', 'Somewhere', None, round(rng.uniform(3, 5), 1), rng.randint(0, 200),
+                     rng.choice(KENYAN_COUNTIES)))
+    rows.sort(key=lambda row: (-row[8], -row[9], row[0]))
+    return rows
+
+
+def rate(fn, messages, seconds):
+    done = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for message in messages:
+            fn(message)
+        done += len(messages)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tutors', type=int, default=20000)
+    parser.add_argument('--extra-subjects', type=int, default=0)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    from chatbot import ChatIndex
+
+    rows = synthetic_rows(args.tutors, args.extra_subjects, random.Random(7))
+    started = time.perf_counter()
+    index = ChatIndex(rows)
+    build = time.perf_counter() - started
+    print(f"ChatIndex over {args.tutors} tutors: {len(index.keywords)} keywords, built in {build * 1000:.0f} ms")
+
+    print(f"legacy if/elif chain  {rate(legacy_reply, MESSAGES, args.seconds):>12,.0f} msg/s")
+    print(f"compiled classify     {rate(index.classify, MESSAGES, args.seconds):>12,.0f} msg/s")
+    print(f"full reply            {rate(index.reply, MESSAGES, args.seconds):>12,.0f} msg/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark for typo-tolerant search over the trigram index.
+
+Seeds a throwaway SQLite database with N tutors drawn from realistic name,
+subject and place vocabularies, builds the FuzzyIndex the way app.py does and
+times misspelled lookups per field against a plain ``LIKE '%...%'`` scan,
+which is what search_tutors() did before (and which finds nothing for
+typos). Reports build time, index memory and p50/p95 lookup latency.
+
+Usage: python benchmarks/bench_fuzzy_search.py [--tutors 100000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIRST_NAMES = ('John', 'Jane', 'Mary', 'Peter', 'Grace', 'James', 'Faith', 'David', 'Mercy', 'Brian',
+               'Esther', 'Kevin', 'Ann', 'Joseph', 'Wanjiru', 'Achieng', 'Otieno', 'Kiprop', 'Njeri', 'Mwangi')
+LAST_NAMES = ('Kamau', 'Otieno', 'Mwangi', 'Wanjiku', 'Ochieng', 'Kiprotich', 'Njoroge', 'Mutua', 'Wambui',
+              'Omondi', 'Chebet', 'Kariuki', 'Akinyi', 'Njeri', 'Odhiambo', 'Kimani', 'Cheruiyot', 'Maina')
+SUBJECTS = ('Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'Kiswahili', 'History',
+            'Geography', 'Computer Science', 'Business Studies', 'Agriculture', 'French', 'Music')
+SYLLABLES = ('ka', 'ki', 'mu', 'wa', 'nji', 'ru', 'o', 'chi', 'eng', 'ny', 'ma', 'ti', 'ba', 'ge', 'si', 'la')
+PLACES = (('Nairobi', 'Westlands'), ('Nairobi', 'Kasarani'), ('Nairobi', 'Embakasi East'),
+          ('Mombasa', 'Nyali'), ('Kisumu', 'Kisumu Central'), ('Nakuru', 'Nakuru Town East'),
+          ('Kiambu', 'Thika Town'), ('Uasin Gishu', 'Kapseret'), ('Machakos', 'Mavoko'))
+
+QUERIES = (
+    ('subject', 'mathematcs'), ('subject', 'chemestry'), ('subject', 'kiswahli'), ('subject', 'computr'),
+    ('name', 'kamua'), ('name', 'wanjiku mwangi'), ('name', 'odhimbo'), ('name', 'cheroiyot'),
+    ('location', 'nairbi'), ('location', 'kasrani'), ('location', 'mombsa nyali'), ('location', 'thika'),
+)
+
+
+def seed(app_module, count, rng):
+    db = app_module.db
+    db.create_all()
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        # A long tail of generated surnames keeps the name vocabulary realistically large
+        surnames = LAST_NAMES + tuple(
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(5000)
+        )
+        users, tutors = [], []
+        for i in range(1, count + 1):
+            county, constituency = rng.choice(PLACES)
+            area = f"Estate {rng.randint(1, 400)}"
+            users.append((i, f"{rng.choice(FIRST_NAMES)} {rng.choice(surnames)} {rng.choice(surnames)}", f"tutor{i}@bench.local"))
+            tutors.append((i, i, rng.choice(SUBJECTS), f"{area}, {constituency}, {county}",
+                           county, constituency, constituency, area))
+        cursor.executemany(
+            "INSERT INTO user (id, name, email, password_hash, user_type, phone, county, sub_county, "
+            "constituency, location, created_at) VALUES (?, ?, ?, 'x', 'tutor', '0700000000', "
+            "'Nairobi', 'Westlands', 'Westlands', 'Parklands', CURRENT_TIMESTAMP)",
+            users
+        )
+        cursor.executemany(
+            "INSERT INTO tutor (id, user_id, subject, price_per_hour, availability, whatsapp_number, location, "
+            "county, sub_county, constituency, area, rating, total_sessions, created_at) "
+            "VALUES (?, ?, ?, 800, 'Weekdays 6-9 PM', '0700000000', ?, ?, ?, ?, ?, 4.5, 0, CURRENT_TIMESTAMP)",
+            tutors
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tutors', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    import app as app_module
+
+    columns = {
+        'subject': 'tutor.subject',
+        'name': 'user.name',
+        'location': 'tutor.location',
+    }
+
+    with app_module.app.app_context():
+        print(f"Seeding {args.tutors} tutors...")
+        seed(app_module, args.tutors, random.Random(args.seed))
+
+        started = time.perf_counter()
+        index = app_module._build_fuzzy_index()
+        build = time.perf_counter() - started
+        tracemalloc.start()
+        app_module._build_fuzzy_index()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sizes = ', '.join(
+            f"{field} {len(index[field])}/{len(index[field].words)}" for field in ('subject', 'name', 'location')
+        )
+        print(f"Index build {build * 1000:.0f} ms, peak {peak / 1024 / 1024:.1f} MiB "
+              f"(distinct values/words: {sizes})")
+
+        conn = app_module.db.engine.raw_connection()
+        try:
+            print(f"{'field':<9} {'query':<16} {'matches':>8} {'tutors':>7} {'p50 ms':>8} {'p95 ms':>8} "
+                  f"{'LIKE ms':>8} {'LIKE hits':>9}")
+            for field, text in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    matches = index[field].similar(text, app_module.FUZZY_THRESHOLD)
+                    timings.append(time.perf_counter() - started)
+                tutor_count = len(index[field].tutor_ids(value for value, _ in matches))
+
+                started = time.perf_counter()
+                like_hits = conn.execute(
+                    f"SELECT count(*) FROM tutor JOIN user ON user.id = tutor.user_id WHERE {columns[field]} LIKE ?",
+                    (f"%{text}%",)
+                ).fetchone()[0]
+                like = time.perf_counter() - started
+
+                print(f"{field:<9} {text:<16} {len(matches):>8} {tutor_count:>7} "
+                      f"{percentile(timings, 0.5) * 1000:>8.2f} {percentile(timings, 0.95) * 1000:>8.2f} "
+                      f"{like * 1000:>8.1f} {like_hits:>9}")
+        finally:
+            conn.close()
+
+        words = [text for _, text in QUERIES]
+        timings = []
+        for _ in range(max(1, args.repeat // 5)):
+            for text in words:
+                started = time.perf_counter()
+                index.best_scores(text, app_module.FUZZY_THRESHOLD)
+                timings.append(time.perf_counter() - started)
+        print(f"All-field scoring (query fallback): p50 {statistics.median(timings) * 1000:.2f} ms, "
+              f"p95 {percentile(timings, 0.95) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Login latency and throughput with inline vs pooled password hashing.
+
+Seeds users, then has --concurrency threads log in through the Flask test
+client for a fixed time, first hashing on the request thread and then
+through the PasswordHasher process pool. Reports logins/s, p50/p95/p99
+latency and how many requests were turned away with 503 because the
+hashing queue was full.
+
+Usage: python benchmarks/bench_login.py [--concurrency 16] [--workers 2] [--seconds 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'correct horse battery staple'
+
+
+def seed(app_module, count):
+    password_hash = app_module.password_hasher.hash(PASSWORD)
+    db = app_module.db
+    db.create_all()
+    conn = db.engine.raw_connection()
+    try:
+        conn.cursor().executemany(
+            "INSERT INTO user (id, name, email, password_hash, user_type, phone, county, sub_county, "
+            "constituency, location, created_at) VALUES (?, ?, ?, ?, 'student', '0700000000', "
+            "'Nairobi', 'Westlands', 'Westlands', 'Parklands', CURRENT_TIMESTAMP)",
+            [(i, f"Student {i}", f"student{i}@bench.local", password_hash) for i in range(1, count + 1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(app_module, concurrency, seconds, users):
+    latencies, rejected, failed = [], [0], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client_loop(n):
+        client = app_module.app.test_client()
+        i = n
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = client.post('/login', json={'email': f"student{i % users + 1}@bench.local", 'password': PASSWORD})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 503:
+                    rejected[0] += 1
+                elif response.status_code != 200 or not response.json.get('success'):
+                    failed[0] += 1
+                else:
+                    latencies.append(elapsed)
+            i += concurrency
+
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, rejected[0], failed[0], time.perf_counter() - started
+
+
+def report(label, latencies, rejected, failed, elapsed):
+    ordered = sorted(latencies) or [0.0]
+
+    def pct(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    print(f"{label:<14} {len(latencies) / elapsed:8.1f} logins/s  p50 {pct(0.5):7.1f} ms  "
+          f"p95 {pct(0.95):7.1f} ms  p99 {pct(0.99):7.1f} ms  rejected {rejected:5d}  failed {failed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2, help='Hashing pool processes')
+    parser.add_argument('--max-pending', type=int, default=None, help='Queue limit (default: 4 per pool process)')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--users', type=int, default=200)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['ANALYTICS_ENABLED'] = 'false'
+    import app as app_module
+    from passwords import PasswordHasher
+
+    policy = app_module.password_hasher.policy
+    print(f"Hash method {policy.method}, {os.cpu_count()} CPUs, {args.concurrency} concurrent clients")
+    with app_module.app.app_context():
+        app_module.password_hasher = PasswordHasher(policy, workers=0)
+        seed(app_module, args.users)
+        report('inline', *run(app_module, args.concurrency, args.seconds, args.users))
+
+        max_pending = args.max_pending or args.workers * 4
+        app_module.password_hasher = PasswordHasher(policy, workers=args.workers, max_pending=max_pending)
+        app_module.password_hasher.hash(PASSWORD)  # start the pool outside the measurement
+        report(f"pool x{args.workers} q{max_pending}", *run(app_module, args.concurrency, args.seconds, args.users))
+        app_module.password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
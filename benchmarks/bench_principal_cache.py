@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+SQL statements per authenticated request with and without the principal cache.
+
+Seeds students and tutors, logs a set of students in, then replays the
+dashboard's polling calls (connections, sessions, payment history and
+payment status) round-robin across them. Statements are counted with a
+``before_cursor_execute`` listener on the engine, once with
+PRINCIPAL_CACHE_TTL=0 (every request loads its user) and once with the
+cache on, and reported as queries per request alongside request latency.
+
+Usage: python benchmarks/bench_principal_cache.py [--users 50] [--requests 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'bench-password'
+
+
+def seed(app_module, users):
+    db = app_module.db
+    db.create_all()
+    password_hash = app_module.password_hasher.hash(PASSWORD)
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO user (id, name, email, password_hash, user_type, phone, county, sub_county, "
+            "constituency, location, created_at) VALUES (?, ?, ?, ?, ?, '0700000000', 'Nairobi', "
+            "'Westlands', 'Westlands', 'Parklands', CURRENT_TIMESTAMP)",
+            [(i, f"User {i}", f"user{i}@bench.local", password_hash, 'student' if i <= users else 'tutor')
+             for i in range(1, users * 2 + 1)]
+        )
+        cursor.executemany(
+            "INSERT INTO tutor (id, user_id, subject, price_per_hour, availability, whatsapp_number, location, "
+            "rating, total_sessions) VALUES (?, ?, 'Mathematics', 1000, 'Weekdays 6-9 PM', '0700000000', "
+            "'Parklands', 4.5, 0)",
+            [(i, users + i) for i in range(1, users + 1)]
+        )
+        cursor.executemany(
+            "INSERT INTO connection (student_id, tutor_id, timestamp) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            [(i, i) for i in range(1, users + 1)]
+        )
+        cursor.executemany(
+            "INSERT INTO payment (id, student_id, tutor_id, amount, status, created_at) "
+            "VALUES (?, ?, ?, 1000, 'pending', CURRENT_TIMESTAMP)",
+            [(i, i, i) for i in range(1, users + 1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(app_module, engine, users, requests):
+    clients = []
+    for i in range(1, users + 1):
+        client = app_module.app.test_client()
+        response = client.post('/login', json={'email': f"user{i}@bench.local", 'password': PASSWORD})
+        assert response.json.get('success'), response.json
+        clients.append((i, client))
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    app_module.db.event.listen(engine, 'before_cursor_execute', count)
+    try:
+        started = time.perf_counter()
+        for n in range(requests):
+            user_id, client = clients[n % users]
+            path = ('/api/connections', '/api/sessions', '/api/payments/history',
+                    f"/api/payments/status/{user_id}")[n // users % 4]
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        elapsed = time.perf_counter() - started
+    finally:
+        app_module.db.event.remove(engine, 'before_cursor_execute', count)
+    return statements[0] / requests, elapsed / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['ANALYTICS_ENABLED'] = 'false'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    import app as app_module
+
+    with app_module.app.app_context():
+        seed(app_module, args.users)
+        engine = app_module.db.engine
+
+    # Requests run outside an app context so each one gets a fresh flask.g and loads its own user
+    cache = app_module.principal_cache
+    results = {}
+    for label, ttl in (('no cache', 0), ('cache', 60)):
+        cache.ttl = ttl
+        cache.invalidate()
+        cache.hits = cache.misses = 0
+        results[label] = run(app_module, engine, args.users, args.requests)
+        queries, latency = results[label]
+        print(f"{label:<9} {queries:5.2f} queries/request  {latency * 1000:6.2f} ms/request  "
+              f"hits {cache.hits} misses {cache.misses}")
+    saved = results['no cache'][0] - results['cache'][0]
+    print(f"The cache saves {saved:.2f} queries per request ({saved / results['no cache'][0]:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Overhead of the token-bucket rate limiter.
+
+Times ``take()`` on the in-process and SQLite backends, then the cost the
+decorator adds to a real Flask request by calling a trivial route with and
+without ``@rate_limit`` through the test client. Buckets are large enough
+that nothing is rejected, so only the bookkeeping is measured.
+
+Usage: python benchmarks/bench_ratelimit.py [--requests 20000] [--clients 1000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def per_call(fn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=1000, help='Distinct identities the calls are spread over')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    from flask import Flask
+    from ratelimit import Limit, MemoryBackend, RateLimiter, SQLiteBackend
+
+    limit = Limit(10 ** 9, 60)
+    backends = {
+        'memory': MemoryBackend(),
+        'sqlite': SQLiteBackend(os.path.join(os.getcwd(), 'ratelimit.db')),
+    }
+    for name, backend in backends.items():
+        cost = per_call(lambda i: backend.take(f"search:ip:10.0.{i % args.clients}", limit), args.requests)
+        print(f"{name:<7} backend take()        {cost * 1e6:8.2f} us")
+
+    for name, backend in backends.items():
+        app = Flask(__name__)
+        limiter = RateLimiter(backend, {'bench': limit})
+
+        @app.route('/plain')
+        def plain():
+            return 'ok'
+
+        @app.route('/limited')
+        @limiter.limit('bench')
+        def limited():
+            return 'ok'
+
+        client = app.test_client()
+        environ = [{'REMOTE_ADDR': f"10.1.{i // 256 % 256}.{i % 256}"} for i in range(args.clients)]
+        base = per_call(lambda i: client.get('/plain', environ_base=environ[i % args.clients]), args.requests)
+        with_limit = per_call(lambda i: client.get('/limited', environ_base=environ[i % args.clients]), args.requests)
+        print(f"{name:<7} request: plain {base * 1e6:8.1f} us, limited {with_limit * 1e6:8.1f} us, "
+              f"overhead {(with_limit - base) * 1e6:6.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Route-level benchmark suite with regression thresholds.
+
+For each dataset size, generates a fresh database with generate_dataset.py
+and drives every route in app.py through the Flask test client: anonymous
+pages, the search and directory APIs, student and tutor dashboards,
+bookings, payments (against benchmarks/intasend_stub.py, started
+in-process), the webhook and the admin reports. Each case records
+p50/p95/p99 latency, throughput, SQL statements per request (counted with
+a ``before_cursor_execute`` listener) and peak Python memory per request
+(a separate tracemalloc pass, so it doesn't skew the timings).
+
+--save writes the results as the baseline JSON. Otherwise, when the
+baseline file exists, every case is compared against it and the run exits
+with status 1 if any case's p95 grew by more than --threshold (and by at
+least --min-delta-ms), its query count grew, or its peak memory grew by
+more than --threshold. Baselines are only comparable on the machine that
+wrote them, so record them on the CI runner.
+
+Usage:
+  python benchmarks/bench_routes.py --sizes tiny,small --save
+  python benchmarks/bench_routes.py [--threshold 0.25] [--routes search,sessions]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'route_baselines.json')
+PASSWORD = 'password123'
+ADMIN_EMAIL = 'student2@example.com'
+
+
+def _sizes():
+    from generate_dataset import SCALES
+
+    sizes = {'tiny': {'tutors': 200, 'students': 2000, 'payments': 5000}}
+    sizes.update(SCALES)
+    return sizes
+
+
+class Case:
+    """One request shape; ``path`` and ``body`` may be callables of (context, n)"""
+
+    def __init__(self, name, rule, method='GET', path=None, role='anon', body=None, expect=(200,),
+                 samples=None, relogin=False):
+        self.name = name
+        self.rule = rule
+        self.method = method
+        self.path = path or rule
+        self.role = role
+        self.body = body
+        self.expect = expect
+        self.samples = samples
+        self.relogin = relogin
+
+    def request_args(self, ctx, n):
+        path = self.path(ctx, n) if callable(self.path) else self.path
+        body = self.body(ctx, n) if callable(self.body) else self.body
+        return path, body
+
+
+def _slot(n):
+    # Far enough ahead that generated sessions never collide with benchmark bookings
+    start = datetime.utcnow().replace(hour=6, minute=0, second=0, microsecond=0) + timedelta(days=400)
+    return (start + timedelta(hours=2 * n)).isoformat()
+
+
+# Read-only cases first: the writes at the end bump the directory generation and add rows
+CASES = (
+    Case('landing', '/'),
+    Case('login page', '/login'),
+    Case('signup page', '/signup'),
+    Case('health', '/health'),
+    Case('tutors', '/api/tutors'),
+    Case('tutor detail', '/api/tutors/<int:tutor_id>', path=lambda ctx, n: f"/api/tutors/{1 + n % ctx['tutors']}"),
+    Case('search subject', '/api/tutors/search', path='/api/tutors/search?subject=Mathematics'),
+    Case('search typo', '/api/tutors/search', path='/api/tutors/search?subject=chemestry&location=nairbi'),
+    Case('search query', '/api/tutors/search', path='/api/tutors/search?query=kamau%20physics'),
+    Case('search available', '/api/tutors/search',
+         path='/api/tutors/search?available_at=Monday%2018:00&min_price=500&max_price=2000'),
+    Case('search near', '/api/tutors/search', path='/api/tutors/search?near=Westlands&limit=20'),
+    Case('search popular', '/api/tutors/search', path='/api/tutors/search?subject=English&sort=popular'),
+    Case('suggest', '/api/suggest', path=lambda ctx, n: f"/api/suggest?field=subject&prefix={'mcpbe'[n % 5]}"),
+    Case('facets', '/api/tutors/facets'),
+    Case('similar', '/api/tutors/<int:tutor_id>/similar',
+         path=lambda ctx, n: f"/api/tutors/{1 + n % ctx['tutors']}/similar"),
+    Case('chatbot', '/api/chatbot', method='POST',
+         body=lambda ctx, n: {'message': ('I need a maths tutor in Nairobi', 'how much does chemistry cost?',
+                                          'hello', 'kiswahili tutors in Kisumu')[n % 4]}),
+    Case('dashboard student', '/dashboard', role='student'),
+    Case('dashboard tutor', '/dashboard', role='tutor'),
+    Case('tutor profile', '/api/tutor/profile', role='tutor'),
+    Case('connections student', '/api/connections', role='student'),
+    Case('connections tutor', '/api/connections', role='tutor'),
+    Case('sessions student', '/api/sessions', role='student'),
+    Case('sessions tutor', '/api/sessions', role='tutor',
+         path=lambda ctx, n: f"/api/sessions?start={ctx['anchor']}&status=all"),
+    Case('calendar url', '/api/sessions/calendar', role='student'),
+    Case('calendar feed', '/calendar/<token>.ics', path=lambda ctx, n: ctx['calendar_path']),
+    Case('payment history', '/api/payments/history', role='student'),
+    Case('payment status', '/api/payments/status/<int:payment_id>', role='student',
+         path=lambda ctx, n: f"/api/payments/status/{ctx['payment_id']}"),
+    Case('admin funnel', '/api/admin/analytics/funnel', role='admin'),
+    Case('admin counters', '/api/admin/counters', role='admin'),
+    Case('admin profiles', '/api/admin/profiles', role='admin'),
+    Case('admin profile', '/api/admin/profiles/<capture_id>', role='admin',
+         path=lambda ctx, n: f"/api/admin/profiles/{ctx['profile_id']}"),
+    Case('metrics', '/metrics'),
+    Case('login', '/login', method='POST', samples=10,
+         body=lambda ctx, n: {'email': ctx['student_email'], 'password': PASSWORD}),
+    Case('signup', '/signup', method='POST', samples=10, body=lambda ctx, n: {
+        'name': 'Bench Student', 'email': f"bench-{ctx['size']}-{n}@example.com", 'password': PASSWORD,
+        'user_type': 'student', 'phone': '0700000000', 'county': 'Nairobi', 'sub_county': 'Westlands',
+        'constituency': 'Westlands', 'location': 'Parklands'}),
+    Case('logout', '/logout', role='student', expect=(302,), relogin=True),
+    Case('connect', '/api/connect', method='POST', role='student',
+         body=lambda ctx, n: {'tutor_id': ctx['unconnected'][n % len(ctx['unconnected'])]}),
+    Case('connect bulk', '/api/connect/bulk', method='POST', role='student',
+         body=lambda ctx, n: {'tutor_ids': [1 + (n * 5 + i) % ctx['tutors'] for i in range(5)]}),
+    Case('booking', '/api/bookings', method='POST', role='student', expect=(201,),
+         body=lambda ctx, n: {'tutor_id': 1 + n % ctx['tutors'], 'session_date': _slot(n), 'duration_hours': 1}),
+    Case('payment create', '/api/payments/create', method='POST', role='student',
+         body=lambda ctx, n: {'tutor_id': 1 + n % ctx['tutors'], 'amount': 1000, 'duration_hours': 1,
+                              'session_date': _slot(10000 + n), 'payment_method': 'mpesa',
+                              'phone_number': '0712345678'}),
+    Case('webhook', '/api/payments/webhook', method='POST', expect=(200,),
+         body=lambda ctx, n: {'invoice_id': ctx['pending_invoices'][n % len(ctx['pending_invoices'])],
+                              'state': 'COMPLETE'}),
+    Case('tutor profile save', '/api/tutor/profile', method='POST', role='tutor', body=lambda ctx, n: {
+        'subject': 'Mathematics', 'price_per_hour': 1000 + n % 10, 'availability': 'Weekdays 6-9 PM',
+        'whatsapp_number': '0700000000', 'location': 'Parklands', 'bio': f"Revision {n}"}),
+)
+
+
+def prepare(app_module, size, counts):
+    """Generate the dataset for ``size`` into the app's database and return the request context"""
+    from generate_dataset import generate
+    from passwords import PasswordHasher
+    from recommendations import rebuild
+
+    db = app_module.db
+    with app_module.app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    if os.path.exists(app_module.db_path):
+        os.remove(app_module.db_path)
+    anchor = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    password_hash = PasswordHasher(app_module.password_hasher.policy, workers=0).hash(PASSWORD)
+    started = time.perf_counter()
+    generate(app_module.db_path, anchor=anchor, password_hash=password_hash, progress=lambda line: None, **counts)
+
+    with app_module.app.app_context():
+        rebuild(db.session, app_module.Connection, app_module.Payment, app_module.TutorCooccurrence)
+        db.session.commit()
+        # The student who made payment 1, so the payment status case reads one of their own
+        student_id = db.session.execute(db.text('SELECT student_id FROM payment WHERE id = 1')).scalar()
+        student_email = f"student{student_id - counts['tutors']}@example.com"
+        pending = db.session.execute(db.text(
+            "SELECT intasend_invoice_id FROM payment WHERE status = 'pending' LIMIT 500"
+        )).scalars().all()
+        connected = set(db.session.execute(
+            db.text('SELECT tutor_id FROM connection WHERE student_id = :id'), {'id': student_id}
+        ).scalars())
+        admin_id = db.session.execute(db.text('SELECT id FROM user WHERE email = :email'), {'email': ADMIN_EMAIL}).scalar()
+    app_module.directory_generation.bump()
+    app_module.principal_cache.invalidate()
+    print(f"\n== {size}: {counts['tutors']:,} tutors, {counts['students']:,} students, "
+          f"{counts['payments']:,} payments (generated in {time.perf_counter() - started:.1f}s)")
+
+    ctx = {
+        'size': size,
+        'tutors': counts['tutors'],
+        'anchor': anchor.isoformat(),
+        'payment_id': 1,
+        'student_email': student_email,
+        'pending_invoices': pending or ['none'],
+        'unconnected': [tutor_id for tutor_id in range(1, counts['tutors'] + 1) if tutor_id not in connected],
+        # Tutor 1 belongs to user 1
+        'users': {'student': student_id, 'tutor': 1, 'admin': admin_id},
+    }
+    client = client_for(app_module, ctx, 'student')
+    ctx['calendar_path'] = urlsplit(client.get('/api/sessions/calendar').json['url']).path
+    # One stored capture for the profile download case
+    client = client_for(app_module, ctx, 'admin')
+    ctx['profile_id'] = client.get('/api/tutors', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+    return ctx
+
+
+def client_for(app_module, ctx, role):
+    client = app_module.app.test_client()
+    if role != 'anon':
+        login(client, ctx['users'][role])
+    return client
+
+
+def login(client, user_id):
+    # Sign the session in directly so only the login case pays for password hashing
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(app_module, case, ctx, samples, warmup, statements):
+    client = client_for(app_module, ctx, case.role)
+
+    def call(n):
+        if case.relogin:
+            login(client, ctx['users'][case.role])
+        path, body = case.request_args(ctx, n)
+        started = time.perf_counter()
+        response = client.open(path, method=case.method, json=body)
+        elapsed = time.perf_counter() - started
+        if response.status_code not in case.expect:
+            raise AssertionError(f"{case.name}: {case.method} {path} returned {response.status_code}, "
+                                 f"expected {case.expect}: {response.get_data(as_text=True)[:200]}")
+        response.close()
+        return elapsed
+
+    n = 0
+    for _ in range(warmup):
+        call(n)
+        n += 1
+
+    statements[0] = 0
+    latencies = []
+    wall = time.perf_counter()
+    for _ in range(samples):
+        latencies.append(call(n))
+        n += 1
+    wall = time.perf_counter() - wall
+    queries = statements[0] / samples
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(samples, 10)):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call(n)
+            n += 1
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(ordered, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'rps': round(samples / wall, 1),
+        'queries': round(queries, 2),
+        'peak_kb': round(max(peaks) / 1024, 1),
+        'samples': samples,
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Regression messages for cases that got slower, chattier or hungrier than the baseline"""
+    problems = []
+    for size, cases in results.items():
+        for name, now in cases.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            if now['p95_ms'] > before['p95_ms'] * (1 + threshold) and now['p95_ms'] - before['p95_ms'] >= min_delta_ms:
+                problems.append(f"{size}/{name}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+            if now['queries'] > before['queries'] + 0.5:
+                problems.append(f"{size}/{name}: queries/request {before['queries']:g} -> {now['queries']:g}")
+            if now['peak_kb'] > before['peak_kb'] * (1 + threshold) and now['peak_kb'] - before['peak_kb'] >= 64:
+                problems.append(f"{size}/{name}: peak memory {before['peak_kb']:.0f} -> {now['peak_kb']:.0f} KB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='tiny,small', help='Comma-separated: tiny, small, medium, large')
+    parser.add_argument('--samples', type=int, default=100, help='Timed requests per case')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--routes', default='', help='Only cases whose name contains one of these (comma-separated)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative growth in p95 and memory')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore p95 changes smaller than this')
+    args = parser.parse_args()
+
+    sizes = _sizes()
+    selected = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in selected if size not in sizes]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+    filters = [part.strip() for part in args.routes.split(',') if part.strip()]
+    cases = [case for case in CASES if not filters or any(part in case.name for part in filters)]
+
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    os.environ['ADMIN_EMAILS'] = ADMIN_EMAIL
+    # Payments go to the local IntaSend stub, never the sandbox; they don't settle during the run
+    from intasend_stub import Stub, serve
+    stub_server = serve(Stub(latency=0, jitter=0, callback_delay=24 * 3600, seed=0), port=0)
+    threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+    os.environ['INTASEND_API_URL'] = f"http://127.0.0.1:{stub_server.server_port}"
+    import app as app_module
+    # Keeps per-request app log lines out of the results table
+    app_module.app.logger.setLevel(logging.CRITICAL)
+
+    routes = {(rule.rule, method) for rule in app_module.app.url_map.iter_rules() if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    uncovered = routes - {(case.rule, case.method) for case in CASES}
+    if uncovered:
+        print(f"⚠ Routes without a benchmark case: {', '.join(f'{m} {r}' for r, m in sorted(uncovered))}")
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    with app_module.app.app_context():
+        app_module.db.event.listen(app_module.db.engine, 'before_cursor_execute', count)
+
+    results = {}
+    for size in selected:
+        ctx = prepare(app_module, size, sizes[size])
+        results[size] = {}
+        print(f"{'case':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'peak KB':>8}")
+        for case in cases:
+            samples = min(args.samples, case.samples or args.samples)
+            row = results[size][case.name] = measure(app_module, case, ctx, samples, args.warmup, statements)
+            print(f"{case.name:<22} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f} "
+                  f"{row['rps']:8.1f} {row['queries']:8.2f} {row['peak_kb']:8.1f}")
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'meta': {'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+                         'python': platform.python_version(), 'machine': platform.machine(),
+                         'cpus': os.cpu_count(), 'samples': args.samples},
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    problems = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if problems:
+        print(f"\n❌ {len(problems)} regression(s) against {args.baseline}:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print(f"\n✓ No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the tutor listing serializer.
+
+Seeds a throwaway SQLite database with N tutors and compares building the
+/api/tutors payload from ORM instances against the Core tuple fast path in
+tutor_serializer.py. Reports per-row cost and tracemalloc peak memory.
+
+Usage: python benchmarks/bench_tutor_serializer.py [--tutors 50000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(app_module, count):
+    """Bulk insert users and tutors straight through the DB-API connection"""
+    db = app_module.db
+    db.create_all()
+    conn = db.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO user (id, name, email, password_hash, user_type, phone, county, sub_county, "
+            "constituency, location, created_at) VALUES (?, ?, ?, 'x', 'tutor', '0700000000', "
+            "'Nairobi', 'Westlands', 'Westlands', 'Parklands', CURRENT_TIMESTAMP)",
+            [(i, f"Tutor {i}", f"tutor{i}@bench.local") for i in range(1, count + 1)]
+        )
+        cursor.executemany(
+            "INSERT INTO tutor (id, user_id, subject, price_per_hour, availability, whatsapp_number, "
+            "location, bio, rating, total_sessions, created_at) VALUES (?, ?, ?, ?, 'Weekdays 6-9 PM', "
+            "'0700000000', 'Nairobi, Westlands, Westlands, Parklands', ?, 4.5, 10, CURRENT_TIMESTAMP)",
+            [(i, i, ('Mathematics', 'Physics', 'Chemistry')[i % 3], 500.0 + i % 1000,
+              f"Experienced tutor number {i}") for i in range(1, count + 1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def orm_listing(app_module):
+    db, Tutor, User = app_module.db, app_module.Tutor, app_module.User
+    result = []
+    for tutor, user in db.session.query(Tutor, User).join(User, User.id == Tutor.user_id):
+        result.append({
+            'id': tutor.id,
+            'name': user.name,
+            'subject': tutor.subject,
+            'price_per_hour': tutor.price_per_hour,
+            'availability': tutor.availability,
+            'whatsapp_number': tutor.whatsapp_number,
+            'location': tutor.location,
+            'bio': tutor.bio,
+            'rating': tutor.rating,
+            'total_sessions': tutor.total_sessions
+        })
+    db.session.expunge_all()
+    return app_module.json.dumps(result).encode('utf-8')
+
+
+def core_listing(app_module):
+    from tutor_serializer import tutor_select, fetch_rows, rows_to_dicts, dumps
+    rows = fetch_rows(app_module.db.session, tutor_select(app_module.Tutor, app_module.User))
+    return dumps(rows_to_dicts(rows))
+
+
+def measure(label, fn, app_module, count, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = fn(app_module)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    fn(app_module)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(timings)
+    print(f"{label:<12} best {best * 1000:8.1f} ms  "
+          f"{best / count * 1e6:6.2f} us/row  "
+          f"peak {peak / 1024 / 1024:7.1f} MiB  "
+          f"payload {len(payload) / 1024 / 1024:5.1f} MiB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tutors', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # app.py places its database in the working directory
+    os.chdir(tempfile.mkdtemp(prefix='edubridge-bench-'))
+    import app as app_module
+
+    with app_module.app.app_context():
+        print(f"Seeding {args.tutors} tutors...")
+        seed(app_module, args.tutors)
+        from tutor_serializer import orjson
+        print(f"JSON encoder: {'orjson' if orjson else 'stdlib json'}")
+        orm = measure('ORM objects', orm_listing, app_module, args.tutors, args.repeat)
+        core = measure('Core tuples', core_listing, app_module, args.tutors, args.repeat)
+        print(f"Speed-up: {orm / core:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the IntaSend API, for load tests without the sandbox.
+
+Serves the v1 endpoints the intasend-python SDK calls, with the same
+request and response bodies:
+  POST /api/v1/payment/mpesa-stk-push/   M-Pesa STK push (bearer token), answers the PENDING invoice
+  POST /api/v1/checkout/                 card/bank checkout, answers the checkout id and url
+  POST /api/v1/payment/status/           {"invoice_id"} or {"checkout_id", "signature"}, answers the invoice
+  GET  /stats                            counters for the load driver
+
+Every call sleeps for --latency ms (plus up to --jitter ms) and fails with a
+500 at --error-rate. After --callback-delay seconds (plus jitter) each
+invoice settles as COMPLETE, or FAILED at --fail-rate, and the invoice is
+POSTed to --webhook-url with the --challenge string, the way IntaSend
+delivers the webhook configured in its dashboard. The status answer changes
+at the same moment.
+
+Usage: python benchmarks/intasend_stub.py [--port 8900] [--latency 150] [--error-rate 0.01]
+           [--callback-delay 3] [--fail-rate 0.05] [--webhook-url http://127.0.0.1:8000/api/payments/webhook]
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STK_PUSH = '/api/v1/payment/mpesa-stk-push/'
+CHECKOUT = '/api/v1/checkout/'
+STATUS = '/api/v1/payment/status/'
+
+
+def _error(code, detail):
+    return {'type': 'client_error' if code.startswith('4') else 'server_error',
+            'errors': [{'code': code, 'detail': detail}]}
+
+
+class Stub:
+    """Invoice state, fault injection and the webhook scheduler"""
+
+    def __init__(self, latency=0.15, jitter=0.05, error_rate=0.0, callback_delay=3.0, fail_rate=0.05,
+                 webhook_url=None, challenge=None, callback_workers=4, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.callback_delay = callback_delay
+        self.fail_rate = fail_rate
+        self.webhook_url = webhook_url
+        self.challenge = challenge
+        self.rng = random.Random(seed)
+        self.invoices = {}
+        self.checkouts = {}
+        self.stats = Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._due = []
+        self._wakeup = threading.Condition(self._lock)
+        for _ in range(callback_workers):
+            threading.Thread(target=self._deliver_callbacks, daemon=True).start()
+
+    def delay(self):
+        with self._lock:
+            pause = self.latency + self.rng.uniform(0, self.jitter)
+            injected = self.rng.random() < self.error_rate
+        time.sleep(pause)
+        return injected
+
+    def _invoice(self, provider, data, account):
+        # Caller holds the lock
+        now = datetime.utcnow().isoformat() + 'Z'
+        invoice_id = f"{next(self._ids):07X}"
+        value = f"{float(data.get('amount') or 0):.2f}"
+        invoice = {
+            'invoice_id': invoice_id, 'state': 'PENDING', 'provider': provider, 'charges': '0.00',
+            'net_amount': value, 'currency': data.get('currency') or 'KES', 'value': value,
+            'account': account, 'api_ref': data.get('api_ref'), 'mpesa_reference': None,
+            'host': '127.0.0.1', 'failed_reason': None, 'failed_code': None,
+            'created_at': now, 'updated_at': now,
+        }
+        self.invoices[invoice_id] = (invoice, 'FAILED' if self.rng.random() < self.fail_rate else 'COMPLETE')
+        settle_at = time.time() + self.callback_delay + self.rng.uniform(0, self.callback_delay / 2)
+        heapq.heappush(self._due, (settle_at, invoice_id))
+        self._wakeup.notify()
+        return invoice
+
+    def _customer(self, data):
+        return {'customer_id': uuid.uuid4().hex[:7].upper(), 'phone_number': data.get('phone_number'),
+                'email': data.get('email'), 'first_name': data.get('first_name') or data.get('name'),
+                'last_name': data.get('last_name'), 'country': 'KE'}
+
+    def stk_push(self, data):
+        with self._lock:
+            self.stats['stk_push.created'] += 1
+            invoice = self._invoice('M-PESA', data, data.get('phone_number'))
+            return {'id': str(uuid.uuid4()), 'invoice': dict(invoice), 'customer': self._customer(data),
+                    'payment_link': None, 'customer_comment': None, 'refundable': False,
+                    'created_at': invoice['created_at'], 'updated_at': invoice['updated_at']}
+
+    def checkout(self, data):
+        with self._lock:
+            self.stats['checkout.created'] += 1
+            invoice = self._invoice('CARD-PAYMENT', data, data.get('email'))
+            checkout_id = str(uuid.uuid4())
+            signature = uuid.uuid4().hex
+            self.checkouts[checkout_id] = (signature, invoice['invoice_id'])
+            return dict(self._customer(data), id=checkout_id,
+                        url=f"https://sandbox.intasend.com/checkout/{checkout_id}/express/",
+                        signature=signature, amount=invoice['value'], currency=invoice['currency'],
+                        paid=False, api_ref=data.get('api_ref'), method=data.get('method'),
+                        created_at=invoice['created_at'], updated_at=invoice['updated_at'])
+
+    def status(self, data):
+        with self._lock:
+            self.stats['status.checked'] += 1
+            invoice_id = data.get('invoice_id')
+            if data.get('checkout_id'):
+                signature, invoice_id = self.checkouts.get(data['checkout_id'], (None, None))
+                if signature != data.get('signature'):
+                    return None
+            entry = self.invoices.get(invoice_id)
+            return None if entry is None else {'invoice': dict(entry[0])}
+
+    def _deliver_callbacks(self):
+        while True:
+            with self._lock:
+                while not self._due or self._due[0][0] > time.time():
+                    self._wakeup.wait(timeout=None if not self._due else self._due[0][0] - time.time())
+                _, invoice_id = heapq.heappop(self._due)
+                invoice, final_state = self.invoices[invoice_id]
+                invoice['state'] = final_state
+                invoice['updated_at'] = datetime.utcnow().isoformat() + 'Z'
+                if final_state == 'FAILED':
+                    invoice['failed_reason'] = 'Request cancelled by user'
+                    invoice['failed_code'] = '1032'
+                elif invoice['provider'] == 'M-PESA':
+                    invoice['mpesa_reference'] = f"QK{invoice_id}"
+                body = dict(invoice, challenge=self.challenge)
+            if not self.webhook_url:
+                continue
+            request = urllib.request.Request(self.webhook_url, data=json.dumps(body).encode(), method='POST',
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                outcome = 'callbacks.sent'
+            except Exception:
+                outcome = 'callbacks.failed'
+            self.count(outcome)
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = sum(1 for invoice, _ in self.invoices.values() if invoice['state'] == 'PENDING')
+        return stats
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40 ms to each call
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._reply(200, stub.snapshot())
+            else:
+                self._reply(404, _error('404', 'Not found.'))
+
+        def do_POST(self):
+            path = self.path.split('?', 1)[0]
+            if path not in (STK_PUSH, CHECKOUT, STATUS):
+                self._reply(404, _error('404', 'Not found.'))
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                data = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, _error('400', 'JSON parse error.'))
+                return
+            if stub.delay():
+                stub.count('errors.injected')
+                self._reply(500, _error('500', 'Injected failure.'))
+                return
+            if path == STK_PUSH:
+                # Only the STK push is authenticated; checkout and status go by the public key
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    self._reply(401, _error('401', 'Authentication credentials were not provided.'))
+                elif not data.get('phone_number') or not data.get('amount'):
+                    self._reply(400, _error('400', 'phone_number and amount are required.'))
+                else:
+                    self._reply(200, stub.stk_push(data))
+            elif path == CHECKOUT:
+                self._reply(200, stub.checkout(data))
+            else:
+                invoice = stub.status(data)
+                if invoice is None:
+                    self._reply(400, _error('400', 'Invoice not found.'))
+                else:
+                    self._reply(200, invoice)
+
+    return Handler
+
+
+def serve(stub, host='127.0.0.1', port=8900):
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=150, help='Base response time in ms')
+    parser.add_argument('--jitter', type=float, default=50, help='Extra random response time, up to this many ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with a 500')
+    parser.add_argument('--callback-delay', type=float, default=3.0, help='Seconds before a payment settles')
+    parser.add_argument('--fail-rate', type=float, default=0.05, help='Fraction of payments that settle as FAILED')
+    parser.add_argument('--webhook-url', help='Where to POST settled invoices (the dashboard webhook)')
+    parser.add_argument('--challenge', help='Challenge string sent with every webhook')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    stub = Stub(latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+                callback_delay=args.callback_delay, fail_rate=args.fail_rate, webhook_url=args.webhook_url,
+                challenge=args.challenge, seed=args.seed)
+    server = serve(stub, args.host, args.port)
+    print(f"IntaSend stub on http://{args.host}:{args.port} (latency {args.latency:g} ms, "
+          f"errors {args.error_rate:.0%}, settles after {args.callback_delay:g}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: simulated students against a gunicorn-served app.py.
+
+Generates a dataset with generate_dataset.py and starts
+benchmarks/intasend_stub.py. It then starts gunicorn with
+INTASEND_API_URL pointing at the stub, so payments go all the way
+through: STK push, delayed webhook, and the dashboard polling the status
+endpoint. --users virtual users ramp up linearly over --ramp seconds. Each
+one repeatedly takes a student from the --students pool, logs in, searches,
+opens and connects to a tutor and, at --pay-ratio, pays and polls
+/api/payments/status until the webhook has settled the payment.
+
+Every --interval seconds a line of the throughput/error curve is printed
+(active users, requests/s, errors/s, p95) and optionally written to --csv.
+At the end there is a per-endpoint summary, end-to-end payment latency
+(create to settled, as the student sees it) and the stub's webhook counters.
+
+Usage:
+  python benchmarks/load_test.py [--users 100] [--students 5000] [--duration 120] [--ramp 60]
+      [--workers 2] [--threads 4] [--stub-latency 150] [--stub-error-rate 0.01]
+  python benchmarks/load_test.py --url http://127.0.0.1:8000 --stats-url http://127.0.0.1:8900/stats
+"""
+
+import argparse
+import csv
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'password123'
+SUBJECTS = ('Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'Kiswahili', 'chemestry', 'maths')
+LOCATIONS = ('', '', 'Nairobi', 'Westlands', 'Kisumu', 'Mombasa', 'nakru')
+# Answers that are part of normal traffic rather than failures
+EXPECTED = {'connect': (400,), 'pay': (409,)}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"❌ {' '.join(process.args[:4])} exited with {process.returncode}")
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"❌ {url} did not come up within {timeout}s")
+
+
+class Recorder:
+    """Thread-safe log of (finished at, endpoint, seconds, ok) plus payment outcomes"""
+
+    def __init__(self):
+        self.samples = []
+        self.payments = []
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def record(self, kind, elapsed, ok):
+        with self._lock:
+            self.samples.append((time.perf_counter(), kind, elapsed, ok))
+
+    def payment(self, outcome, elapsed):
+        with self._lock:
+            self.payments.append((outcome, elapsed))
+
+    def since(self, start):
+        with self._lock:
+            return [sample for sample in self.samples if sample[0] >= start]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, recorder, args, stop, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.recorder = recorder
+        self.args = args
+        self.stop = stop
+        self.rng = random.Random(seed)
+
+    def call(self, kind, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=self.args.timeout, **kwargs)
+            ok = response.status_code < 400 or response.status_code in EXPECTED.get(kind, ())
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(kind, time.perf_counter() - started, ok)
+        return response
+
+    def run(self):
+        with self.recorder._lock:
+            self.recorder.active += 1
+        try:
+            while not self.stop.is_set():
+                self.visit()
+        finally:
+            with self.recorder._lock:
+                self.recorder.active -= 1
+
+    def visit(self):
+        self.http = requests.Session()
+        student = self.rng.randint(1, self.args.students)
+        response = self.call('login', 'POST', '/login', json={'email': f"student{student}@example.com", 'password': PASSWORD})
+        if response is None or not response.ok or not response.json().get('success'):
+            return
+        tutors = []
+        for _ in range(2):
+            params = {'subject': self.rng.choice(SUBJECTS), 'location': self.rng.choice(LOCATIONS)}
+            response = self.call('search', 'GET', '/api/tutors/search', params=params)
+            if response is not None and response.ok:
+                tutors = response.json() or tutors
+        if not tutors or self.stop.is_set():
+            return
+        tutor = self.rng.choice(tutors[:10])
+        self.call('tutor', 'GET', f"/api/tutors/{tutor['id']}")
+        self.call('connect', 'POST', '/api/connect', json={'tutor_id': tutor['id']})
+        if self.rng.random() < self.args.pay_ratio:
+            self.pay(tutor)
+        self.call('connections', 'GET', '/api/connections')
+
+    def pay(self, tutor):
+        # A random slot a year out, so concurrent students rarely collide
+        slot = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(
+            days=365 + self.rng.randrange(365), hours=self.rng.randrange(24))
+        started = time.perf_counter()
+        response = self.call('pay', 'POST', '/api/payments/create', json={
+            'tutor_id': tutor['id'], 'amount': tutor.get('price_per_hour') or 1000, 'duration_hours': 1,
+            'session_date': slot.isoformat(), 'payment_method': 'mpesa', 'phone_number': '0712345678'})
+        if response is None or response.status_code != 200:
+            self.recorder.payment('rejected', time.perf_counter() - started)
+            return
+        payment_id = response.json()['payment_id']
+        deadline = started + self.args.poll_timeout
+        while time.perf_counter() < deadline and not self.stop.is_set():
+            time.sleep(self.args.poll_interval)
+            response = self.call('status', 'GET', f"/api/payments/status/{payment_id}")
+            status = response.json().get('status') if response is not None and response.ok else None
+            if status in ('completed', 'failed'):
+                self.recorder.payment(status, time.perf_counter() - started)
+                return
+        self.recorder.payment('unsettled at stop' if self.stop.is_set() else 'timed out', time.perf_counter() - started)
+
+
+def report_interval(recorder, start, end, t, writer):
+    window = [sample for sample in recorder.since(start) if sample[0] < end]
+    span = end - start
+    errors = sum(1 for sample in window if not sample[3])
+    p95 = percentile([sample[2] for sample in window], 0.95) * 1000
+    row = [round(t), recorder.active, round(len(window) / span, 1), round(errors / span, 2),
+           round(100 * errors / len(window), 2) if window else 0.0, round(p95, 1)]
+    print(f"{row[0]:>6}s {row[1]:>6} {row[2]:>9.1f} {row[3]:>9.2f} {row[4]:>7.2f}% {row[5]:>9.1f}")
+    if writer:
+        writer.writerow(row)
+
+
+def summary(recorder, elapsed, stats_url):
+    kinds = defaultdict(list)
+    for _, kind, seconds, ok in recorder.samples:
+        kinds[kind].append((seconds, ok))
+    print(f"\n{'endpoint':<12} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind, samples in sorted(kinds.items()):
+        seconds = [sample[0] for sample in samples]
+        errors = sum(1 for sample in samples if not sample[1])
+        print(f"{kind:<12} {len(samples):>9} {len(samples) / elapsed:>8.1f} {100 * errors / len(samples):>7.2f}% "
+              f"{percentile(seconds, 0.5) * 1000:>8.1f} {percentile(seconds, 0.95) * 1000:>8.1f} "
+              f"{percentile(seconds, 0.99) * 1000:>8.1f}")
+
+    outcomes = defaultdict(list)
+    for outcome, seconds in recorder.payments:
+        outcomes[outcome].append(seconds)
+    if outcomes:
+        settled = outcomes['completed'] + outcomes['failed']
+        print(f"\nPayments: {', '.join(f'{len(v)} {k}' for k, v in sorted(outcomes.items()))}; "
+              f"create -> settled p50 {percentile(settled, 0.5):.1f}s, p95 {percentile(settled, 0.95):.1f}s")
+    if stats_url:
+        try:
+            stats = requests.get(stats_url, timeout=5).json()
+            print(f"Stub: {', '.join(f'{key} {value}' for key, value in sorted(stats.items()))}")
+        except requests.RequestException as e:
+            print(f"Stub stats unavailable: {e}")
+
+
+def start_services(args, workdir):
+    """Generate the dataset and start the stub and gunicorn; returns (app url, stats url, processes)"""
+    env = dict(os.environ, PYTHONPATH=ROOT, RATE_LIMIT_ENABLED='false')
+    if args.hash_method:
+        env['PASSWORD_HASH_METHOD'] = args.hash_method
+    subprocess.run([sys.executable, os.path.join(ROOT, 'generate_dataset.py'), '--db',
+                    os.path.join(workdir, 'edubridge.db'), '--scale', args.scale, '--students', str(args.students),
+                    '--anchor', datetime.now().strftime('%Y-%m-%d'), '--force'],
+                   cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    stub_port, app_port = free_port(), free_port()
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, 'benchmarks', 'intasend_stub.py'), '--port', str(stub_port),
+        '--latency', str(args.stub_latency), '--error-rate', str(args.stub_error_rate),
+        '--callback-delay', str(args.callback_delay), '--fail-rate', str(args.fail_rate),
+        '--webhook-url', f"http://127.0.0.1:{app_port}/api/payments/webhook"
+    ], cwd=workdir, env=env, stdout=subprocess.DEVNULL)
+    env['INTASEND_API_URL'] = f"http://127.0.0.1:{stub_port}"
+    env['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(workdir, 'metrics')
+    app = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', 'app:app', '--config', os.path.join(ROOT, 'gunicorn.conf.py'), '--bind', f"127.0.0.1:{app_port}",
+        '--workers', str(args.workers), '--threads', str(args.threads), '--timeout', '120',
+        '--log-level', 'warning'
+    ], cwd=workdir, env=env)
+    processes = [stub, app]
+    wait_for(f"http://127.0.0.1:{stub_port}/stats", stub)
+    wait_for(f"http://127.0.0.1:{app_port}/health", app)
+    return f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{stub_port}/stats", processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=100, help='Concurrent virtual users at full load')
+    parser.add_argument('--students', type=int, default=5000, help='Student accounts the users draw from')
+    parser.add_argument('--duration', type=float, default=120, help='Seconds of load, including the ramp')
+    parser.add_argument('--ramp', type=float, default=60, help='Seconds to grow from 1 to --users')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds per line of the curve')
+    parser.add_argument('--pay-ratio', type=float, default=0.3, help='Share of visits that end in a payment')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--poll-timeout', type=float, default=30.0)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request client timeout')
+    parser.add_argument('--csv', help='Write the throughput/error curve here')
+    parser.add_argument('--url', help='Load an already running app instead of starting one')
+    parser.add_argument('--stats-url', help="The stub's /stats when using --url")
+    parser.add_argument('--scale', default='small', help='generate_dataset.py preset for the tutors and payments')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--hash-method', help='PASSWORD_HASH_METHOD for the run, e.g. a cheap pbkdf2:sha256:1000')
+    parser.add_argument('--stub-latency', type=float, default=150, help='IntaSend stub response time (ms)')
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    parser.add_argument('--callback-delay', type=float, default=3.0)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        if args.url:
+            base_url, stats_url = args.url.rstrip('/'), args.stats_url
+        else:
+            workdir = tempfile.mkdtemp(prefix='edubridge-load-')
+            print(f"Preparing {args.scale} dataset, IntaSend stub and gunicorn "
+                  f"({args.workers} workers x {args.threads} threads) in {workdir}")
+            base_url, stats_url, processes = start_services(args, workdir)
+
+        recorder = Recorder()
+        stop = threading.Event()
+        users = []
+        csv_file = open(args.csv, 'w', newline='') if args.csv else None
+        writer = csv.writer(csv_file) if csv_file else None
+        if writer:
+            writer.writerow(['t', 'users', 'rps', 'errors_per_s', 'error_pct', 'p95_ms'])
+        print(f"{'t':>7} {'users':>6} {'req/s':>9} {'errors/s':>9} {'errors':>8} {'p95 ms':>9}")
+
+        started = time.perf_counter()
+        next_report = started + args.interval
+        try:
+            while time.perf_counter() - started < args.duration:
+                elapsed = time.perf_counter() - started
+                wanted = args.users if args.ramp <= 0 else max(1, min(args.users, int(args.users * elapsed / args.ramp) + 1))
+                while len(users) < wanted:
+                    user = VirtualUser(base_url, recorder, args, stop, seed=len(users))
+                    user.start()
+                    users.append(user)
+                if time.perf_counter() >= next_report:
+                    report_interval(recorder, next_report - args.interval, next_report, next_report - started, writer)
+                    next_report += args.interval
+                time.sleep(0.05)
+        except KeyboardInterrupt:
+            print('Interrupted, stopping users...')
+        stop.set()
+        for user in users:
+            user.join(timeout=args.timeout + args.poll_interval)
+        elapsed = time.perf_counter() - started
+        if csv_file:
+            csv_file.close()
+        summary(recorder, elapsed, stats_url)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == '__main__':
+    main()
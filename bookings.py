@@ -0,0 +1,101 @@
+"""
+Atomic session booking with overlap detection.
+
+A booking is a ``Session`` row in the ``held`` state until its payment
+completes. The overlap check and the insert are a single
+``INSERT ... SELECT ... WHERE NOT EXISTS`` statement; SQLite takes the write
+lock before evaluating it, so concurrent bookings for one tutor (from any
+worker) are serialized and at most one of two overlapping requests wins.
+The existence probe is a bounded range scan on ``(tutor_id, session_date)``.
+
+``confirm_slot`` repeats the same probe when the payment webhook arrives:
+by then the hold may have expired and the slot been taken by someone else,
+and a late payment must not schedule a second session on top of it.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, insert, literal, or_, select, update
+from sqlalchemy.orm import aliased
+
+# Longest bookable session; bounds how far back the overlap probe has to look
+MAX_SESSION_HOURS = 8
+
+HELD = 'held'
+SCHEDULED = 'scheduled'
+CANCELLED = 'cancelled'
+
+# Payment status for money collected on a slot that could no longer be confirmed
+REFUND_PENDING = 'refund_pending'
+
+
+class BookingError(ValueError):
+    pass
+
+
+def parse_slot(session_date, duration_hours):
+    """Validated (start, end) for a requested slot; raises BookingError"""
+    try:
+        start = datetime.fromisoformat(str(session_date))
+    except ValueError:
+        raise BookingError('session_date must be an ISO date and time, e.g. 2026-10-20T16:00')
+    try:
+        duration = float(duration_hours)
+    except (TypeError, ValueError):
+        raise BookingError('duration_hours must be a number')
+    if not 0 < duration <= MAX_SESSION_HOURS:
+        raise BookingError(f'duration_hours must be between 0 and {MAX_SESSION_HOURS}')
+    if start.tzinfo is not None:
+        start = start.replace(tzinfo=None)
+    return start, start + timedelta(hours=duration)
+
+
+def conflict_clause(Session, tutor_id, start, end, now):
+    """Sessions of ``tutor_id`` that overlap [start, end) and still block the slot"""
+    return and_(
+        Session.tutor_id == tutor_id,
+        Session.session_date < end,
+        Session.session_date > start - timedelta(hours=MAX_SESSION_HOURS),
+        Session.end_date > start,
+        or_(
+            Session.status == SCHEDULED,
+            and_(Session.status == HELD, Session.hold_expires_at > now),
+        ),
+    )
+
+
+def reserve_slot(db_session, Session, tutor_id, student_id, start, end, hold_minutes, payment_id=None, now=None):
+    """Insert a held session unless it overlaps; returns the new session id or None"""
+    now = now or datetime.utcnow()
+    duration_hours = (end - start).total_seconds() / 3600
+    values = select(
+        literal(student_id), literal(tutor_id), literal(payment_id), literal(start), literal(end),
+        literal(duration_hours), literal(HELD), literal(now + timedelta(minutes=hold_minutes)), literal(now)
+    ).where(~exists().where(conflict_clause(Session, tutor_id, start, end, now)))
+    stmt = insert(Session).from_select(
+        ['student_id', 'tutor_id', 'payment_id', 'session_date', 'end_date', 'duration_hours',
+         'status', 'hold_expires_at', 'created_at'],
+        values
+    )
+    result = db_session.execute(stmt)
+    if result.rowcount != 1:
+        return None
+    return result.lastrowid
+
+
+def confirm_slot(db_session, Session, booking, now=None):
+    """Schedule ``booking`` unless another live booking overlaps it; returns True if scheduled"""
+    now = now or datetime.utcnow()
+    Other = aliased(Session)
+    stmt = update(Session).where(
+        Session.id == booking.id,
+        ~exists().where(
+            conflict_clause(Other, booking.tutor_id, booking.session_date, booking.end_date, now),
+            Other.id != booking.id,
+        ),
+    ).values(status=SCHEDULED, hold_expires_at=None).execution_options(synchronize_session=False)
+    if db_session.execute(stmt).rowcount != 1:
+        return False
+    booking.status = SCHEDULED
+    booking.hold_expires_at = None
+    return True
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Rebuild the tutor co-occurrence matrix behind /api/tutors/<id>/similar.
+
+Reads every connection and completed payment, counts the students each pair
+of tutors shares and replaces the tutor_cooccurrence table in one
+transaction. The app keeps the matrix current incrementally as students
+connect and pay, so this only needs to run after bulk imports or deletions,
+or nightly to correct drift.
+
+Usage: python build_recommendations.py
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    import app as app_module
+    from recommendations import rebuild
+
+    with app_module.app.app_context():
+        started = time.perf_counter()
+        try:
+            pairs = rebuild(app_module.db.session, app_module.Connection, app_module.Payment,
+                            app_module.TutorCooccurrence)
+            app_module.db.session.commit()
+        except Exception as e:
+            app_module.db.session.rollback()
+            print(f"❌ Rebuild failed: {e}")
+            sys.exit(1)
+        print(f"✓ Rebuilt tutor co-occurrence matrix: {pairs} pairs in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+iCalendar (RFC 5545) rendering for session feeds.
+
+Events are rendered one at a time so the feed can be streamed straight from a
+cursor; nothing holds the whole calendar in memory.
+"""
+
+from datetime import timedelta
+
+PRODID = '-//EduBridge//Tutoring Sessions//EN'
+
+# Session times are stored as the wall-clock time the student picked in Kenya
+TZID = 'Africa/Nairobi'
+VTIMEZONE = (
+    'BEGIN:VTIMEZONE',
+    f'TZID:{TZID}',
+    'BEGIN:STANDARD',
+    'DTSTART:19700101T000000',
+    'TZOFFSETFROM:+0300',
+    'TZOFFSETTO:+0300',
+    'TZNAME:EAT',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+)
+
+
+def escape_text(value):
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Fold a content line to 75 octets as required by RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte UTF-8 sequence
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_utc(moment):
+    return moment.strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_local(moment):
+    return moment.strftime('%Y%m%dT%H%M%S')
+
+
+def render_event(uid, start, end, summary, stamp, description=None, status='CONFIRMED'):
+    """One VEVENT; start/end are Nairobi wall-clock times, stamp is UTC"""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_utc(stamp)}',
+        f'DTSTART;TZID={TZID}:{format_local(start)}',
+        f'DTEND;TZID={TZID}:{format_local(end)}',
+        f'SUMMARY:{escape_text(summary)}',
+        f'STATUS:{status}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape_text(description)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def stream_calendar(name, events):
+    """Yield the calendar in chunks; ``events`` yields render_event() keyword dicts"""
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        *VTIMEZONE,
+    ))
+    for event in events:
+        yield render_event(**event)
+    yield fold('END:VCALENDAR')
+
+
+def session_end(session_date, end_date, duration_hours):
+    return end_date or session_date + timedelta(hours=duration_hours or 1)
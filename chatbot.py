@@ -0,0 +1,199 @@
+"""
+Intent engine for /api/chatbot.
+
+Intents, subject synonyms and county names live in plain tables below. They
+are compiled, together with the subjects tutors actually list, into one trie
+keyed by words. A message is tokenized once and walked left to right, taking
+the longest keyword at each word, so the cost depends on the message length
+and the longest keyword, not on how many keywords there are. Adding an intent
+or synonym adds a table row, not another scan.
+
+``ChatIndex`` is rebuilt per directory generation and holds that pattern
+plus the top tutors per subject (and per subject and county), so answers can
+name real tutors without querying the database.
+"""
+
+import re
+from collections import namedtuple
+
+from locations import KENYAN_COUNTIES, place_key
+
+TOP_TUTORS = 3
+# Tutors kept per subject; enough to still find TOP_TUTORS for most counties
+SUBJECT_DEPTH = 50
+
+Intent = namedtuple('Intent', 'name keywords response')
+
+INTENTS = (
+    Intent('greeting', ('hi', 'hello', 'hey', 'habari', 'jambo', 'good morning', 'good evening'),
+           "Hello! Tell me a subject (and your county if you like) and I'll find tutors for you."),
+    Intent('price', ('price', 'prices', 'cost', 'costs', 'fee', 'fees', 'rate', 'rates', 'charge',
+                     'how much', 'cheap', 'affordable', 'expensive'),
+           "Tutors set their own hourly rates, shown on each profile in KES."),
+    Intent('location', ('location', 'where', 'near me', 'nearby', 'county', 'area', 'in person', 'online'),
+           "You can filter tutors by county, constituency or area to find someone near you."),
+    Intent('booking', ('book', 'booking', 'schedule', 'session', 'lesson', 'appointment'),
+           "Open a tutor's profile and choose Book Session to reserve a session time."),
+    Intent('payment', ('pay', 'payment', 'mpesa', 'm-pesa', 'card', 'refund'),
+           "You can pay with M-Pesa or card. Your session is confirmed once the payment completes."),
+    Intent('help', ('help', 'how does', 'how do', 'what can you do'),
+           "I can find tutors by subject and county, tell you about prices, and explain booking and payment."),
+)
+
+FALLBACK = ("I'm here to help you find the perfect tutor! You can search by subject, location, "
+            "or ask me about specific topics like math, science, or English.")
+
+# Canonical subject -> words students use for it
+SUBJECT_SYNONYMS = {
+    'Mathematics': ('math', 'maths', 'mathematics', 'algebra', 'calculus', 'geometry', 'trigonometry', 'statistics',
+                    'hisabati'),
+    'Physics': ('physics', 'mechanics'),
+    'Chemistry': ('chemistry', 'chem'),
+    'Biology': ('biology', 'bio'),
+    'English': ('english', 'grammar', 'literature', 'essay', 'writing', 'composition'),
+    'Kiswahili': ('kiswahili', 'swahili', 'fasihi', 'insha'),
+    'Computer Science': ('computer', 'computer science', 'computing', 'programming', 'coding', 'python', 'ict'),
+    'History': ('history', 'history and government'),
+    'Geography': ('geography',),
+    'Business Studies': ('business', 'business studies', 'accounting', 'commerce', 'economics'),
+    'Agriculture': ('agriculture', 'farming'),
+    'French': ('french',),
+}
+
+# Broad words that stand for several subjects
+SUBJECT_GROUPS = {
+    'science': ('Physics', 'Chemistry', 'Biology'),
+    'sciences': ('Physics', 'Chemistry', 'Biology'),
+    'languages': ('English', 'Kiswahili', 'French'),
+    'language': ('English', 'Kiswahili', 'French'),
+}
+
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def compile_trie(keywords):
+    """Nested word dicts; the None key of a node holds the entry of the keyword ending there"""
+    trie = {}
+    for keyword, entry in keywords.items():
+        node = trie
+        for word in tokenize(keyword):
+            node = node.setdefault(word, {})
+        node[None] = entry
+    return trie
+
+
+class ChatIndex:
+    """Keyword trie plus cached top tutors, built once per directory generation"""
+
+    def __init__(self, rows):
+        # rows: tutor listing tuples with the tutor's county appended, best tutors first
+        keywords = {}
+        for intent in INTENTS:
+            for keyword in intent.keywords:
+                keywords.setdefault(keyword, ('intent', intent))
+        for subject, synonyms in SUBJECT_SYNONYMS.items():
+            for keyword in synonyms + (subject,):
+                keywords[keyword.lower()] = ('subject', (subject,))
+        for keyword, subjects in SUBJECT_GROUPS.items():
+            keywords[keyword] = ('group', subjects)
+        for county in KENYAN_COUNTIES:
+            keywords[county.lower()] = ('county', county)
+
+        self.keywords = keywords
+        self.trie = compile_trie(keywords)
+
+        by_subject = {}
+        by_subject_county = {}
+        live = {}
+        for row in rows:
+            subjects = self.classify(row[2], groups=False)[1]
+            if not subjects:
+                # A subject the tables don't know yet still becomes a keyword
+                subjects = [row[2]]
+                keyword = ' '.join(tokenize(row[2]))
+                if keyword:
+                    live.setdefault(keyword, ('subject', (row[2],)))
+            for subject in subjects:
+                tutors = by_subject.setdefault(subject, [])
+                if len(tutors) < SUBJECT_DEPTH:
+                    tutors.append(row[:-1])
+                local = by_subject_county.setdefault((subject, place_key(row[-1])), [])
+                if len(local) < TOP_TUTORS:
+                    local.append(row[:-1])
+        if live:
+            for keyword, entry in live.items():
+                keywords.setdefault(keyword, entry)
+            self.trie = compile_trie(keywords)
+        self.by_subject = by_subject
+        self.by_subject_county = by_subject_county
+
+    def classify(self, message, groups=True):
+        """(intents, subjects, county) found in a single pass over the message"""
+        intents, subjects, county = [], [], None
+        tokens = tokenize(message)
+        i = 0
+        while i < len(tokens):
+            # Longest keyword starting at this word
+            node, end, entry = self.trie, i, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    end, entry = j + 1, node[None]
+            if entry is None:
+                i += 1
+                continue
+            i = end
+            kind, value = entry
+            if kind == 'intent':
+                if value not in intents:
+                    intents.append(value)
+            elif kind == 'subject' or (kind == 'group' and groups):
+                subjects.extend(s for s in value if s not in subjects)
+            elif kind == 'county' and county is None:
+                county = value
+        return intents, subjects, county
+
+    def top_tutors(self, subject, county=None, limit=TOP_TUTORS):
+        if county:
+            return self.by_subject_county.get((subject, place_key(county)), [])[:limit]
+        return self.by_subject.get(subject, [])[:limit]
+
+    def reply(self, message):
+        """(response text, intent name, tutor rows) for a chat message"""
+        intents, subjects, county = self.classify(message)
+        if subjects:
+            tutors, seen, found = [], set(), []
+            for subject in subjects:
+                for row in self.top_tutors(subject, county):
+                    if row[0] not in seen:
+                        seen.add(row[0])
+                        tutors.append(row)
+                        if subject not in found:
+                            found.append(subject)
+            tutors = tutors[:TOP_TUTORS * 2]
+            where = f" in {county}" if county else ''
+            if tutors:
+                text = f"Here are top-rated {', '.join(found)} tutors{where}."
+                prices = [row[3] for row in tutors if row[3] is not None]
+                if any(intent.name == 'price' for intent in intents) and prices:
+                    low, high = min(prices), max(prices)
+                    rate = f"KES {low:,.0f}" if low == high else f"KES {low:,.0f} to KES {high:,.0f}"
+                    text += f" Their rates are {rate} per hour."
+            else:
+                text = f"We don't have {', '.join(subjects)} tutors{where} yet. Try a nearby county or search all tutors."
+            return text, 'subject', tutors
+        if county:
+            return f"Which subject do you need help with in {county}?", 'location', []
+        if len(intents) > 1:
+            # "How do I pay?" is about paying, not a request for general help
+            intents = [intent for intent in intents if intent.name not in ('greeting', 'help')] or intents
+        if intents:
+            return ' '.join(intent.response for intent in intents[:2]), intents[0].name, []
+        return FALLBACK, 'fallback', []
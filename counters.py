@@ -0,0 +1,131 @@
+"""
+Write-behind counter buffer.
+
+Increments are coalesced per key in memory and written with one
+``executemany`` upsert by a background thread, every ``flush_interval``
+seconds or as soon as the number of unflushed increments reaches
+``max_pending``. Request threads never write. If a write fails, its
+increments are kept for the next attempt only while they fit under
+``max_pending``; past that they are dropped and counted, so a database
+outage can't make the buffer grow or retry without bound.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+
+class CounterBuffer:
+    """Per-worker buffer of ``{key: {field: delta}}`` increments"""
+
+    def __init__(self, write_batch, fields, flush_interval=10.0, max_pending=5000, logger=None):
+        # write_batch(rows) receives a list of dicts: {'key': ..., field: delta, ...}
+        self.write_batch = write_batch
+        self.fields = tuple(fields)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.logger = logger
+        self._counts = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stats = {
+            'flushes': 0,
+            'failed_flushes': 0,
+            'dropped_increments': 0,
+            'flushed_increments': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+        }
+
+    def increment(self, key, field, amount=1):
+        self.increment_many((key,), field, amount)
+
+    def increment_many(self, keys, field, amount=1):
+        """Add ``amount`` to ``field`` for every key, e.g. all tutors in a listing"""
+        if field not in self.fields:
+            raise ValueError(f"Unknown counter field: {field}")
+        with self._lock:
+            for key in keys:
+                counts = self._counts.get(key)
+                if counts is None:
+                    counts = self._counts[key] = dict.fromkeys(self.fields, 0)
+                counts[field] += amount
+                self._pending += 1
+            over_limit = self._pending >= self.max_pending
+        self._ensure_thread()
+        if over_limit:
+            # Hand the early flush to the background thread; the request never waits on the write
+            self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, {}
+                pending, self._pending = self._pending, 0
+            if not counts:
+                return 0
+            rows = [dict(values, key=key) for key, values in counts.items()]
+            started = time.perf_counter()
+            try:
+                self.write_batch(rows)
+            except Exception as e:
+                self._stats['failed_flushes'] += 1
+                self._restore(counts, pending, e)
+                return 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stats['flushes'] += 1
+            self._stats['flushed_increments'] += pending
+            self._stats['last_flush_ms'] = elapsed_ms
+            self._stats['total_flush_ms'] += elapsed_ms
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+            return pending
+
+    def stats(self):
+        with self._lock:
+            buffered_keys = len(self._counts)
+            pending = self._pending
+        return dict(
+            self._stats,
+            buffered_keys=buffered_keys,
+            pending_increments=pending,
+            max_pending=self.max_pending
+        )
+
+    def _restore(self, counts, pending, error):
+        with self._lock:
+            if self._pending + pending > self.max_pending:
+                self._stats['dropped_increments'] += pending
+                if self.logger:
+                    self.logger.error(f"Counter flush failed, dropped {pending} increments: {error}")
+                return
+            if self.logger:
+                self.logger.error(f"Counter flush failed, retrying {pending} increments later: {error}")
+            for key, values in counts.items():
+                current = self._counts.setdefault(key, dict.fromkeys(self.fields, 0))
+                for field, delta in values.items():
+                    current[field] += delta
+            self._pending += pending
+
+    def _ensure_thread(self):
+        # Started lazily so each gunicorn worker gets its own flusher after fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
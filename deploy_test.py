@@ -13,7 +13,7 @@ def check_dependencies():
     
     try:
         import flask
-        import intasend
+        import requests
         print("✅ All dependencies are installed")
         return True
     except ImportError as e:
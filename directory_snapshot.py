@@ -0,0 +1,106 @@
+"""
+Versioned, pre-serialized snapshot of the tutor directory.
+
+Writers call ``DirectoryGeneration.bump()`` after committing tutor changes.
+The generation lives in a small file next to the database so every gunicorn
+worker sees the bump; each worker rebuilds its snapshot (JSON, gzip and a
+strong ETag) at most once per generation and serves everything else from
+memory, answering ``If-None-Match`` revalidations with ``304``.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from flask import current_app
+
+from tutor_serializer import dumps
+
+
+class DirectoryGeneration:
+    """Cross-worker change marker for tutor data"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def current(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or '0'
+        except FileNotFoundError:
+            return '0'
+
+    def bump(self):
+        # Write-then-rename so readers never see a partial value
+        value = str(time.time_ns())
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.directory-version-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(value)
+        os.replace(tmp_path, self.path)
+        return value
+
+
+class Snapshot:
+    __slots__ = ('generation', 'body', 'gzip_body', 'etag', 'tutor_ids', 'built_at')
+
+    def __init__(self, generation, tutors):
+        self.generation = generation
+        self.body = dumps(tutors)
+        self.gzip_body = gzip.compress(self.body, compresslevel=6)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.tutor_ids = [tutor['id'] for tutor in tutors]
+        self.built_at = time.time()
+
+
+class GenerationCache:
+    """Per-worker value derived from tutor data, rebuilt only when the generation moves"""
+
+    def __init__(self, build, generation):
+        self.build = build
+        self.generation = generation
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        generation = self.generation.current()
+        entry = self._entry
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] != generation:
+                entry = self._entry = (generation, self._make(generation))
+        return entry[1]
+
+    def _make(self, generation):
+        return self.build()
+
+
+class DirectorySnapshot(GenerationCache):
+    """Cache of the /api/tutors payload; build() returns the list of tutor dicts"""
+
+    def _make(self, generation):
+        return Snapshot(generation, self.build())
+
+
+def snapshot_response(snapshot, request, max_age=0):
+    """Serve a snapshot with a strong ETag, gzip negotiation and 304 revalidation"""
+    use_gzip = 'gzip' in request.accept_encodings
+    # The gzip variant is a different byte sequence, so it gets its own strong validator
+    etag = f"{snapshot.etag}-gz" if use_gzip else snapshot.etag
+
+    if request.if_none_match.contains(snapshot.etag) or request.if_none_match.contains(f"{snapshot.etag}-gz"):
+        response = current_app.response_class(status=304)
+    else:
+        body = snapshot.gzip_body if use_gzip else snapshot.body
+        response = current_app.response_class(body, mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={max_age}, must-revalidate"
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Export the tutor directory as static JSON for CDN delivery.
+
+Writes, under the output directory (public/directory by default):
+  all.json                 every tutor, same shape as /api/tutors
+  subject/<slug>.json      tutors per subject
+  county/<slug>.json       tutors per county
+  manifest.json            shard index with counts and content hashes
+
+Only shards whose content changed are rewritten and shards that no longer
+exist are removed, so re-running after a tutor edit touches a handful of
+files. The student dashboard loads all.json from DIRECTORY_URL when that is
+set, and falls back to /api/tutors otherwise. With --watch the exporter follows the same generation marker the app
+bumps on tutor writes and re-exports whenever it moves.
+
+Usage:
+  python export_directory.py [--out public/directory]
+  python export_directory.py --watch [--interval 30]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OUT = os.path.join('public', 'directory')
+
+
+def slugify(value):
+    slug = re.sub(r'[^a-z0-9]+', '-', (value or '').lower()).strip('-')
+    return slug or 'unknown'
+
+
+def load_directory(app_module):
+    """Return (tutor dicts, county per tutor id) using the shared listing query
+
+    Counties come from the normalized ``Tutor.county`` column, so "nairobi" and
+    "Nairobi City" land in the same shard as "Nairobi".
+    """
+    from tutor_serializer import tutor_select, fetch_rows, rows_to_dicts
+
+    Tutor, User = app_module.Tutor, app_module.User
+    stmt = tutor_select(Tutor, User).add_columns(Tutor.county).order_by(Tutor.id)
+    rows = fetch_rows(app_module.db.session, stmt)
+    counties = {row[0]: row[-1] for row in rows}
+    return rows_to_dicts([row[:-1] for row in rows]), counties
+
+
+def build_shards(tutors, counties):
+    """Map relative shard path -> (label, list of tutors)"""
+    shards = {'all.json': ('All tutors', tutors)}
+    for tutor in tutors:
+        subject = (tutor['subject'] or '').strip()
+        county = (counties.get(tutor['id']) or '').strip()
+        shards.setdefault(f"subject/{slugify(subject)}.json", (subject or 'Unknown', []))[1].append(tutor)
+        shards.setdefault(f"county/{slugify(county)}.json", (county or 'Unknown', []))[1].append(tutor)
+    return shards
+
+
+def encode(data):
+    return json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def write_if_changed(path, body):
+    """Atomically write body unless the file already holds exactly these bytes"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == body:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return True
+
+
+def export(out_dir, app_module):
+    """Export every shard and the manifest; returns (written, unchanged, removed) counts"""
+    with app_module.app.app_context():
+        tutors, counties = load_directory(app_module)
+
+    shards = build_shards(tutors, counties)
+    manifest = {'subjects': {}, 'counties': {}}
+    written = unchanged = 0
+    for rel_path, (label, shard_tutors) in sorted(shards.items()):
+        body = encode(shard_tutors)
+        if write_if_changed(os.path.join(out_dir, rel_path), body):
+            written += 1
+        else:
+            unchanged += 1
+        entry = {
+            'name': label,
+            'path': rel_path,
+            'count': len(shard_tutors),
+            'sha256': hashlib.sha256(body).hexdigest()
+        }
+        if rel_path == 'all.json':
+            manifest['all'] = entry
+        else:
+            group = 'subjects' if rel_path.startswith('subject/') else 'counties'
+            manifest[group][rel_path.split('/', 1)[1][:-len('.json')]] = entry
+
+    # Drop shards for subjects or counties that no longer have tutors
+    removed = 0
+    for group in ('subject', 'county'):
+        group_dir = os.path.join(out_dir, group)
+        if not os.path.isdir(group_dir):
+            continue
+        for name in os.listdir(group_dir):
+            if f"{group}/{name}" not in shards:
+                os.remove(os.path.join(group_dir, name))
+                removed += 1
+
+    # The manifest only changes when some shard did, keeping its CDN cache warm otherwise
+    manifest['version'] = hashlib.sha256(encode(manifest)).hexdigest()[:16]
+    manifest['total'] = len(tutors)
+    previous = None
+    try:
+        with open(os.path.join(out_dir, 'manifest.json')) as f:
+            previous = json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+    if previous is None or previous.get('version') != manifest['version']:
+        manifest['generated_at'] = datetime.utcnow().isoformat()
+        write_if_changed(os.path.join(out_dir, 'manifest.json'), encode(manifest))
+    return written, unchanged, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the tutor directory as static JSON')
+    parser.add_argument('--out', default=DEFAULT_OUT, help=f'Output directory (default: {DEFAULT_OUT})')
+    parser.add_argument('--watch', action='store_true', help='Re-export whenever tutor data changes')
+    parser.add_argument('--interval', type=float, default=30.0, help='Seconds between change checks in --watch mode')
+    args = parser.parse_args()
+
+    import app as app_module
+
+    last_generation = None
+    while True:
+        generation = app_module.directory_generation.current()
+        if generation != last_generation:
+            written, unchanged, removed = export(args.out, app_module)
+            print(f"✓ Exported directory to {args.out}: {written} written, {unchanged} unchanged, {removed} removed")
+            last_generation = generation
+        if not args.watch:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Typo-tolerant matching with an in-memory trigram index.
+
+Values of a field (subject, tutor name, location) are broken into words and
+each distinct word into pg_trgm-style trigrams: the word is padded with two
+leading spaces and one trailing space, so "chemistry" yields "  c", " ch",
+"che", ... "ry ". An inverted index maps each trigram to the words containing
+it, and each word to the values using it.
+
+A lookup scores every query word against the vocabulary through the posting
+lists of its own trigrams only (Jaccard similarity of the trigram sets), then
+scores a value by the mean of its best word match per query word, like
+pg_trgm's word_similarity. "mathematcs" finds "Mathematics" and "kamua" finds
+"John Kamau" without scanning the directory; the vocabulary is far smaller
+than the number of tutors, so the index stays small.
+"""
+
+import re
+from collections import Counter
+
+# pg_trgm's default similarity threshold
+DEFAULT_THRESHOLD = 0.3
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def words(value):
+    return _WORD.findall((value or '').lower())
+
+
+def trigrams(word):
+    """Set of padded trigrams of a single word"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Inverted trigram index over the words of one field's distinct values"""
+
+    def __init__(self, items):
+        # items: iterable of (value, tutor_id)
+        positions = {}
+        tutors = []
+        for value, tutor_id in items:
+            value = (value or '').strip()
+            if not value:
+                continue
+            index = positions.get(value)
+            if index is None:
+                index = positions[value] = len(tutors)
+                tutors.append([])
+            tutors[index].append(tutor_id)
+        self.positions = positions
+        self.values = list(positions)
+        self.keys = [' '.join(words(value)) for value in self.values]
+        self.tutors = tutors
+
+        vocabulary = {}
+        self.word_values = []
+        for index, key in enumerate(self.keys):
+            for word in set(key.split(' ')) if key else ():
+                word_id = vocabulary.get(word)
+                if word_id is None:
+                    word_id = vocabulary[word] = len(self.word_values)
+                    self.word_values.append([])
+                self.word_values[word_id].append(index)
+        self.words = list(vocabulary)
+        self.word_sizes = []
+        postings = {}
+        for word_id, word in enumerate(self.words):
+            grams = trigrams(word)
+            self.word_sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(word_id)
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.values)
+
+    def similar_words(self, word, threshold=DEFAULT_THRESHOLD):
+        """{word_id: similarity} of vocabulary words close to ``word``"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting:
+                shared.update(posting)
+        size, sizes = len(grams), self.word_sizes
+        found = {}
+        for word_id, count in shared.items():
+            # Jaccard: shared / (|query| + |word| - shared)
+            score = count / (size + sizes[word_id] - count)
+            if score >= threshold:
+                found[word_id] = score
+        return found
+
+    def scored(self, text, threshold=DEFAULT_THRESHOLD):
+        """{value position: similarity} of values at or above ``threshold``"""
+        query = list(dict.fromkeys(words(text)))
+        if not query:
+            return {}
+        totals = {}
+        for word in query:
+            best = {}
+            for word_id, score in self.similar_words(word, threshold).items():
+                for index in self.word_values[word_id]:
+                    if score > best.get(index, 0):
+                        best[index] = score
+            for index, score in best.items():
+                totals[index] = totals.get(index, 0) + score
+        # A value must match the query words well on average, not just one of them
+        return {index: total / len(query) for index, total in totals.items() if total / len(query) >= threshold}
+
+    def similar(self, text, threshold=DEFAULT_THRESHOLD, limit=None):
+        """(value, similarity) pairs at or above ``threshold``, most similar first"""
+        matches = sorted(self.scored(text, threshold).items(), key=lambda match: (-match[1], self.values[match[0]]))
+        if limit is not None:
+            matches = matches[:limit]
+        return [(self.values[index], score) for index, score in matches]
+
+    def contains(self, text):
+        """Values containing ``text`` as a substring, ignoring case and punctuation"""
+        needle = ' '.join(words(text))
+        if not needle:
+            return []
+        longest = max(needle.split(' '), key=len)
+        if len(longest) < 3:
+            candidates = range(len(self.values))
+        else:
+            # Words containing the longest needle word share all of its inner trigrams
+            inner = {longest[i:i + 3] for i in range(len(longest) - 2)}
+            word_ids = None
+            for gram in inner:
+                posting = self.postings.get(gram)
+                if not posting:
+                    return []
+                word_ids = set(posting) if word_ids is None else word_ids.intersection(posting)
+            candidates = set()
+            for word_id in word_ids:
+                if longest in self.words[word_id]:
+                    candidates.update(self.word_values[word_id])
+        return [self.values[i] for i in sorted(candidates) if needle in self.keys[i]]
+
+    def tutor_ids(self, values):
+        """Tutor ids carrying any of ``values``"""
+        found = set()
+        for value in values:
+            index = self.positions.get(value)
+            if index is not None:
+                found.update(self.tutors[index])
+        return found
+
+
+class FuzzyIndex:
+    """Trigram indexes for the searchable tutor fields, built once per directory generation"""
+
+    def __init__(self, subjects, names, locations):
+        self.fields = {
+            'subject': TrigramIndex(subjects),
+            'name': TrigramIndex(names),
+            'location': TrigramIndex(locations),
+        }
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def best_scores(self, text, threshold=DEFAULT_THRESHOLD):
+        """{tutor_id: best similarity} of ``text`` against any field"""
+        scores = {}
+        for index in self.fields.values():
+            for position, score in index.scored(text, threshold).items():
+                for tutor_id in index.tutors[position]:
+                    if score > scores.get(tutor_id, 0):
+                        scores[tutor_id] = score
+        return scores
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Generate a large synthetic EduBridge database for load and scale testing.
+
+Fills the current schema (users, tutors, tutor availability, connections,
+payments and sessions) with seeded random data, so the same seed and
+anchor date always produce the same rows (password salts aside). Tables are created from the app's
+models, secondary indexes are dropped while rows stream in through
+executemany with journaling and fsync turned off, and the indexes are
+rebuilt and ANALYZEd at the end.
+
+Every generated account uses the same password (--password) so load tests
+can log in as tutor<N>@example.com or student<N>@example.com.
+
+Presets (explicit counts override them):
+  small    1,000 tutors    10,000 students     20,000 payments
+  medium  10,000 tutors   100,000 students    500,000 payments
+  large  100,000 tutors   500,000 students  5,000,000 payments
+
+Usage:
+  python generate_dataset.py --scale medium --db /tmp/edubridge-medium.db
+  python generate_dataset.py --tutors 5000 --payments 100000 --seed 7 --force
+"""
+
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCALES = {
+    'small': {'tutors': 1000, 'students': 10000, 'payments': 20000},
+    'medium': {'tutors': 10000, 'students': 100000, 'payments': 500000},
+    'large': {'tutors': 100000, 'students': 500000, 'payments': 5000000},
+}
+
+FIRST_NAMES = ('John', 'Jane', 'Mary', 'Peter', 'Grace', 'James', 'Faith', 'David', 'Mercy', 'Brian',
+               'Esther', 'Kevin', 'Ann', 'Joseph', 'Wanjiru', 'Achieng', 'Otieno', 'Kiprop', 'Njeri', 'Mwangi')
+LAST_NAMES = ('Kamau', 'Otieno', 'Mwangi', 'Wanjiku', 'Ochieng', 'Kiprotich', 'Njoroge', 'Mutua', 'Wambui',
+              'Omondi', 'Chebet', 'Kariuki', 'Akinyi', 'Njeri', 'Odhiambo', 'Kimani', 'Cheruiyot', 'Maina')
+SUBJECTS = ('Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'Kiswahili', 'History',
+            'Geography', 'Computer Science', 'Business Studies', 'Agriculture', 'French', 'Music',
+            'CRE', 'Home Science', 'German', 'Art and Design', 'Python Programming')
+AVAILABILITY = ('Weekdays 6-9 PM', 'Weekends 9 AM-5 PM', 'Mon-Fri 4-8 PM, Saturday 9 AM-1 PM',
+                'Daily 8 AM-8 PM', 'Tuesdays and Thursdays 5-8 PM', 'Saturdays', 'Weekdays 2-6 PM, Sundays')
+ESTATES = ('Estate', 'Gardens', 'Village', 'Heights', 'Park', 'Court')
+
+# (status, weight) for payments; completed payments may have a session
+PAYMENT_STATUSES = (('completed', 80), ('pending', 8), ('failed', 12))
+LOAD_PRAGMAS = (
+    'PRAGMA journal_mode=OFF',
+    'PRAGMA synchronous=OFF',
+    'PRAGMA locking_mode=EXCLUSIVE',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-262144',
+    'PRAGMA foreign_keys=OFF',
+)
+
+
+def load_places():
+    """(county, constituency) pairs from the bundled place list; counties without constituencies stand alone"""
+    from geo import PLACES_PATH
+
+    with open(PLACES_PATH, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    places = [(row['county'], row['name']) for row in rows if row['level'] == 'constituency']
+    covered = {county for county, _ in places}
+    places += [(row['name'], row['name']) for row in rows if row['level'] == 'county' and row['name'] not in covered]
+    return places
+
+
+def _stamp(value):
+    return value.isoformat(' ')
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_schema(path):
+    """Create the app's tables in ``path`` and return the CREATE INDEX statements to run after loading"""
+    from sqlalchemy import create_engine
+    import app as app_module
+
+    engine = create_engine(f"sqlite:///{path}")
+    app_module.db.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    try:
+        indexes = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchall()
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX "{name}"')
+        conn.commit()
+    finally:
+        conn.close()
+    return [sql for _, sql in indexes]
+
+
+def generate(path, tutors, students, payments, connections=5, session_ratio=0.7, seed=42, anchor=None,
+             password_hash='x', batch_size=50000, progress=print):
+    """Populate a new database at ``path``; returns {table: rows written}"""
+    from availability import parse_availability
+    from locations import structured_location
+
+    rng = random.Random(seed)
+    anchor = anchor or datetime(2025, 1, 1)
+    places = load_places()
+    index_sql = create_schema(path)
+    counts = {}
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+    conn.execute('BEGIN')
+
+    def load(table, sql, rows):
+        started = time.perf_counter()
+        written = 0
+        for batch in _batched(rows, batch_size):
+            conn.executemany(sql, batch)
+            written += len(batch)
+        counts[table] = written
+        progress(f"  {table:<18} {written:>10,} rows in {time.perf_counter() - started:6.1f}s")
+
+    def joined(days):
+        return anchor - timedelta(days=days, seconds=rng.randrange(86400))
+
+    def user_rows():
+        for user_id in range(1, tutors + students + 1):
+            county, constituency = rng.choice(places)
+            is_tutor = user_id <= tutors
+            number = user_id if is_tutor else user_id - tutors
+            yield (user_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                   f"{'tutor' if is_tutor else 'student'}{number}@example.com", password_hash,
+                   'tutor' if is_tutor else 'student', f"07{rng.randrange(10 ** 8):08d}", county, constituency,
+                   constituency, f"{rng.choice(LAST_NAMES)} {rng.choice(ESTATES)}", _stamp(joined(rng.randrange(730))))
+
+    load('user', "INSERT INTO user (id, name, email, password_hash, user_type, phone, county, sub_county, "
+                 "constituency, location, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", user_rows())
+
+    # Tutor i belongs to user i; location columns are copied from the user row as signup does
+    tutor_prices = [0.0] * (tutors + 1)
+    tutor_subjects = [''] * (tutors + 1)
+    tutor_availability = [''] * (tutors + 1)
+    user_places = conn.execute(
+        'SELECT county, sub_county, constituency, location, phone FROM user WHERE id <= ? ORDER BY id', (tutors,)
+    ).fetchall()
+
+    def tutor_rows():
+        for tutor_id, (county, sub_county, constituency, area, phone) in enumerate(user_places, 1):
+            subject = rng.choice(SUBJECTS)
+            price = float(rng.randrange(300, 3001, 50))
+            availability = rng.choice(AVAILABILITY)
+            tutor_prices[tutor_id], tutor_subjects[tutor_id], tutor_availability[tutor_id] = price, subject, availability
+            normalized = structured_location(county, sub_county, constituency, area)
+            yield (tutor_id, tutor_id, subject, price, availability, phone,
+                   f"{county}, {sub_county}, {constituency}, {area}", normalized['county'],
+                   normalized['sub_county'], normalized['constituency'], normalized['area'],
+                   f"Experienced {subject} tutor in {county}." if rng.random() < 0.7 else None,
+                   round(rng.uniform(3.0, 5.0), 1) if rng.random() < 0.9 else 0.0, 0,
+                   _stamp(joined(rng.randrange(730))))
+
+    load('tutor', "INSERT INTO tutor (id, user_id, subject, price_per_hour, availability, whatsapp_number, "
+                  "location, county, sub_county, constituency, area, bio, rating, total_sessions, created_at) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tutor_rows())
+
+    windows = {text: parse_availability(text) for text in AVAILABILITY}
+    load('tutor_availability', "INSERT INTO tutor_availability (tutor_id, start_minute, end_minute) VALUES (?, ?, ?)",
+         ((tutor_id, start, end) for tutor_id in range(1, tutors + 1)
+          for start, end in windows[tutor_availability[tutor_id]]))
+
+    def connection_rows():
+        for student_id in range(tutors + 1, tutors + students + 1):
+            picked = min(tutors, int(rng.expovariate(1 / connections))) if connections else 0
+            when = _stamp(joined(rng.randrange(365)))
+            for tutor_id in rng.sample(range(1, tutors + 1), picked):
+                yield student_id, tutor_id, when
+
+    load('connection', 'INSERT INTO connection (student_id, tutor_id, timestamp) VALUES (?, ?, ?)', connection_rows())
+
+    # Payments are the bulk of a large fixture, so this loop sticks to rng.random() and reuses strings
+    total_weight = sum(weight for _, weight in PAYMENT_STATUSES)
+    thresholds, cumulative = [], 0
+    for status, weight in PAYMENT_STATUSES:
+        cumulative += weight
+        thresholds.append((cumulative / total_weight, status))
+    durations = (1.0, 1.0, 1.5, 2.0)
+    sessions = []
+
+    def payment_rows():
+        draw = rng.random
+        first_student = tutors + 1
+        for payment_id in range(1, payments + 1):
+            student_id = first_student + int(draw() * students)
+            tutor_id = 1 + int(draw() * tutors)
+            hours = durations[int(draw() * 4)]
+            created = anchor - timedelta(seconds=int(draw() * 365 * 86400))
+            stamp = _stamp(created)
+            pick = draw()
+            status = next(status for threshold, status in thresholds if pick < threshold)
+            invoice = f"MPESA-{payment_id:09d}" if draw() < 0.85 else f"INV-{payment_id:09d}"
+            yield (payment_id, student_id, tutor_id, tutor_prices[tutor_id] * hours, 'KES', status, invoice,
+                   'mpesa' if invoice[0] == 'M' else 'card', f"{tutor_subjects[tutor_id]} lesson, {hours:g} h",
+                   stamp, stamp)
+            if status == 'completed' and draw() < session_ratio:
+                start = (created + timedelta(days=1 + int(draw() * 14))).replace(
+                    hour=7 + int(draw() * 13), minute=30 if draw() < 0.5 else 0, second=0)
+                session_status = 'scheduled' if start > anchor else ('cancelled' if draw() < 0.05 else 'completed')
+                sessions.append((student_id, tutor_id, payment_id, _stamp(start), _stamp(start + timedelta(hours=hours)),
+                                 hours, session_status, stamp, stamp))
+
+    def payment_batches():
+        # Sessions are written alongside each payment batch so they never pile up in memory
+        for row in payment_rows():
+            yield row
+            if len(sessions) >= batch_size:
+                flush_sessions()
+
+    session_count = [0]
+
+    def flush_sessions():
+        conn.executemany("INSERT INTO session (student_id, tutor_id, payment_id, session_date, end_date, "
+                         "duration_hours, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", sessions)
+        session_count[0] += len(sessions)
+        sessions.clear()
+
+    load('payment', "INSERT INTO payment (id, student_id, tutor_id, amount, currency, status, intasend_invoice_id, "
+                    "payment_method, description, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+         payment_batches())
+    flush_sessions()
+    counts['session'] = session_count[0]
+    progress(f"  {'session':<18} {session_count[0]:>10,} rows")
+
+    started = time.perf_counter()
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.execute("UPDATE tutor SET total_sessions = (SELECT count(*) FROM session "
+                 "WHERE session.tutor_id = tutor.id AND session.status = 'completed')")
+    conn.execute('COMMIT')
+    conn.execute('ANALYZE')
+    conn.close()
+    progress(f"  indexes + ANALYZE  {len(index_sql):>10} in {time.perf_counter() - started:6.1f}s")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--db', default=os.path.join(os.getcwd(), 'edubridge.db'), help='Database file to create')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--tutors', type=int)
+    parser.add_argument('--students', type=int)
+    parser.add_argument('--payments', type=int)
+    parser.add_argument('--connections', type=float, default=5, help='Average tutors each student connects with')
+    parser.add_argument('--session-ratio', type=float, default=0.7, help='Share of completed payments with a session')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', default='2025-01-01', help="'Now' for the data (YYYY-MM-DD); later sessions are scheduled")
+    parser.add_argument('--password', default='password123', help='Password for every generated account')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--force', action='store_true', help='Replace the database file if it exists')
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+    if os.path.exists(args.db):
+        if not args.force:
+            print(f"❌ {args.db} already exists; pass --force to replace it")
+            sys.exit(1)
+        os.remove(args.db)
+
+    import app as app_module
+    from passwords import PasswordHasher
+
+    password_hash = PasswordHasher(app_module.password_hasher.policy, workers=0).hash(args.password)
+    print(f"Generating {scale['tutors']:,} tutors, {scale['students']:,} students and "
+          f"{scale['payments']:,} payments into {args.db} (seed {args.seed})")
+    started = time.perf_counter()
+    try:
+        generate(args.db, connections=args.connections, session_ratio=args.session_ratio, seed=args.seed,
+                 anchor=datetime.strptime(args.anchor, '%Y-%m-%d'), password_hash=password_hash,
+                 batch_size=args.batch_size, **scale)
+    except Exception as e:
+        # Journaling is off during the load, so a partial file is not worth keeping
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        print(f"❌ Generation failed: {e}")
+        sys.exit(1)
+    print(f"✓ Done in {time.perf_counter() - started:.1f}s; every account's password is {args.password!r}")
+    print("  Run python build_recommendations.py against it to fill the similar-tutors table")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Proximity ranking over bundled Kenyan place centroids.
+
+data/kenya_places.csv holds one centroid per county plus constituency
+centroids where we have them. The pairwise great-circle distance matrix is
+computed once per worker on first use; ranking a set of tutors is then a
+single fancy-indexed row lookup and an ``argpartition`` top-k, so the whole
+directory is never sorted. Without NumPy the same logic runs on lists.
+"""
+
+import csv
+import heapq
+import math
+import os
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # optional speed-up
+    np = None
+
+from locations import place_key
+
+PLACES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'kenya_places.csv')
+EARTH_RADIUS_KM = 6371.0
+UNKNOWN = -1
+
+
+class PlaceIndex:
+    """Place names, their centroids and the precomputed distance matrix"""
+
+    def __init__(self, places):
+        # places: list of (level, name, county, lat, lon)
+        self.places = places
+        self.by_name = {}
+        self.by_county_constituency = {}
+        for i, (level, name, county, _, _) in enumerate(places):
+            if level == 'constituency':
+                self.by_county_constituency[(place_key(county), place_key(name))] = i
+                self.by_name.setdefault(place_key(name), i)
+        for i, (level, name, _, _, _) in enumerate(places):
+            if level == 'county':
+                # A bare county name always means the county, even if a constituency shares it
+                self.by_name[place_key(name)] = i
+        self.county_index = {place_key(p[2]): i for i, p in enumerate(places) if p[0] == 'county'}
+        self.matrix = self._distance_matrix([p[3] for p in places], [p[4] for p in places])
+
+    @staticmethod
+    def _distance_matrix(lats, lons):
+        if np is not None:
+            lat = np.radians(np.asarray(lats, dtype=np.float64))
+            lon = np.radians(np.asarray(lons, dtype=np.float64))
+            dlat = lat[:, None] - lat[None, :]
+            dlon = lon[:, None] - lon[None, :]
+            a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+            matrix = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+            # Trailing column for UNKNOWN (-1) places: infinitely far from everything
+            return np.hstack([matrix, np.full((len(lats), 1), np.inf)]).astype(np.float32)
+        matrix = []
+        for lat1, lon1 in zip(lats, lons):
+            row = []
+            for lat2, lon2 in zip(lats, lons):
+                p1, p2 = math.radians(lat1), math.radians(lat2)
+                a = (math.sin((p2 - p1) / 2) ** 2 +
+                     math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+                row.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a))))
+            matrix.append(row)
+        return matrix
+
+    def resolve(self, name, county=None):
+        """Index of a place given by name (and optionally its county), or None"""
+        if county:
+            index = self.by_county_constituency.get((place_key(county), place_key(name)))
+            if index is not None:
+                return index
+        return self.by_name.get(place_key(name))
+
+    def tutor_place(self, county, constituency):
+        """Most precise known place for a tutor, falling back to the county centroid"""
+        index = self.by_county_constituency.get((place_key(county), place_key(constituency)))
+        if index is None:
+            index = self.county_index.get(place_key(county), UNKNOWN)
+        return index
+
+
+class TutorPlaces:
+    """Tutor ids aligned with their place indices, built per directory generation"""
+
+    def __init__(self, place_index, rows):
+        # rows: iterable of (tutor_id, county, constituency)
+        ids, indices = [], []
+        for tutor_id, county, constituency in rows:
+            ids.append(tutor_id)
+            indices.append(place_index.tutor_place(county, constituency))
+        self.place_index = place_index
+        if np is not None:
+            self.ids = np.asarray(ids, dtype=np.int64)
+            self.indices = np.asarray(indices, dtype=np.int64)
+        else:
+            self.ids = ids
+            self.indices = indices
+
+    def nearest(self, origin, k, candidate_ids=None):
+        """Top-k (tutor_id, distance_km) closest to place ``origin``, nearest first"""
+        matrix = self.place_index.matrix
+        if np is not None:
+            ids, indices = self.ids, self.indices
+            if candidate_ids is not None:
+                mask = np.isin(ids, np.fromiter(candidate_ids, dtype=np.int64, count=len(candidate_ids)))
+                ids, indices = ids[mask], indices[mask]
+            if len(ids) == 0:
+                return []
+            distances = matrix[origin][indices]
+            known = np.isfinite(distances)
+            ids, distances = ids[known], distances[known]
+            if len(ids) > k:
+                top = np.argpartition(distances, k - 1)[:k]
+                ids, distances = ids[top], distances[top]
+            order = np.argsort(distances, kind='stable')
+            return [(int(ids[i]), float(distances[i])) for i in order]
+
+        row = matrix[origin]
+        pairs = (
+            (row[index], tutor_id)
+            for tutor_id, index in zip(self.ids, self.indices)
+            if index != UNKNOWN and (candidate_ids is None or tutor_id in candidate_ids)
+        )
+        return [(tutor_id, distance) for distance, tutor_id in heapq.nsmallest(k, pairs)]
+
+
+_place_index = None
+_place_index_lock = threading.Lock()
+
+
+def load_place_index(path=PLACES_PATH):
+    """The worker-wide PlaceIndex, loaded from the bundled CSV on first use"""
+    global _place_index
+    if _place_index is None:
+        with _place_index_lock:
+            if _place_index is None:
+                with open(path, newline='', encoding='utf-8') as f:
+                    places = [
+                        (row['level'], row['name'], row['county'], float(row['lat']), float(row['lon']))
+                        for row in csv.DictReader(f)
+                    ]
+                _place_index = PlaceIndex(places)
+    return _place_index
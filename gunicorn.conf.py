@@ -0,0 +1,25 @@
+"""
+gunicorn settings, picked up automatically by ``gunicorn app:app``.
+
+Sets up prometheus_client's multiprocess mode so /metrics reports every
+worker, not just whichever one answered the scrape. The directory has to be
+in the environment before the workers import app.py, and is emptied at
+startup so samples from a previous run don't linger.
+"""
+
+import os
+import shutil
+import tempfile
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'edubridge-metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Bulk import tutors from a partner school's CSV or JSONL export.
+
+Each record becomes a user (user_type 'tutor') and a tutor profile, the same
+rows signup writes. Records are streamed, validated and collected into
+batches; each batch has its passwords hashed across a process pool and is
+written with one executemany per table in a single transaction.
+
+Columns (CSV header or JSON keys, case-insensitive):
+  required  name, email, password, phone, county, sub_county, constituency,
+            location, subject, price_per_hour, availability
+  optional  bio, whatsapp_number (defaults to phone)
+
+Rejected records (missing fields, bad email or price, emails already
+registered or repeated in the file) are skipped and written with their
+record number and reason to <input>.rejects.csv. After every committed
+batch the number of records consumed is saved to <input>.checkpoint, so an
+interrupted import started again with the same arguments carries on where
+it stopped; --restart ignores the checkpoint.
+
+Usage:
+  python import_tutors.py tutors.csv [--batch-size 500] [--workers 4]
+  python import_tutors.py tutors.jsonl --dry-run
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from itertools import islice
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+REQUIRED = ('name', 'email', 'password', 'phone', 'county', 'sub_county', 'constituency', 'location',
+            'subject', 'price_per_hour', 'availability')
+OPTIONAL = ('bio', 'whatsapp_number')
+EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _column(key):
+    return re.sub(r'[\s-]+', '_', str(key).strip().lower())
+
+
+def read_records(path):
+    """Yield (record number, dict or None when unparseable) from a CSV or JSONL file"""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            number = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield number, None
+                    continue
+                yield number, {_column(k): v for k, v in record.items()} if isinstance(record, dict) else None
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for number, record in enumerate(csv.DictReader(f), 1):
+                yield number, {_column(k): v for k, v in record.items() if k is not None}
+
+
+def validate(record, seen_emails):
+    """(cleaned row, None) or (None, reason); ``seen_emails`` holds registered and already-read emails"""
+    if record is None:
+        return None, 'unreadable record'
+    row = {field: str(record.get(field) or '').strip() for field in REQUIRED + OPTIONAL}
+    missing = [field for field in REQUIRED if not row[field]]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    row['email'] = row['email'].lower()
+    if not EMAIL.match(row['email']):
+        return None, 'invalid email'
+    try:
+        row['price_per_hour'] = float(row['price_per_hour'].replace(',', ''))
+    except ValueError:
+        return None, 'invalid price_per_hour'
+    if row['price_per_hour'] <= 0:
+        return None, 'invalid price_per_hour'
+    if row['email'] in seen_emails:
+        return None, 'email already registered'
+    seen_emails.add(row['email'])
+    return row, None
+
+
+def write_batch(app_module, rows, password_hashes):
+    """Insert users, tutors and parsed availability for one batch; the caller commits"""
+    from sqlalchemy import insert
+    from availability import parse_availability
+    from locations import structured_location
+
+    db, User, Tutor = app_module.db, app_module.User, app_module.Tutor
+    user_ids = dict(db.session.execute(insert(User).returning(User.email, User.id), [{
+        'name': row['name'], 'email': row['email'], 'password_hash': password_hash, 'user_type': 'tutor',
+        'phone': row['phone'], 'county': row['county'], 'sub_county': row['sub_county'],
+        'constituency': row['constituency'], 'location': row['location'],
+    } for row, password_hash in zip(rows, password_hashes)]).all())
+
+    tutors = db.session.execute(insert(Tutor).returning(Tutor.id, Tutor.availability), [dict(
+        user_id=user_ids[row['email']],
+        subject=row['subject'],
+        price_per_hour=row['price_per_hour'],
+        availability=row['availability'],
+        bio=row['bio'] or None,
+        whatsapp_number=row['whatsapp_number'] or row['phone'],
+        location=f"{row['county']}, {row['sub_county']}, {row['constituency']}, {row['location']}",
+        **structured_location(row['county'], row['sub_county'], row['constituency'], row['location'])
+    ) for row in rows]).all()
+
+    windows = [{'tutor_id': tutor_id, 'start_minute': start, 'end_minute': end}
+               for tutor_id, availability in tutors for start, end in parse_availability(availability)]
+    if windows:
+        db.session.execute(insert(app_module.TutorAvailability), windows)
+
+
+def load_checkpoint(path, source):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return 0
+    if checkpoint.get('source') != os.path.abspath(source):
+        raise SystemExit(f"❌ {path} belongs to {checkpoint.get('source')}; use --restart to start over")
+    return int(checkpoint.get('records', 0))
+
+
+def save_checkpoint(path, source, records):
+    # Write-then-rename so a crash mid-write leaves the previous checkpoint intact
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.import-checkpoint-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'source': os.path.abspath(source), 'records': records}, f)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('path', help='CSV or JSONL (.jsonl/.ndjson) file of tutors')
+    parser.add_argument('--batch-size', type=int, default=500, help='Records per transaction')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Password hashing processes')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the top')
+    parser.add_argument('--dry-run', action='store_true', help='Validate only; nothing is hashed or written')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ {args.path} not found")
+        sys.exit(1)
+    checkpoint_path = f"{args.path}.checkpoint"
+    rejects_path = f"{args.path}.rejects.csv"
+    skip = 0 if args.restart or args.dry_run else load_checkpoint(checkpoint_path, args.path)
+
+    import app as app_module
+    from passwords import PasswordHasher
+
+    hasher = PasswordHasher(app_module.password_hasher.policy, workers=args.workers)
+    with app_module.app.app_context(), \
+            open(rejects_path, 'a' if skip else 'w', newline='', encoding='utf-8') as rejects_file:
+        rejects = csv.writer(rejects_file)
+        if not skip:
+            rejects.writerow(['record', 'email', 'reason'])
+        db = app_module.db
+        db.create_all()
+        seen_emails = {email.lower() for email in db.session.execute(db.select(app_module.User.email)).scalars()}
+
+        records = read_records(args.path)
+        if skip:
+            print(f"Resuming after record {skip} from {checkpoint_path}")
+            # Re-read skipped records only to remember their emails as taken
+            for _, record in islice(records, skip):
+                if record and record.get('email'):
+                    seen_emails.add(str(record['email']).strip().lower())
+        consumed, imported, rejected = skip, 0, 0
+        started = time.perf_counter()
+        try:
+            while True:
+                batch = list(islice(records, args.batch_size))
+                if not batch:
+                    break
+                rows = []
+                for number, record in batch:
+                    row, reason = validate(record, seen_emails)
+                    if row is None:
+                        rejected += 1
+                        rejects.writerow([number, (record or {}).get('email', ''), reason])
+                    else:
+                        rows.append(row)
+                if rows and not args.dry_run:
+                    password_hashes = hasher.hash_many([row.pop('password') for row in rows])
+                    try:
+                        write_batch(app_module, rows, password_hashes)
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"❌ Batch ending at record {batch[-1][0]} failed, nothing from it was saved: {e}")
+                        sys.exit(1)
+                    app_module.directory_generation.bump()
+                consumed += len(batch)
+                imported += len(rows)
+                if not args.dry_run:
+                    save_checkpoint(checkpoint_path, args.path, consumed)
+                rejects_file.flush()
+                elapsed = time.perf_counter() - started
+                print(f"  {consumed} records read, {imported} {'valid' if args.dry_run else 'imported'}, "
+                      f"{rejected} rejected ({imported / elapsed if elapsed else 0:.0f} tutors/s)")
+        finally:
+            hasher.shutdown()
+
+    if not args.dry_run and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    verb = 'would import' if args.dry_run else 'imported'
+    print(f"✓ {verb} {imported} tutors in {time.perf_counter() - started:.1f}s")
+    if rejected:
+        print(f"⚠ {rejected} records rejected, see {rejects_path}")
+
+
+if __name__ == "__main__":
+    main()
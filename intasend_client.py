@@ -0,0 +1,113 @@
+"""
+Thin client for IntaSend's v1 REST API at a configurable base URL.
+
+The intasend-python SDK always talks to sandbox.intasend.com or
+payment.intasend.com, so it can't follow INTASEND_API_URL to a proxy or to
+benchmarks/intasend_stub.py. This client calls the same endpoints with the
+same bodies and headers as the SDK, and exposes the two resources app.py
+uses:
+
+``collection_requests`` sends an M-Pesa STK push (``payment/mpesa-stk-push/``)
+and looks its invoice up (``payment/status/``). ``invoices`` opens a
+card/bank checkout (``checkout/``). Answers are IntaSend's JSON with ``id``
+and ``state`` filled in, plus ``hosted_url`` for checkouts. A non-2xx answer
+raises ``IntaSendError``.
+
+A checkout has no invoice until the customer pays, so the webhook that
+settles it carries a new ``invoice_id``; the ``api_ref`` sent here is what
+ties it back to the payment.
+"""
+
+import os
+import threading
+
+import requests
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _session():
+    # One connection pool per process: a Session must not be shared across a fork
+    session = _sessions.get(os.getpid())
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.setdefault(os.getpid(), requests.Session())
+    return session
+
+
+class IntaSendError(Exception):
+    """IntaSend answered with a non-2xx status"""
+
+    def __init__(self, status_code, body):
+        super().__init__(f"IntaSend returned {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.body = body
+
+
+def _with_id(invoice):
+    return dict(invoice, id=invoice.get('invoice_id'))
+
+
+class CollectionRequests:
+    def __init__(self, service):
+        self.service = service
+
+    def create(self, data):
+        response = self.service.post('payment/mpesa-stk-push/', {
+            'public_key': self.service.publishable_key,
+            'currency': data.get('currency', 'KES'),
+            'method': 'M-PESA',
+            'amount': data['amount'],
+            'phone_number': data['mpesa_phone'],
+            'api_ref': data.get('account_ref'),
+            'narrative': data.get('narrative'),
+        }, auth=True)
+        return _with_id(response['invoice'])
+
+    def retrieve(self, invoice_id):
+        response = self.service.post('payment/status/', {
+            'invoice_id': invoice_id,
+            'public_key': self.service.publishable_key,
+        })
+        return _with_id(response['invoice'])
+
+
+class Invoices(CollectionRequests):
+    def create(self, data):
+        invoice = data['invoice']
+        customer = invoice.get('customer') or {}
+        response = self.service.post('checkout/', {
+            'public_key': self.service.publishable_key,
+            'currency': invoice.get('currency', 'KES'),
+            'amount': invoice['amount'],
+            'api_ref': invoice.get('number'),
+            'comment': invoice.get('description'),
+            'email': customer.get('email'),
+            'first_name': customer.get('first_name'),
+            'last_name': customer.get('last_name'),
+            'phone_number': customer.get('phone'),
+        })
+        # The checkout is open until the customer pays; the SDK's checkout answer has no state
+        return dict(response, state='PENDING', hosted_url=response.get('url'))
+
+
+class APIService:
+    def __init__(self, publishable_key, secret_key, api_url, timeout=10):
+        self.publishable_key = publishable_key
+        self.secret_key = secret_key
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.collection_requests = CollectionRequests(self)
+        self.invoices = Invoices(self)
+
+    def post(self, endpoint, payload, auth=False):
+        # Like the SDK: checkout and status go by the public key, the STK push needs the secret key too
+        headers = {'INTASEND_PUBLIC_API_KEY': self.publishable_key}
+        if auth:
+            headers['Authorization'] = f"Bearer {self.secret_key}"
+        response = _session().post(f"{self.api_url}/api/v1/{endpoint}", json=payload, headers=headers,
+                                   timeout=self.timeout)
+        if not response.ok:
+            raise IntaSendError(response.status_code, response.text)
+        return response.json()
@@ -0,0 +1,65 @@
+"""
+Normalization helpers for Kenyan locations.
+
+Tutors keep structured county / sub-county / constituency / area columns so
+that location filters are exact (case-insensitive) index lookups instead of
+``ilike('%...%')`` scans over the flattened ``Tutor.location`` string.
+"""
+
+import re
+
+KENYAN_COUNTIES = (
+    'Mombasa', 'Kwale', 'Kilifi', 'Tana River', 'Lamu', 'Taita-Taveta', 'Garissa', 'Wajir',
+    'Mandera', 'Marsabit', 'Isiolo', 'Meru', 'Tharaka-Nithi', 'Embu', 'Kitui', 'Machakos',
+    'Makueni', 'Nyandarua', 'Nyeri', 'Kirinyaga', "Murang'a", 'Kiambu', 'Turkana', 'West Pokot',
+    'Samburu', 'Trans Nzoia', 'Uasin Gishu', 'Elgeyo-Marakwet', 'Nandi', 'Baringo', 'Laikipia',
+    'Nakuru', 'Narok', 'Kajiado', 'Kericho', 'Bomet', 'Kakamega', 'Vihiga', 'Bungoma', 'Busia',
+    'Siaya', 'Kisumu', 'Homa Bay', 'Migori', 'Kisii', 'Nyamira', 'Nairobi',
+)
+
+# Upper edges (KES per hour) of the price buckets reported by /api/tutors/facets
+DEFAULT_PRICE_BUCKETS = (500, 1000, 2000, 5000)
+
+
+def place_key(value):
+    """Comparison key that ignores case, punctuation and spacing differences"""
+    return re.sub(r'[^a-z0-9]+', '', (value or '').lower())
+
+
+_COUNTY_BY_KEY = {place_key(name): name for name in KENYAN_COUNTIES}
+_COUNTY_BY_KEY.update({
+    place_key('Nairobi City'): 'Nairobi',
+    place_key('Muranga'): "Murang'a",
+    place_key('Taita Taveta'): 'Taita-Taveta',
+    place_key('Tharaka Nithi'): 'Tharaka-Nithi',
+    place_key('Elgeyo Marakwet'): 'Elgeyo-Marakwet',
+})
+
+
+def normalize_place(value):
+    """Collapse whitespace and capitalize each word; None for blank input"""
+    words = (value or '').split()
+    if not words:
+        return None
+    return ' '.join(word[:1].upper() + word[1:].lower() for word in words)
+
+
+def normalize_county(value):
+    """Canonical county name when recognized, otherwise the normalized input"""
+    return _COUNTY_BY_KEY.get(place_key(value)) or normalize_place(value)
+
+
+def structured_location(county, sub_county, constituency, area):
+    """Normalized column values for a tutor's location"""
+    return {
+        'county': normalize_county(county),
+        'sub_county': normalize_place(sub_county),
+        'constituency': normalize_place(constituency),
+        'area': normalize_place(area),
+    }
+
+
+def price_bucket_label(lower, upper):
+    if upper is None:
+        return f"{lower}+"
+    return f"{lower}-{upper - 1}"
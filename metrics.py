@@ -0,0 +1,106 @@
+"""
+Per-request instrumentation exported in Prometheus format.
+
+``RequestMetrics.init_app`` times every Flask request by its URL rule (not
+the raw path, so ``/api/tutors/<int:tutor_id>`` is one series), and
+``instrument_engine`` counts the SQL statements and database time each
+request spends through SQLAlchemy's cursor events. Payment gateway calls are
+timed by wrapping them in ``gateway_call(operation)``.
+
+Under gunicorn each worker records its own samples. With
+PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does this) prometheus_client
+keeps the values in per-process files there, and ``render`` merges all
+workers' files, so any worker can answer a scrape for the whole server.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SQL_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class RequestMetrics:
+    """Request, SQL and gateway histograms for one app"""
+
+    def __init__(self, prefix='edubridge'):
+        self.registry = CollectorRegistry()
+        self.request_seconds = Histogram(
+            f'{prefix}_request_seconds', 'Request latency by route',
+            ['method', 'route', 'status'], registry=self.registry)
+        self.request_queries = Histogram(
+            f'{prefix}_request_queries', 'SQL statements issued per request',
+            ['method', 'route'], buckets=QUERY_BUCKETS, registry=self.registry)
+        self.request_query_seconds = Histogram(
+            f'{prefix}_request_query_seconds', 'Time spent in SQL per request',
+            ['method', 'route'], buckets=SQL_TIME_BUCKETS, registry=self.registry)
+        self.gateway_seconds = Histogram(
+            f'{prefix}_gateway_seconds', 'Payment gateway call latency',
+            ['operation', 'outcome'], registry=self.registry)
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def instrument_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor)
+        event.listen(engine, 'handle_error', self._failed_cursor)
+
+    def _start(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_queries = 0
+        g._metrics_query_seconds = 0.0
+
+    def _finish(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+        # Unmatched paths share one label so scanners can't grow the series count
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        self.request_seconds.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started)
+        self.request_queries.labels(request.method, route).observe(g.pop('_metrics_queries', 0))
+        self.request_query_seconds.labels(request.method, route).observe(g.pop('_metrics_query_seconds', 0.0))
+        return response
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_metrics_started'].pop()
+        # Background threads (counter flushes, index builds) have no request to charge
+        if has_request_context() and '_metrics_queries' in g:
+            g._metrics_queries += 1
+            g._metrics_query_seconds += time.perf_counter() - started
+
+    def _failed_cursor(self, exception_context):
+        # A failed statement never reaches after_cursor_execute
+        if exception_context.connection is not None:
+            started = exception_context.connection.info.get('_metrics_started')
+            if started:
+                started.pop()
+
+    @contextmanager
+    def gateway_call(self, operation):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.gateway_seconds.labels(operation, outcome).observe(time.perf_counter() - started)
+
+    def render(self):
+        """Exposition text and its content type"""
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self.registry
+        return generate_latest(registry), CONTENT_TYPE_LATEST
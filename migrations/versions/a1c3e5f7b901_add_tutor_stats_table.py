@@ -0,0 +1,31 @@
+"""Add tutor_stats table for buffered popularity counters
+
+Revision ID: a1c3e5f7b901
+Revises: 939e7c02ba86
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = '939e7c02ba86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tutor_stats',
+    sa.Column('tutor_id', sa.Integer(), nullable=False),
+    sa.Column('profile_views', sa.Integer(), nullable=False),
+    sa.Column('search_impressions', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['tutor_id'], ['tutor.id'], ),
+    sa.PrimaryKeyConstraint('tutor_id')
+    )
+
+
+def downgrade():
+    op.drop_table('tutor_stats')
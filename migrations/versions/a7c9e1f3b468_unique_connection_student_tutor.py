@@ -0,0 +1,30 @@
+"""Deduplicate connections and make (student_id, tutor_id) unique
+
+Revision ID: a7c9e1f3b468
+Revises: f6b8d0e2a357
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b468'
+down_revision = 'f6b8d0e2a357'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the earliest row of each duplicated pair so the constraint can be created
+    op.execute(
+        "DELETE FROM connection WHERE id NOT IN "
+        "(SELECT MIN(id) FROM connection GROUP BY student_id, tutor_id)"
+    )
+    with op.batch_alter_table('connection', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_connection_student_id_tutor_id', ['student_id', 'tutor_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('connection', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_connection_student_id_tutor_id', type_='unique')
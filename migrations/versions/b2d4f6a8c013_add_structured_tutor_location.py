@@ -0,0 +1,57 @@
+"""Add structured, indexed location columns to tutor
+
+Revision ID: b2d4f6a8c013
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from locations import structured_location
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c013'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tutor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('county', sa.String(length=50, collation='NOCASE'), nullable=True))
+        batch_op.add_column(sa.Column('sub_county', sa.String(length=50, collation='NOCASE'), nullable=True))
+        batch_op.add_column(sa.Column('constituency', sa.String(length=50, collation='NOCASE'), nullable=True))
+        batch_op.add_column(sa.Column('area', sa.String(length=100, collation='NOCASE'), nullable=True))
+        batch_op.create_index('ix_tutor_county_sub_county_constituency', ['county', 'sub_county', 'constituency'], unique=False)
+        batch_op.create_index('ix_tutor_constituency', ['constituency'], unique=False)
+        batch_op.create_index('ix_tutor_subject_county', ['subject', 'county'], unique=False)
+        batch_op.create_index('ix_tutor_price_per_hour', ['price_per_hour'], unique=False)
+
+    # Backfill from the owning user's signup fields, normalized the way signup does it
+    bind = op.get_bind()
+    tutors = bind.execute(sa.text(
+        "SELECT tutor.id, user.county, user.sub_county, user.constituency, user.location "
+        "FROM tutor JOIN user ON user.id = tutor.user_id"
+    )).fetchall()
+    rows = [
+        dict(structured_location(county, sub_county, constituency, location), tutor_id=tutor_id)
+        for tutor_id, county, sub_county, constituency, location in tutors
+    ]
+    if rows:
+        bind.execute(sa.text(
+            "UPDATE tutor SET county = :county, sub_county = :sub_county, "
+            "constituency = :constituency, area = :area WHERE id = :tutor_id"
+        ), rows)
+
+def downgrade():
+    with op.batch_alter_table('tutor', schema=None) as batch_op:
+        batch_op.drop_index('ix_tutor_price_per_hour')
+        batch_op.drop_index('ix_tutor_subject_county')
+        batch_op.drop_index('ix_tutor_constituency')
+        batch_op.drop_index('ix_tutor_county_sub_county_constituency')
+        batch_op.drop_column('area')
+        batch_op.drop_column('constituency')
+        batch_op.drop_column('sub_county')
+        batch_op.drop_column('county')
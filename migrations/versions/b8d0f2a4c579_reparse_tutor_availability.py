@@ -0,0 +1,39 @@
+"""Re-parse tutor availability so trailing day names attach to their hours
+
+Revision ID: b8d0f2a4c579
+Revises: a7c9e1f3b468
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from availability import parse_availability
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d0f2a4c579'
+down_revision = 'a7c9e1f3b468'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # "2-4pm weekdays" was stored as all of Mon-Fri plus 2-4pm every day
+    availability_table = sa.table('tutor_availability',
+        sa.column('tutor_id', sa.Integer()),
+        sa.column('start_minute', sa.Integer()),
+        sa.column('end_minute', sa.Integer()),
+    )
+    tutors = op.get_bind().execute(sa.text("SELECT id, availability FROM tutor")).fetchall()
+    op.execute("DELETE FROM tutor_availability")
+    op.bulk_insert(availability_table, [
+        {'tutor_id': tutor_id, 'start_minute': start, 'end_minute': end}
+        for tutor_id, text in tutors
+        for start, end in parse_availability(text)
+    ])
+
+
+def downgrade():
+    # The old rows were wrong; nothing to restore
+    pass
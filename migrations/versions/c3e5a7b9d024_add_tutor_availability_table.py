@@ -0,0 +1,48 @@
+"""Add tutor_availability table with parsed weekly intervals
+
+Revision ID: c3e5a7b9d024
+Revises: b2d4f6a8c013
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from availability import parse_availability
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d024'
+down_revision = 'b2d4f6a8c013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    availability_table = op.create_table('tutor_availability',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tutor_id', sa.Integer(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=False),
+    sa.Column('end_minute', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tutor_id'], ['tutor.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tutor_availability', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tutor_availability_tutor_id'), ['tutor_id'], unique=False)
+        batch_op.create_index('ix_tutor_availability_window', ['start_minute', 'end_minute'], unique=False)
+
+    # Parse the free text of every existing tutor
+    tutors = op.get_bind().execute(sa.text("SELECT id, availability FROM tutor")).fetchall()
+    op.bulk_insert(availability_table, [
+        {'tutor_id': tutor_id, 'start_minute': start, 'end_minute': end}
+        for tutor_id, text in tutors
+        for start, end in parse_availability(text)
+    ])
+
+
+def downgrade():
+    with op.batch_alter_table('tutor_availability', schema=None) as batch_op:
+        batch_op.drop_index('ix_tutor_availability_window')
+        batch_op.drop_index(batch_op.f('ix_tutor_availability_tutor_id'))
+
+    op.drop_table('tutor_availability')
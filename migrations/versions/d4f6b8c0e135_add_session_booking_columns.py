@@ -0,0 +1,35 @@
+"""Add booking hold columns and range index to session
+
+Revision ID: d4f6b8c0e135
+Revises: c3e5a7b9d024
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e135'
+down_revision = 'c3e5a7b9d024'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('end_date', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('hold_expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_session_tutor_id_session_date', ['tutor_id', 'session_date'], unique=False)
+        batch_op.create_index('ix_session_payment_id', ['payment_id'], unique=False)
+
+    # Existing sessions block their tutor for their stated duration
+    op.execute("UPDATE session SET end_date = datetime(session_date, '+' || CAST(duration_hours * 60 AS INTEGER) || ' minutes')")
+
+
+def downgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.drop_index('ix_session_payment_id')
+        batch_op.drop_index('ix_session_tutor_id_session_date')
+        batch_op.drop_column('hold_expires_at')
+        batch_op.drop_column('end_date')
@@ -0,0 +1,30 @@
+"""Add session updated_at and student calendar index
+
+Revision ID: e5a7c9d1f246
+Revises: d4f6b8c0e135
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f246'
+down_revision = 'd4f6b8c0e135'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_session_student_id_session_date', ['student_id', 'session_date'], unique=False)
+
+    op.execute("UPDATE session SET updated_at = created_at")
+
+
+def downgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.drop_index('ix_session_student_id_session_date')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,38 @@
+"""Add tutor_cooccurrence table for recommendations
+
+Revision ID: f6b8d0e2a357
+Revises: e5a7c9d1f246
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a357'
+down_revision = 'e5a7c9d1f246'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tutor_cooccurrence',
+    sa.Column('tutor_id', sa.Integer(), nullable=False),
+    sa.Column('other_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['other_id'], ['tutor.id'], ),
+    sa.ForeignKeyConstraint(['tutor_id'], ['tutor.id'], ),
+    sa.PrimaryKeyConstraint('tutor_id', 'other_id')
+    )
+    with op.batch_alter_table('tutor_cooccurrence', schema=None) as batch_op:
+        batch_op.create_index('ix_tutor_cooccurrence_tutor_id_count', ['tutor_id', 'count', 'other_id'], unique=False)
+
+    # Populate it with: python build_recommendations.py
+
+
+def downgrade():
+    with op.batch_alter_table('tutor_cooccurrence', schema=None) as batch_op:
+        batch_op.drop_index('ix_tutor_cooccurrence_tutor_id_count')
+
+    op.drop_table('tutor_cooccurrence')
@@ -0,0 +1,124 @@
+"""
+Password hashing off the request thread.
+
+Werkzeug's hashes are deliberately slow, so a burst of logins can keep every
+gunicorn worker busy hashing. ``PasswordHasher`` sends that work to a small
+process pool of its own and bounds how much can wait for it: once
+``max_pending`` hashes are queued or running, further calls fail at once
+with ``HasherBusy`` so the request can be answered with 503 instead of
+queueing behind the storm.
+
+``HashPolicy`` names the method new hashes use (any Werkzeug method string,
+e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``). A stored hash made
+with different parameters is reported by ``needs_rehash`` so login can
+upgrade it while the plain password is at hand.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
+from itertools import repeat
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+class HashPolicy:
+    """Method for new hashes; the stored prefix is what parameter changes are detected on"""
+
+    def __init__(self, method):
+        self.method = method
+
+    @cached_property
+    def prefix(self):
+        # Let Werkzeug expand defaults ('pbkdf2' -> 'pbkdf2:sha256:600000') so prefixes compare exactly
+        return generate_password_hash('', method=self.method).split('$', 1)[0]
+
+    def needs_rehash(self, pwhash):
+        return (pwhash or '').split('$', 1)[0] != self.prefix
+
+
+class PasswordHasher:
+    """Bounded process pool for hashing and verifying passwords"""
+
+    def __init__(self, policy, workers=2, max_pending=8, timeout=10.0):
+        self.policy = policy
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.policy.method)
+
+    def verify(self, pwhash, password):
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return self.policy.needs_rehash(pwhash)
+
+    def hash_many(self, passwords, chunksize=8):
+        """Hash a batch across every pool process, in order; for imports, not request handlers"""
+        passwords = list(passwords)
+        if not self.workers:
+            return [_hash(password, self.policy.method) for password in passwords]
+        try:
+            return list(self._executor().map(_hash, passwords, repeat(self.policy.method), chunksize=chunksize))
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Password hashing queue is full')
+        try:
+            future = self._executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job finishes, even if this caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            # A pool process died; the next call starts a fresh pool
+            self._pool = None
+            raise HasherBusy('Password hashing pool restarted')
+
+    def _executor(self):
+        # Created lazily so each gunicorn worker owns its pool; spawn avoids forking our threads
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+        return self._pool
+
+    def shutdown(self, wait=False):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
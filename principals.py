@@ -0,0 +1,91 @@
+"""
+Per-worker cache of the logged-in user for Flask-Login.
+
+``load_user`` runs on every authenticated request, so dashboards polling the
+API used to pay a ``user`` row lookup each time. ``PrincipalCache`` keeps a
+small read-only ``Principal`` (the columns handlers read from
+``current_user``, never the password hash) per user id, evicting the least
+recently used past ``max_entries`` and reloading after ``ttl`` seconds.
+
+Writers call ``invalidate(user_id)`` after committing a change to a user.
+That drops the local entry and bumps a generation file shared by the
+gunicorn workers, so the other workers reload their principals on the next
+request instead of waiting out the TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+
+class Principal(UserMixin):
+    """Read-only snapshot of a user row, used as ``current_user``"""
+
+    FIELDS = ('id', 'name', 'email', 'user_type', 'county', 'sub_county', 'constituency', 'location')
+    __slots__ = FIELDS
+
+    def __init__(self, row):
+        for field, value in zip(self.FIELDS, row):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Principal is read-only; update the User row and invalidate the cache')
+
+    def __repr__(self):
+        return f"Principal({self.id}, {self.user_type})"
+
+
+class PrincipalCache:
+    """TTL + LRU map of user id -> Principal, reset whenever the generation moves"""
+
+    def __init__(self, load, generation, ttl=60.0, max_entries=10000):
+        self.load = load
+        self.generation = generation
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._seen = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return self._principal(user_id)
+        now = time.monotonic()
+        generation = self.generation.current()
+        with self._lock:
+            if generation != self._seen:
+                self._entries.clear()
+                self._seen = generation
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        principal = self._principal(user_id)
+        if principal is not None:
+            with self._lock:
+                # A bump while loading means the row may already be stale; serve it but don't keep it
+                if self._seen == generation:
+                    self._entries[user_id] = (principal, now + self.ttl)
+                    self._entries.move_to_end(user_id)
+                    if len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return principal
+
+    def _principal(self, user_id):
+        row = self.load(user_id)
+        return Principal(row) if row is not None else None
+
+    def invalidate(self, user_id=None):
+        """Forget one user (or everyone) here and in every other worker"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        self.generation.bump()
@@ -0,0 +1,211 @@
+"""
+On-demand sampling profiler for single requests.
+
+A request is profiled when it carries the trigger header and ``authorize()``
+accepts it (app.py allows admins only), or when it falls into the random
+``sample_rate`` fraction. While at least one profiled request is running, a
+per-worker sampler thread reads the request thread's stack from
+``sys._current_frames()`` every ``interval`` seconds. Requests that aren't
+profiled pay one header lookup and one random number.
+
+Each capture is written as JSON to ``directory`` with the request's method,
+route, status, duration and the sampled stacks. ``folded`` turns the stacks
+into the collapsed ``frame;frame;frame count`` lines that flamegraph.pl and
+speedscope read. The directory is a ring shared by the workers: after each
+write, the oldest captures past ``max_captures`` are deleted.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+_CAPTURE_ID = re.compile(r'^\d{20}-\d+-[0-9a-f]{8}$')
+
+
+class Capture:
+    """Stack samples for one request thread"""
+
+    def __init__(self, thread_id, trigger):
+        self.thread_id = thread_id
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.stacks = Counter()
+        self.samples = 0
+
+
+def _frame_label(frame):
+    # Module names keep flask.app apart from our app
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+class RequestProfiler:
+    """Per-worker sampler plus the on-disk capture ring"""
+
+    def __init__(self, directory, max_captures=50, sample_rate=0.0, interval=0.005, header='X-Profile',
+                 authorize=None, max_depth=128, logger=None):
+        self.directory = directory
+        self.max_captures = max_captures
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header
+        self.authorize = authorize
+        self.max_depth = max_depth
+        self.logger = logger
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        if self.logger is None:
+            self.logger = app.logger
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._discard)
+
+    def _trigger(self):
+        if request.headers.get(self.header) and (self.authorize is None or self.authorize()):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _start(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+        capture = Capture(threading.get_ident(), trigger)
+        g._profile_capture = capture
+        self._ensure_thread()
+        with self._lock:
+            self._active[capture.thread_id] = capture
+            self._wakeup.notify()
+
+    def _finish(self, response):
+        capture = g.pop('_profile_capture', None)
+        if capture is None:
+            return response
+        with self._lock:
+            self._active.pop(capture.thread_id, None)
+        duration_ms = (time.perf_counter() - capture.started) * 1000
+        try:
+            capture_id = self._write(capture, response.status_code, duration_ms)
+            response.headers['X-Profile-Id'] = capture_id
+        except OSError as e:
+            self.logger.warning(f"Failed to write profile for {request.path}: {e}")
+        return response
+
+    def _discard(self, exc=None):
+        # after_request doesn't run if the request never got a response
+        capture = g.pop('_profile_capture', None)
+        if capture is not None:
+            with self._lock:
+                self._active.pop(capture.thread_id, None)
+
+    def _ensure_thread(self):
+        # Started lazily so each gunicorn worker samples its own threads after fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._active = {}
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # Sampling under the lock means a capture is never touched after _finish removes it
+            with self._lock:
+                while not self._active:
+                    self._wakeup.wait()
+                frames = sys._current_frames()
+                for capture in self._active.values():
+                    frame = frames.get(capture.thread_id)
+                    stack = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    if stack:
+                        capture.stacks[';'.join(reversed(stack))] += 1
+                        capture.samples += 1
+                del frames
+            time.sleep(self.interval)
+
+    def _write(self, capture, status, duration_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        capture_id = f"{time.time_ns():020d}-{os.getpid()}-{os.urandom(4).hex()}"
+        document = {
+            'id': capture_id,
+            'method': request.method,
+            'path': request.path,
+            'route': request.url_rule.rule if request.url_rule else None,
+            'status': status,
+            'trigger': capture.trigger,
+            'started_at': capture.started_at.isoformat(),
+            'duration_ms': round(duration_ms, 2),
+            'interval_ms': self.interval * 1000,
+            'samples': capture.samples,
+            'stacks': dict(capture.stacks),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(document, f)
+        os.replace(tmp_path, os.path.join(self.directory, f"{capture_id}.json"))
+        self._trim()
+        return capture_id
+
+    def _capture_ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with a zero-padded timestamp, so name order is age order
+        return sorted(name[:-5] for name in names if name.endswith('.json') and _CAPTURE_ID.match(name[:-5]))
+
+    def _trim(self):
+        ids = self._capture_ids()
+        for capture_id in ids[:max(0, len(ids) - self.max_captures)]:
+            try:
+                os.remove(os.path.join(self.directory, f"{capture_id}.json"))
+            except FileNotFoundError:
+                # Another worker trimmed it first
+                pass
+
+    def captures(self):
+        """Metadata of the stored captures, newest first"""
+        listing = []
+        for capture_id in reversed(self._capture_ids()):
+            document = self.load(capture_id)
+            if document is not None:
+                document.pop('stacks', None)
+                listing.append(document)
+        return listing
+
+    def load(self, capture_id):
+        if not _CAPTURE_ID.match(capture_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{capture_id}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+def folded(document):
+    """Collapsed stack lines for flamegraph.pl / speedscope"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(document['stacks'].items()))
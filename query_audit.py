@@ -0,0 +1,172 @@
+"""
+N+1 detection and slow-query logging on top of SQLAlchemy's cursor events.
+
+Every statement a request runs is reduced to a fingerprint (literals and
+``IN (?, ?, ...)`` lists collapsed, whitespace normalised) and counted. When
+one fingerprint repeats ``threshold`` times within a request, the auditor
+notes the application line that issued it, which for a
+``for row in rows: User.query.get(...)`` loop is the line inside the loop.
+At the end of the request every such fingerprint is reported. In 'warn' mode
+it is logged; in 'raise' mode ``NPlusOneError`` is raised so the test that
+made the request fails.
+
+Statements slower than ``slow_ms`` are logged in every mode, together with
+the call site and their ``EXPLAIN QUERY PLAN``. Each fingerprint is
+explained once per process, so a hot slow query costs a single extra
+EXPLAIN.
+"""
+
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+_THIS_FILE = os.path.abspath(__file__)
+_ROOT = os.path.dirname(_THIS_FILE) + os.sep
+# Frames from these directories (the stdlib, Flask, SQLAlchemy, ...) are never the call site
+_LIBRARY_DIRS = tuple({os.path.abspath(sysconfig.get_paths()[name]) + os.sep for name in ('stdlib', 'purelib', 'platlib')})
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    """A request repeated the same statement at least ``threshold`` times"""
+
+
+def fingerprint(statement):
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(?...)', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+
+def call_site():
+    """``file:line in function`` of the innermost frame that isn't library code"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename != _THIS_FILE and not filename.startswith(_LIBRARY_DIRS) and not filename.startswith('<'):
+            shown = filename[len(_ROOT):] if filename.startswith(_ROOT) else filename
+            return f"{shown}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryAuditor:
+    """Per-request statement counts and the slow-query log for one app"""
+
+    MODES = ('off', 'warn', 'raise')
+
+    def __init__(self, mode=None, threshold=5, slow_ms=250.0, logger=None, max_plans=512):
+        # mode None picks per request: 'raise' under app.testing, 'warn' under app.debug, else 'off'
+        if mode is not None and mode not in self.MODES:
+            raise ValueError(f"Query audit mode must be one of {', '.join(self.MODES)}, not {mode!r}")
+        self.mode = mode
+        self.threshold = threshold
+        self.slow_ms = slow_ms
+        self.logger = logger
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        if self.logger is None:
+            self.logger = app.logger
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def instrument_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor)
+        event.listen(engine, 'handle_error', self._failed_cursor)
+
+    def current_mode(self):
+        if self.mode is not None:
+            return self.mode
+        if self._app is not None and self._app.testing:
+            return 'raise'
+        if self._app is not None and self._app.debug:
+            return 'warn'
+        return 'off'
+
+    def _start(self):
+        if self.current_mode() != 'off':
+            # fingerprint -> [count, call site once the count reaches the threshold]
+            g._query_audit = {}
+
+    def _finish(self, response):
+        seen = g.pop('_query_audit', None)
+        if not seen:
+            return response
+        repeated = [(statement, count, site) for statement, (count, site) in seen.items() if count >= self.threshold]
+        if not repeated:
+            return response
+        lines = [f"  {count}x at {site}: {statement[:200]}" for statement, count, site in repeated]
+        message = f"Possible N+1 in {request.method} {request.path}:\n" + '\n'.join(lines)
+        if self.current_mode() == 'raise':
+            raise NPlusOneError(message)
+        self.logger.warning(message)
+        return response
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_audit_started', []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['_query_audit_started'].pop()) * 1000
+        seen = g.get('_query_audit') if has_request_context() else None
+        key = None
+        if seen is not None:
+            key = fingerprint(statement)
+            entry = seen.setdefault(key, [0, None])
+            entry[0] += 1
+            if entry[0] == self.threshold:
+                entry[1] = call_site()
+        if self.slow_ms is not None and elapsed_ms >= self.slow_ms:
+            self._log_slow(conn, statement, parameters, executemany, elapsed_ms, key or fingerprint(statement))
+
+    def _failed_cursor(self, exception_context):
+        # A failed statement never reaches after_cursor_execute
+        if exception_context.connection is not None:
+            started = exception_context.connection.info.get('_query_audit_started')
+            if started:
+                started.pop()
+
+    def _log_slow(self, conn, statement, parameters, executemany, elapsed_ms, key):
+        where = f" ({request.method} {request.path})" if has_request_context() else ''
+        plan = None if executemany else self._plan(conn, statement, parameters, key)
+        message = f"Slow query {elapsed_ms:.0f} ms at {call_site()}{where}: {key[:500]}"
+        if plan:
+            message += '\n  plan: ' + '\n  plan: '.join(plan)
+        self.logger.warning(message)
+
+    def _plan(self, conn, statement, parameters, key):
+        with self._lock:
+            if key in self._plans:
+                return None
+            self._plans[key] = True
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        # A separate cursor, so the caller's pending result set is left alone
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            # SQLite rows are (id, parent, notused, detail); other databases give one text column
+            return [str(row[-1]) for row in cursor.fetchall()]
+        except Exception as e:
+            return [f"unavailable ({e})"]
+        finally:
+            cursor.close()
@@ -0,0 +1,203 @@
+"""
+Token-bucket rate limiting for public endpoints.
+
+Each (route, identity) pair owns a bucket holding up to ``capacity`` tokens
+that refills continuously at ``capacity / period`` tokens per second; a
+request spends one token or is answered with ``429`` and a ``Retry-After``
+of the time until the next token. Buckets store only (tokens, updated_at),
+so they cost nothing while idle and need no background refill.
+
+``MemoryBackend`` keeps buckets per worker process. ``SQLiteBackend`` shares
+them across gunicorn workers through a small WAL-mode SQLite file, spending
+one short write transaction per request.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_login import current_user
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_LIMIT = re.compile(r'^\s*(\d+)\s*/\s*(\d+)?\s*(second|minute|hour|day)s?\s*$')
+
+
+class Limit:
+    """``capacity`` requests per ``period`` seconds, allowing bursts up to ``capacity``"""
+
+    __slots__ = ('capacity', 'period', 'rate', 'by')
+
+    def __init__(self, capacity, period, by='ip'):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.by = by
+
+    def __repr__(self):
+        return f"Limit({self.capacity}/{self.period}s by {self.by})"
+
+
+def parse_limit(value, by='ip'):
+    """'30/minute', '5/10 minutes' or '1000/day' -> Limit; raises ValueError"""
+    match = _LIMIT.match(value or '')
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value!r} (expected e.g. '30/minute')")
+    count, multiple, unit = match.groups()
+    return Limit(int(count), int(multiple or 1) * _PERIODS[unit], by=by)
+
+
+def parse_limits(spec, defaults):
+    """Merge 'name=30/minute:user,other=5/minute' over ``defaults`` ({name: Limit})"""
+    limits = dict(defaults)
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, _, value = item.partition('=')
+        value, _, by = value.partition(':')
+        by = by.strip() or (limits[name.strip()].by if name.strip() in limits else 'ip')
+        if by not in ('ip', 'user'):
+            raise ValueError(f"Invalid rate limit identity for {name.strip()}: {by!r}")
+        limits[name.strip()] = parse_limit(value, by=by)
+    return limits
+
+
+def _refill(tokens, updated, now, limit):
+    return min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+
+def _spend(tokens, limit):
+    """(allowed, tokens left, seconds until a token is available)"""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / limit.rate
+
+
+class MemoryBackend:
+    """Buckets in this process only; the least recently used are evicted past ``max_keys``"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = limit.capacity if bucket is None else _refill(bucket[0], bucket[1], now, limit)
+            allowed, tokens, retry_after = _spend(tokens, limit)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens, retry_after
+
+
+class SQLiteBackend:
+    """Buckets shared by every worker on the host through one SQLite file"""
+
+    # Every PRUNE_EVERY takes, buckets idle for a day (long since full again) are deleted
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, limit, now=None):
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = limit.capacity if row is None else _refill(row[0], row[1], now, limit)
+            allowed, tokens, retry_after = _spend(tokens, limit)
+            conn.execute(
+                'INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens, now)
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 86400,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens, retry_after
+
+
+class RateLimiter:
+    """Route decorators enforcing named limits against a bucket backend"""
+
+    def __init__(self, backend, limits, enabled=True, proxy_hops=0, logger=None):
+        self.backend = backend
+        self.limits = limits
+        self.enabled = enabled
+        self.proxy_hops = proxy_hops
+        self.logger = logger
+
+    def client_ip(self):
+        # Behind N proxies the client is the Nth address from the right of X-Forwarded-For
+        if self.proxy_hops:
+            forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return forwarded[-self.proxy_hops]
+        return request.remote_addr or 'unknown'
+
+    def identity(self, limit):
+        if limit.by == 'user' and current_user.is_authenticated:
+            return f"user:{current_user.id}"
+        return f"ip:{self.client_ip()}"
+
+    def check(self, name):
+        """None if the request may proceed, otherwise the 429 response"""
+        limit = self.limits.get(name)
+        if not self.enabled or limit is None:
+            return None
+        try:
+            allowed, tokens, retry_after = self.backend.take(f"{name}:{self.identity(limit)}", limit)
+        except Exception as e:
+            # Fail open: a broken limiter must not take the site down with it
+            (self.logger or current_app.logger).warning(f"Rate limiter unavailable for {name}: {e}")
+            return None
+        if allowed:
+            return None
+        response = jsonify({'error': 'Too many requests, please slow down'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        response.headers['X-RateLimit-Limit'] = f"{limit.capacity};w={limit.period}"
+        return response
+
+    def limit(self, name, methods=None):
+        """Decorator applying the named limit, optionally only to some HTTP methods"""
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if methods is None or request.method in methods:
+                    limited = self.check(name)
+                    if limited is not None:
+                        return limited
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
@@ -0,0 +1,71 @@
+"""
+"Students also connected with" recommendations.
+
+A student interacts with a tutor by connecting or by completing a payment.
+Two tutors co-occur once for every student who interacted with both, and
+``tutor_cooccurrence`` stores that sparse matrix with one row per ordered
+pair. An index on (tutor_id, count, other_id) means a tutor's top-k
+neighbours are the first k entries of an index range scan.
+
+build_recommendations.py recomputes the whole matrix in a batch;
+``record_interaction`` keeps it current between batches by bumping only the
+pairs a new interaction creates.
+"""
+
+from collections import Counter
+from itertools import groupby, permutations
+
+from sqlalchemy import delete, insert, select, text, union
+
+# Cap on the tutors counted per student, so one prolific student can't add
+# a quadratic number of pairs
+MAX_TUTORS_PER_STUDENT = 100
+
+
+def interactions_select(Connection, Payment, student_id=None):
+    """Distinct (student_id, tutor_id) pairs from connections and completed payments"""
+    connections = select(Connection.student_id, Connection.tutor_id)
+    payments = select(Payment.student_id, Payment.tutor_id).where(Payment.status == 'completed')
+    if student_id is not None:
+        connections = connections.where(Connection.student_id == student_id)
+        payments = payments.where(Payment.student_id == student_id)
+    return union(connections, payments)
+
+
+def count_pairs(interactions):
+    """Co-occurrence counts per ordered tutor pair from (student_id, tutor_id) rows sorted by student"""
+    counts = Counter()
+    for _, rows in groupby(interactions, key=lambda row: row[0]):
+        tutors = sorted({row[1] for row in rows})[:MAX_TUTORS_PER_STUDENT]
+        counts.update(permutations(tutors, 2))
+    return counts
+
+
+def rebuild(db_session, Connection, Payment, TutorCooccurrence):
+    """Replace the whole matrix; the caller commits. Returns the number of pairs"""
+    interactions = interactions_select(Connection, Payment).subquery()
+    rows = db_session.execute(select(interactions).order_by(interactions.c[0]))
+    counts = count_pairs(rows)
+    db_session.execute(delete(TutorCooccurrence))
+    if counts:
+        db_session.execute(insert(TutorCooccurrence), [
+            {'tutor_id': tutor_id, 'other_id': other_id, 'count': count}
+            for (tutor_id, other_id), count in counts.items()
+        ])
+    return len(counts)
+
+
+def record_interaction(db_session, TutorCooccurrence, tutor_id, other_ids):
+    """Count a new student-tutor interaction against the student's earlier tutors; the caller commits"""
+    other_ids = [other_id for other_id in other_ids if other_id != tutor_id][:MAX_TUTORS_PER_STUDENT]
+    if not other_ids:
+        return
+    params = []
+    for other_id in other_ids:
+        params.append({'tutor_id': tutor_id, 'other_id': other_id})
+        params.append({'tutor_id': other_id, 'other_id': tutor_id})
+    db_session.execute(text(
+        f"INSERT INTO {TutorCooccurrence.__tablename__} (tutor_id, other_id, count) "
+        "VALUES (:tutor_id, :other_id, 1) "
+        "ON CONFLICT(tutor_id, other_id) DO UPDATE SET count = count + 1"
+    ), params)
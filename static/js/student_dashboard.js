@@ -26,6 +26,10 @@ function setupEventListeners() {
         }
     });
     
+    // Autocomplete for subject and location
+    setupSuggestions('searchSubject', 'subjectSuggestions', 'subject');
+    setupSuggestions('searchLocation', 'locationSuggestions', 'location');
+    
     // Chatbot input
     const chatbotInput = document.getElementById('chatbotInput');
     if (chatbotInput) {
@@ -37,12 +41,62 @@ function setupEventListeners() {
     }
 }
 
+// Fill a datalist from /api/suggest as the user types
+function setupSuggestions(inputId, listId, field) {
+    const input = document.getElementById(inputId);
+    const list = document.getElementById(listId);
+    if (!input || !list) return;
+    
+    let timer = null;
+    let lastPrefix = '';
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const prefix = input.value.trim();
+        if (!prefix || prefix === lastPrefix) return;
+        timer = setTimeout(() => {
+            lastPrefix = prefix;
+            fetch(`/api/suggest?field=${field}&prefix=${encodeURIComponent(prefix)}`)
+                .then(response => response.json())
+                .then(suggestions => {
+                    // Ignore answers for a prefix the user has already typed past
+                    if (prefix !== input.value.trim()) return;
+                    list.innerHTML = '';
+                    suggestions.forEach(value => {
+                        const option = document.createElement('option');
+                        option.value = value;
+                        list.appendChild(option);
+                    });
+                })
+                .catch(error => console.error('Error loading suggestions:', error));
+        }, 150);
+    });
+}
+
 // Load all tutors
+// Fetch the full listing, from the static directory export when one is configured
+function fetchAllTutors() {
+    const directoryUrl = document.body.dataset.directoryUrl;
+    const fromApi = () => fetch('/api/tutors').then(response => response.json());
+    if (!directoryUrl) {
+        return fromApi();
+    }
+    return fetch(`${directoryUrl}/all.json`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Directory export returned ${response.status}`);
+            }
+            return response.json();
+        })
+        .catch(error => {
+            console.warn('Directory export unavailable, using the API:', error);
+            return fromApi();
+        });
+}
+
 function loadAllTutors() {
     showLoading(true);
     
-    fetch('/api/tutors')
-        .then(response => response.json())
+    fetchAllTutors()
         .then(data => {
             allTutors = data;
             filteredTutors = data;
@@ -200,6 +254,9 @@ function showTutorModal(tutor) {
     const modal = document.getElementById('tutorModal');
     const content = document.getElementById('tutorModalContent');
     
+    // Record a profile view for popularity ranking
+    fetch(`/api/tutors/${tutor.id}`).catch(() => {});
+    
     const avatar = tutor.name.charAt(0).toUpperCase();
     const rating = tutor.rating || 0;
     const stars = generateStars(rating);
@@ -365,6 +422,9 @@ function sendChatbotMessage() {
     .then(response => response.json())
     .then(data => {
         addMessage(data.response, 'bot');
+        if (data.tutors && data.tutors.length) {
+            addTutorSuggestions(data.tutors);
+        }
     })
     .catch(error => {
         console.error('Error sending message:', error);
@@ -382,6 +442,31 @@ function addMessage(text, sender) {
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
 }
 
+// Tutors recommended by the chatbot; built with textContent since names are user-supplied
+function addTutorSuggestions(tutors) {
+    const messagesContainer = document.getElementById('chatbotMessages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message bot-message';
+    const content = document.createElement('div');
+    content.className = 'message-content';
+    
+    tutors.forEach(tutor => {
+        const link = document.createElement('a');
+        link.href = '#';
+        link.style.display = 'block';
+        link.textContent = `${tutor.name} - ${tutor.subject}, KES ${tutor.price_per_hour}/hr`;
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            showTutorModal(tutor);
+        });
+        content.appendChild(link);
+    });
+    
+    messageDiv.appendChild(content);
+    messagesContainer.appendChild(messageDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
 // Close modals when clicking outside
 window.onclick = function(event) {
     const tutorModal = document.getElementById('tutorModal');
@@ -0,0 +1,76 @@
+"""
+Prefix index behind the search-box autocomplete.
+
+Each field keeps its distinct values in one sorted array of lowercased keys.
+A lookup is two ``bisect`` calls to find the block of keys sharing the
+prefix, then a top-k by weight over that block, so answering never touches
+SQLite. Multi-word values are also indexed under each later word, so
+"kam" finds "John Kamau" and "nai" finds "Nairobi West".
+"""
+
+import heapq
+import re
+from bisect import bisect_left
+
+# Short prefixes can match thousands of keys; rank only the first block of them
+MAX_SCAN = 2000
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _words(value):
+    return _WORD.findall((value or '').lower())
+
+
+class PrefixIndex:
+    """Sorted (key, value, weight) entries for one field"""
+
+    def __init__(self, weighted_values):
+        weights = {}
+        for value, weight in weighted_values:
+            value = (value or '').strip()
+            if value:
+                weights[value] = weights.get(value, 0) + weight
+        entries = []
+        for value, weight in weights.items():
+            words = _words(value)
+            for i in range(len(words)):
+                entries.append((''.join(words[i:]), value, weight))
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, prefix, limit=10):
+        """Up to ``limit`` values with a word starting with ``prefix``, heaviest first"""
+        prefix = ''.join(_words(prefix))
+        if not prefix:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\uffff', lo, min(len(self.keys), lo + MAX_SCAN))
+        seen = set()
+        matches = []
+        for _, value, weight in self.entries[lo:hi]:
+            if value not in seen:
+                seen.add(value)
+                matches.append((weight, value))
+        top = heapq.nsmallest(limit, matches, key=lambda match: (-match[0], match[1]))
+        return [value for _, value in top]
+
+
+class SuggestIndex:
+    """Per-field prefix indexes, built once per directory generation"""
+
+    FIELDS = ('subject', 'location', 'name')
+
+    def __init__(self, subjects, locations, names):
+        self.fields = {
+            'subject': PrefixIndex(subjects),
+            'location': PrefixIndex(locations),
+            'name': PrefixIndex(names),
+        }
+
+    def lookup(self, field, prefix, limit=10):
+        return self.fields[field].lookup(prefix, limit)
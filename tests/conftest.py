@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the test suite.
+
+app.py reads its configuration and picks its database path when it is
+imported, so it is imported once per session from a scratch directory, with
+rate limiting and analytics off and a cheap password hash. Under
+``TESTING`` the query auditor raises on N+1 patterns, so every app-level
+test also checks its requests for them.
+"""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_ENV = {
+    'RATE_LIMIT_ENABLED': 'false',
+    'ANALYTICS_ENABLED': 'false',
+    'PASSWORD_HASH_WORKERS': '0',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'ADMIN_EMAILS': 'admin@test.local',
+}
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    os.environ.update(TEST_ENV)
+    try:
+        import app as app_module
+    finally:
+        os.chdir(previous)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    yield app_module
+    app_module.password_hasher.shutdown()
+
+
+@pytest.fixture
+def signup(app_module):
+    """Signs up a fresh user and returns a test client logged in as them"""
+
+    def signup(user_type='student', email=None, **fields):
+        client = app_module.app.test_client()
+        data = {
+            'name': 'Test User', 'email': email or f"user{next(_emails)}@test.local", 'password': 'password123',
+            'user_type': user_type, 'phone': '0712345678', 'county': 'Nairobi', 'sub_county': 'Westlands',
+            'constituency': 'Westlands', 'location': 'Parklands',
+        }
+        if user_type == 'tutor':
+            data.update(subject='Mathematics', price_per_hour=500, availability='Weekdays 6-9 PM', bio='')
+        data.update(fields)
+        response = client.post('/signup', json=data)
+        assert response.get_json()['success'], response.get_json()
+        return client
+
+    return signup
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from analytics import EventLog, funnel_report, normalize_subject, subject_demand_report
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    # A long interval and big batch keep the background flusher out of the way
+    log = EventLog(str(tmp_path / 'analytics.db'), batch_size=10000, flush_interval=3600)
+    yield log
+    log.flush()
+
+
+def test_flush_folds_events_into_hourly_aggregates(event_log):
+    event_log.emit('search', user_id=1, subject='  Mathematics ', query='algebra')
+    event_log.emit('connect', user_id=1, tutor_id=7, subject='mathematics')
+    event_log.emit('payment_created', user_id=1, tutor_id=7, payment_id=3, subject='Mathematics')
+    # The webhook knows no subject; it comes from the payment_created event
+    event_log.emit('payment_completed', user_id=1, tutor_id=7, payment_id=3)
+
+    assert event_log.flush() == 4
+    assert event_log.flush() == 0
+
+    [hour] = funnel_report(event_log.db_path)
+    assert (hour['searches'], hour['connects'], hour['payments_created'], hour['payments_completed']) == (1, 1, 1, 1)
+    [demand] = subject_demand_report(event_log.db_path)
+    assert demand['subject'] == 'mathematics'
+    assert demand['payments_completed'] == 1
+
+
+def test_repeated_flushes_add_up(event_log):
+    for _ in range(3):
+        event_log.emit('search', subject='Physics')
+        event_log.flush()
+    assert funnel_report(event_log.db_path)[0]['searches'] == 3
+    with sqlite3.connect(event_log.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 3
+
+
+def test_full_buffer_drops_the_oldest_events(tmp_path):
+    log = EventLog(str(tmp_path / 'analytics.db'), batch_size=10000, flush_interval=3600, max_buffer=3)
+    for user_id in range(5):
+        log.emit('search', user_id=user_id)
+    assert log.dropped == 2
+    log.flush()
+    with sqlite3.connect(log.db_path) as conn:
+        assert [row[0] for row in conn.execute("SELECT user_id FROM events ORDER BY id")] == [2, 3, 4]
+
+
+def test_unknown_events_are_rejected(event_log):
+    with pytest.raises(ValueError):
+        event_log.emit('page_view')
+
+
+def test_reports_without_a_log_file(tmp_path):
+    assert funnel_report(str(tmp_path / 'missing.db')) == []
+    assert subject_demand_report(str(tmp_path / 'missing.db')) == []
+    assert normalize_subject('') is None
@@ -0,0 +1,91 @@
+from availability import MINUTES_PER_DAY, MINUTES_PER_WEEK, IntervalTree, parse_availability, parse_moment, parse_window
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+
+
+def at(day, hour, minute=0):
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def daily(days, start_hour, end_hour):
+    return [(at(day, start_hour), at(day, end_hour)) for day in days]
+
+
+def test_leading_days():
+    assert parse_availability('Weekdays 6-9 PM, Weekends 10 AM-2 PM') == \
+        daily(range(5), 18, 21) + daily((SAT, SUN), 10, 14)
+    assert parse_availability('Mon-Fri 9am-5pm') == daily(range(5), 9, 17)
+    assert parse_availability('Mon, Wed & Fri 4-6pm') == daily((MON, WED, FRI), 16, 18)
+    assert parse_availability('Sat from 10am-2pm') == daily((SAT,), 10, 14)
+
+
+def test_trailing_days_attach_to_the_range_before_them():
+    assert parse_availability('2-4pm weekdays') == daily(range(5), 14, 16)
+    assert parse_availability('4-6pm Mon, Wed and Fri') == daily((MON, WED, FRI), 16, 18)
+    assert parse_availability('2-4pm weekdays, 10am-2pm weekends') == \
+        daily(range(5), 14, 16) + daily((SAT, SUN), 10, 14)
+
+
+def test_bare_days_are_whole_days():
+    assert parse_availability('Saturdays') == [(at(SAT, 0), at(SUN, 0))]
+    assert parse_availability('Weekdays 6-9 PM, Saturday') == daily(range(5), 18, 21) + [(at(SAT, 0), at(SUN, 0))]
+
+
+def test_range_without_days():
+    assert parse_availability('6-9 PM') == daily(range(7), 18, 21)
+    # Repeats the days of the previous range
+    assert parse_availability('Weekdays 6-9 PM, 10 PM-11 PM') == sorted(
+        daily(range(5), 18, 21) + daily(range(5), 22, 23))
+
+
+def test_clock_forms():
+    assert parse_availability('Mon 10-2 PM') == daily((MON,), 10, 14)
+    assert parse_availability('Tue 9:30am-11') == [(at(TUE, 9, 30), at(TUE, 11))]
+    assert parse_availability('Wed 18:00-20:00') == daily((WED,), 18, 20)
+    assert parse_availability('') == []
+
+
+def test_ranges_past_midnight_and_sunday_wrap():
+    assert parse_availability('10pm-2am Fri') == [(at(FRI, 22), at(SAT, 2))]
+    assert parse_availability('Sun 10pm-2am') == [(0, at(MON, 2)), (at(SUN, 22), MINUTES_PER_WEEK)]
+
+
+def test_overlaps_merge():
+    assert parse_availability('Mon 9-11am, Mon 10am-12pm') == daily((MON,), 9, 12)
+
+
+def test_parse_moment_and_window():
+    assert parse_moment('Monday 18:00') == at(MON, 18)
+    assert parse_moment('fri 6pm') == at(FRI, 18)
+    assert parse_moment('2026-10-21T09:15:00') == at(WED, 9, 15)
+    assert parse_moment('soon') is None
+    assert parse_window('Monday 18:00-20:00') == (at(MON, 18), at(MON, 20))
+    assert parse_window('2026-10-25T23:00:00/2026-10-26T01:00:00') == (at(SUN, 23), MINUTES_PER_WEEK + 60)
+    assert parse_window('whenever') is None
+
+
+def test_interval_tree_matches_a_linear_scan():
+    intervals = [(start, end, tutor_id) for tutor_id, text in enumerate([
+        'Weekdays 6-9 PM', '2-4pm weekdays', 'Saturdays', 'Daily 8 AM-8 PM', 'Sun 10pm-2am', '10pm-2am Fri',
+    ]) for start, end in parse_availability(text)]
+    tree = IntervalTree(intervals)
+    for point in range(0, MINUTES_PER_WEEK, 30):
+        assert sorted(tree.at(point)) == sorted(v for s, e, v in intervals if s <= point < e)
+    for start in range(0, MINUTES_PER_WEEK - 120, 90):
+        end = start + 120
+        assert sorted(tree.covering(start, end)) == sorted(v for s, e, v in intervals if s <= start and e >= end)
+    # Sunday 11pm to Monday 1am is only covered by the range that wraps the week
+    assert tree.covering(at(SUN, 23), MINUTES_PER_WEEK + 60) == {4}
+
+
+def test_search_available_at_respects_trailing_days(app_module, signup):
+    signup('tutor', name='Afternoon Tutor', subject='Chemistry', availability='2-4pm weekdays')
+    student = signup()
+
+    def found(moment):
+        response = student.get('/api/tutors/search', query_string={'subject': 'Chemistry', 'available_at': moment})
+        return 'Afternoon Tutor' in [row['name'] for row in response.get_json()]
+
+    assert found('Monday 15:00')
+    assert not found('Monday 10:00')
+    assert not found('Saturday 15:00')
@@ -0,0 +1,25 @@
+"""benchmarks/bench_booking_concurrency.py as a regression test: one winner per contested slot"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import bench_booking_concurrency as harness  # noqa: E402
+
+PROCESSES = 2
+THREADS = 4
+
+
+def test_simultaneous_bookings_from_several_processes(app_module):
+    tutor_id = harness.prepare(app_module, PROCESSES, THREADS, prefix='concurrency-')
+    slot = (datetime.utcnow() + timedelta(days=30)).replace(hour=10, minute=0, second=0, microsecond=0)
+    total = PROCESSES * THREADS
+
+    contested = harness.run_round(PROCESSES, THREADS, tutor_id, slot, staggered=False, prefix='concurrency-')
+    assert contested == {201: 1, 409: total - 1}
+
+    staggered = harness.run_round(PROCESSES, THREADS, tutor_id, slot + timedelta(days=1), staggered=True,
+                                  prefix='concurrency-')
+    assert staggered == {201: total}
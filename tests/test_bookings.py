@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bookings import CANCELLED, HELD, SCHEDULED, BookingError, confirm_slot, parse_slot, reserve_slot
+
+NOW = datetime(2026, 11, 2, 8, 0)
+SLOT = datetime(2026, 11, 2, 16, 0)
+
+
+def test_parse_slot():
+    assert parse_slot('2026-11-02T16:00', 1.5) == (SLOT, SLOT + timedelta(hours=1.5))
+    assert parse_slot('2026-11-02T16:00+03:00', '2') == (SLOT, SLOT + timedelta(hours=2))
+    for session_date, duration in (('tomorrow', 1), ('2026-11-02T16:00', 'long'), ('2026-11-02T16:00', 0),
+                                   ('2026-11-02T16:00', 9)):
+        with pytest.raises(BookingError):
+            parse_slot(session_date, duration)
+
+
+@pytest.fixture
+def book(app_module, signup):
+    """reserve_slot() for a fresh tutor, as of NOW unless told otherwise"""
+    signup('tutor', name='Booked Tutor')
+    Session, Tutor, db = app_module.Session, app_module.Tutor, app_module.db
+    with app_module.app.app_context():
+        tutor_id = db.session.execute(db.select(db.func.max(Tutor.id))).scalar()
+
+        def book(start, hours=1, hold_minutes=15, now=NOW):
+            session_id = reserve_slot(db.session, Session, tutor_id, 1, start, start + timedelta(hours=hours),
+                                      hold_minutes, now=now)
+            db.session.commit()
+            return session_id
+
+        yield book
+
+
+def test_overlapping_slots_conflict(book):
+    assert book(SLOT, hours=2)
+    assert book(SLOT + timedelta(hours=1)) is None
+    assert book(SLOT - timedelta(minutes=30)) is None
+    # Back-to-back sessions don't overlap
+    assert book(SLOT + timedelta(hours=2))
+    assert book(SLOT - timedelta(hours=1))
+
+
+def test_only_live_bookings_block_a_slot(app_module, book):
+    Session, db = app_module.Session, app_module.db
+    held = book(SLOT, hold_minutes=15)
+    # Once the hold lapses the slot is free again
+    assert book(SLOT, now=NOW + timedelta(minutes=10)) is None
+    taken = book(SLOT, now=NOW + timedelta(minutes=20))
+    assert taken
+
+    db.session.get(Session, taken).status = CANCELLED
+    db.session.commit()
+    assert book(SLOT, now=NOW + timedelta(minutes=20))
+    assert db.session.get(Session, held).status == HELD
+
+
+def test_late_payment_cannot_confirm_a_retaken_slot(app_module, book):
+    Session, db = app_module.Session, app_module.db
+    late = db.session.get(Session, book(SLOT, hold_minutes=15))
+    later = NOW + timedelta(minutes=30)
+    other = db.session.get(Session, book(SLOT, now=later))
+
+    assert not confirm_slot(db.session, Session, late, now=later)
+    assert confirm_slot(db.session, Session, other, now=later)
+    db.session.commit()
+    assert (late.status, other.status) == (HELD, SCHEDULED)
+
+
+def test_booking_endpoint(app_module, signup):
+    signup('tutor', name='Endpoint Tutor', subject='Booking Endpoint Studies')
+    student = signup()
+    [tutor] = student.get('/api/tutors/search', query_string={'subject': 'Booking Endpoint Studies'}).get_json()
+    slot = {'tutor_id': tutor['id'], 'session_date': '2027-01-04T10:00', 'duration_hours': 1}
+
+    first = student.post('/api/bookings', json=slot)
+    assert first.status_code == 201 and first.get_json()['status'] == HELD
+    assert signup().post('/api/bookings', json=slot).status_code == 409
+    assert student.post('/api/bookings', json=dict(slot, duration_hours=12)).status_code == 400
+    assert student.post('/api/bookings', json=dict(slot, tutor_id=10 ** 6)).status_code == 404
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from calendar_feed import escape_text, fold, render_event, session_end, stream_calendar
+
+
+def test_escape_text():
+    assert escape_text('Maths; algebra, calculus\nBring a book\\pen') == \
+        'Maths\\; algebra\\, calculus\\nBring a book\\\\pen'
+    assert escape_text(None) == ''
+
+
+def test_fold_keeps_lines_within_75_octets():
+    assert fold('SUMMARY:short') == 'SUMMARY:short\r\n'
+    line = 'DESCRIPTION:' + 'Kiswahili na hisabati — ' * 10
+    folded = fold(line)
+    parts = folded[:-2].split('\r\n ')
+    assert all(len(part.encode('utf-8')) <= 75 for part in parts)
+    assert ''.join(parts) == line
+
+
+def test_render_event_and_stream():
+    start = datetime(2026, 11, 2, 16, 0)
+    event = render_event('session-1@edubridge', start, start + timedelta(hours=2), 'Physics, Form 3',
+                         datetime(2026, 10, 19, 9, 30))
+    assert 'DTSTART;TZID=Africa/Nairobi:20261102T160000\r\n' in event
+    assert 'DTEND;TZID=Africa/Nairobi:20261102T180000\r\n' in event
+    assert 'DTSTAMP:20261019T093000Z\r\n' in event
+    assert 'SUMMARY:Physics\\, Form 3\r\n' in event
+    assert 'DESCRIPTION' not in event
+
+    chunks = list(stream_calendar('Sessions', [
+        {'uid': 'a', 'start': start, 'end': start, 'summary': 's', 'stamp': start},
+    ]))
+    assert chunks[0].startswith('BEGIN:VCALENDAR\r\n') and 'BEGIN:VTIMEZONE' in chunks[0]
+    assert chunks[1].startswith('BEGIN:VEVENT') and chunks[-1] == 'END:VCALENDAR\r\n'
+
+
+def test_session_end_falls_back_to_the_duration():
+    start = datetime(2026, 11, 2, 16, 0)
+    assert session_end(start, None, 1.5) == start + timedelta(hours=1.5)
+    assert session_end(start, None, None) == start + timedelta(hours=1)
+    assert session_end(start, start + timedelta(hours=3), 1) == start + timedelta(hours=3)
+
+
+def test_feed_lists_scheduled_sessions_and_revalidates(app_module, signup):
+    signup('tutor', name='Calendar Tutor', subject='Calendar Studies')
+    student = signup(name='Calendar Student')
+    [tutor] = student.get('/api/tutors/search', query_string={'subject': 'Calendar Studies'}).get_json()
+    session_date = (datetime.utcnow() + timedelta(days=3)).replace(hour=16, minute=0, second=0, microsecond=0)
+    booking_id = student.post('/api/bookings', json={
+        'tutor_id': tutor['id'], 'session_date': session_date.isoformat(), 'duration_hours': 2,
+    }).get_json()['booking_id']
+
+    url = student.get('/api/sessions/calendar').get_json()['url']
+    path = url[url.index('/calendar/'):]
+    feed = app_module.app.test_client().get(path)
+    assert feed.mimetype == 'text/calendar'
+    # A held slot isn't on the calendar until it is paid for
+    assert b'BEGIN:VEVENT' not in feed.data
+    assert app_module.app.test_client().get(path, headers={'If-None-Match': feed.headers['ETag']}).status_code == 304
+
+    with app_module.app.app_context():
+        app_module.db.session.get(app_module.Session, booking_id).status = 'scheduled'
+        app_module.db.session.commit()
+    feed = app_module.app.test_client().get(path, headers={'If-None-Match': feed.headers['ETag']})
+    assert feed.status_code == 200
+    body = feed.get_data(as_text=True)
+    assert f"UID:session-{booking_id}@edubridge" in body
+    assert 'SUMMARY:Calendar Studies session with Calendar Tutor' in body
+    assert f"DTSTART;TZID=Africa/Nairobi:{session_date:%Y%m%dT%H%M%S}" in body
+
+    assert app_module.app.test_client().get('/calendar/forged.ics').status_code == 404
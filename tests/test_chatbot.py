@@ -0,0 +1,54 @@
+from chatbot import FALLBACK, TOP_TUTORS, ChatIndex, tokenize
+
+
+def row(tutor_id, subject, county, price=500.0):
+    return (tutor_id, f'Tutor {tutor_id}', subject, price, 'Weekdays', '0712345678', county, '', 4.5, 10, county)
+
+
+INDEX = ChatIndex([
+    row(1, 'Mathematics', 'Nairobi', 800), row(2, 'Mathematics', 'Mombasa', 600), row(3, 'Chemistry', 'Nairobi'),
+    row(4, 'Physics', 'Kisumu'), row(5, 'Pottery', 'Nairobi'),
+    *[row(10 + n, 'English', 'Nakuru') for n in range(5)],
+])
+
+
+def test_tokenize_keeps_inner_apostrophes_and_hyphens():
+    assert tokenize("Murang'a m-pesa, HELLO!") == ["murang'a", 'm-pesa', 'hello']
+
+
+def test_classify_takes_the_longest_keyword():
+    intents, subjects, county = INDEX.classify('I need history and government help in Nairobi')
+    assert [intent.name for intent in intents] == ['help']
+    assert (subjects, county) == (['History'], 'Nairobi')
+    assert INDEX.classify('computer science or calculus')[1] == ['Computer Science', 'Mathematics']
+    assert INDEX.classify('sciences')[1] == ['Physics', 'Chemistry', 'Biology']
+
+
+def test_subject_replies_name_real_tutors():
+    text, intent, tutors = INDEX.reply('maths tutor in Mombasa, how much?')
+    assert intent == 'subject'
+    assert [tutor[0] for tutor in tutors] == [2]
+    assert 'KES 600 per hour' in text
+
+    text, _, tutors = INDEX.reply('hisabati prices')
+    assert [tutor[0] for tutor in tutors] == [1, 2]
+    assert 'KES 600 to KES 800' in text
+    assert len(INDEX.reply('english')[2]) == TOP_TUTORS
+    # Subjects missing from the tables become keywords once a tutor lists them
+    assert [tutor[0] for tutor in INDEX.reply('pottery classes')[2]] == [5]
+    assert INDEX.reply('biology in Kisumu')[0].startswith("We don't have Biology tutors in Kisumu")
+
+
+def test_intents_without_a_subject():
+    assert INDEX.reply('Anyone in Kisumu?') == ('Which subject do you need help with in Kisumu?', 'location', [])
+    text, intent, _ = INDEX.reply('hello, how do I pay with mpesa?')
+    assert intent == 'payment' and 'M-Pesa' in text
+    assert INDEX.reply('hello')[1] == 'greeting'
+    assert INDEX.reply('qwerty') == (FALLBACK, 'fallback', [])
+
+
+def test_chatbot_endpoint(app_module, signup):
+    signup('tutor', name='Chatty Tutor', subject='Origami', county='Turkana')
+    response = signup().post('/api/chatbot', json={'message': 'origami in turkana'}).get_json()
+    assert response['intent'] == 'subject'
+    assert [tutor['name'] for tutor in response['tutors']] == ['Chatty Tutor']
@@ -0,0 +1,40 @@
+def tutor_ids(client, subject):
+    rows = client.get('/api/tutors/search', query_string={'subject': subject}).get_json()
+    return sorted(row['id'] for row in rows)
+
+
+def test_repeated_connects_are_a_no_op(app_module, signup):
+    signup('tutor', name='Connected Tutor', subject='Connection Studies')
+    student = signup()
+    [tutor_id] = tutor_ids(student, 'Connection Studies')
+
+    assert student.post('/api/connect', json={'tutor_id': tutor_id}).get_json() == {'success': True}
+    again = student.post('/api/connect', json={'tutor_id': tutor_id})
+    assert again.status_code == 400 and again.get_json()['error'] == 'Connection already exists'
+    assert student.post('/api/connect', json={}).status_code == 400
+
+    with app_module.app.app_context():
+        Connection = app_module.Connection
+        assert app_module.db.session.query(Connection).filter_by(tutor_id=tutor_id).count() == 1
+
+
+def test_bulk_connect_reports_each_tutor(app_module, signup):
+    for n in range(3):
+        signup('tutor', name=f'Bulk Tutor {n}', subject='Bulk Connection Studies')
+    student = signup()
+    first, second, third = tutor_ids(student, 'Bulk Connection Studies')
+    student.post('/api/connect', json={'tutor_id': first})
+
+    response = student.post('/api/connect/bulk', json={'tutor_ids': [first, second, second, third, 10 ** 6]})
+    assert response.get_json() == {
+        'success': True, 'connected': [second, third], 'already_connected': [first], 'unknown': [10 ** 6],
+    }
+    listed = student.get('/api/connections', query_string={'limit': 2}).get_json()
+    assert [row['tutor']['id'] for row in listed['connections']] == [third, second]
+    rest = student.get('/api/connections', query_string={'cursor': listed['next_cursor']}).get_json()
+    assert [row['tutor']['id'] for row in rest['connections']] == [first]
+
+    assert student.post('/api/connect/bulk', json={'tutor_ids': []}).status_code == 400
+    assert student.post('/api/connect/bulk', json={'tutor_ids': ['x']}).status_code == 400
+    assert student.post('/api/connect/bulk', json={'tutor_ids': list(range(1, 52))}).status_code == 400
+    assert signup('tutor').post('/api/connect/bulk', json={'tutor_ids': [first]}).status_code == 403
@@ -0,0 +1,79 @@
+import pytest
+
+from counters import CounterBuffer
+
+
+class Sink:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, rows):
+        if self.fail:
+            raise RuntimeError('database is locked')
+        self.batches.append(sorted(rows, key=lambda row: row['key']))
+
+
+def make_buffer(sink, max_pending=100):
+    return CounterBuffer(sink, fields=('views', 'clicks'), flush_interval=3600, max_pending=max_pending)
+
+
+def test_increments_coalesce_per_key():
+    sink = Sink()
+    counters = make_buffer(sink)
+    counters.increment(1, 'views')
+    counters.increment(1, 'views')
+    counters.increment_many([1, 2], 'clicks', 3)
+
+    assert counters.flush() == 4
+    assert sink.batches == [[{'key': 1, 'views': 2, 'clicks': 3}, {'key': 2, 'views': 0, 'clicks': 3}]]
+    assert counters.flush() == 0
+    assert counters.stats()['flushed_increments'] == 4
+
+
+def test_failed_flush_keeps_increments_for_the_next_one():
+    sink = Sink()
+    counters = make_buffer(sink)
+    counters.increment(1, 'views')
+    sink.fail = True
+    assert counters.flush() == 0
+    counters.increment(1, 'views')
+
+    sink.fail = False
+    assert counters.flush() == 2
+    assert sink.batches == [[{'key': 1, 'views': 2, 'clicks': 0}]]
+    assert counters.stats()['failed_flushes'] == 1
+
+
+def test_failed_flush_drops_what_no_longer_fits():
+    sink = Sink()
+    counters = make_buffer(sink, max_pending=3)
+    counters.increment_many([1, 2], 'views')
+    sink.fail = True
+    counters.flush()
+    assert counters.stats()['pending_increments'] == 2
+    # Four pending increments no longer fit under max_pending, so a second failure drops them
+    counters.increment_many([3, 4], 'views')
+    counters.flush()
+
+    stats = counters.stats()
+    assert (stats['dropped_increments'], stats['pending_increments']) == (4, 0)
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        make_buffer(Sink()).increment(1, 'likes')
+
+
+def test_app_buffers_reach_tutor_stats(app_module, signup):
+    signup('tutor', name='Counted Tutor')
+    student = signup()
+    tutor_id = next(row['id'] for row in student.get('/api/tutors').get_json() if row['name'] == 'Counted Tutor')
+    student.get(f'/api/tutors/{tutor_id}')
+    student.get(f'/api/tutors/{tutor_id}')
+
+    app_module.tutor_stats_buffer.flush()
+    app_module.directory_view_buffer.flush()
+    with app_module.app.app_context():
+        stats = app_module.db.session.get(app_module.TutorStats, tutor_id)
+        assert (stats.profile_views, stats.search_impressions) == (2, 1)
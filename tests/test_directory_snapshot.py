@@ -0,0 +1,51 @@
+import gzip
+import json
+
+from directory_snapshot import DirectoryGeneration, DirectorySnapshot, GenerationCache
+
+
+def test_generation_cache_rebuilds_only_after_a_bump(tmp_path):
+    generation = DirectoryGeneration(str(tmp_path / 'version'))
+    assert generation.current() == '0'
+    builds = []
+    cache = GenerationCache(lambda: builds.append(1) or len(builds), generation)
+
+    assert cache.get() == 1
+    assert cache.get() == 1
+    generation.bump()
+    assert cache.get() == 2
+    # Another worker's bump is seen through the shared file
+    DirectoryGeneration(generation.path).bump()
+    assert cache.get() == 3
+
+
+def test_snapshot_holds_plain_and_gzip_bodies(tmp_path):
+    tutors = [{'id': 1, 'name': 'Otieno'}, {'id': 2, 'name': 'Njeri'}]
+    snapshot = DirectorySnapshot(lambda: tutors, DirectoryGeneration(str(tmp_path / 'version'))).get()
+    assert json.loads(snapshot.body) == tutors
+    assert gzip.decompress(snapshot.gzip_body) == snapshot.body
+    assert snapshot.tutor_ids == [1, 2]
+
+
+def test_directory_revalidates_until_tutors_change(app_module, signup):
+    tutor = signup('tutor', name='Snapshot Tutor')
+    student = signup()
+
+    first = student.get('/api/tutors')
+    etag = first.headers['ETag']
+    assert first.headers['Vary'] == 'Accept-Encoding'
+    assert student.get('/api/tutors', headers={'If-None-Match': etag}).status_code == 304
+
+    zipped = student.get('/api/tutors', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(zipped.data)) == first.get_json()
+    # Either variant's validator matches
+    assert student.get('/api/tutors', headers={'If-None-Match': zipped.headers['ETag']}).status_code == 304
+
+    tutor.post('/api/tutor/profile', json={
+        'subject': 'Snapshot Chemistry', 'price_per_hour': 650, 'availability': 'Weekends',
+        'whatsapp_number': '0712345678', 'location': 'Parklands', 'bio': '',
+    })
+    changed = student.get('/api/tutors', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert 'Snapshot Chemistry' in [row['subject'] for row in changed.get_json()]
@@ -0,0 +1,49 @@
+import json
+import os
+
+import export_directory
+
+
+def read(out_dir, rel_path):
+    with open(os.path.join(out_dir, rel_path)) as f:
+        return json.load(f)
+
+
+def test_county_shards_use_the_normalized_county(app_module, signup, tmp_path):
+    signup('tutor', name='Kisumu Lower', county='kisumu', subject='Export Physics')
+    signup('tutor', name='Kisumu Padded', county='  KISUMU ', subject='Export Physics')
+    signup('tutor', name='Nairobi City Tutor', county='Nairobi City', subject='Export Physics')
+
+    export_directory.export(str(tmp_path), app_module)
+
+    names = [tutor['name'] for tutor in read(tmp_path, 'county/kisumu.json')]
+    assert 'Kisumu Lower' in names and 'Kisumu Padded' in names
+    assert 'Nairobi City Tutor' in [tutor['name'] for tutor in read(tmp_path, 'county/nairobi.json')]
+    assert not (tmp_path / 'county' / 'nairobi-city.json').exists()
+    assert sorted(os.listdir(tmp_path / 'county')) == sorted(f"{key}.json" for key in read(tmp_path, 'manifest.json')['counties'])
+    assert read(tmp_path, 'manifest.json')['counties']['kisumu']['name'] == 'Kisumu'
+
+
+def test_reexport_only_touches_changed_shards(app_module, signup, tmp_path):
+    client = signup('tutor', name='Export Mover', county='Kilifi', subject='Export Geography')
+    export_directory.export(str(tmp_path), app_module)
+    version = read(tmp_path, 'manifest.json')['version']
+
+    written, unchanged, removed = export_directory.export(str(tmp_path), app_module)
+    assert (written, removed) == (0, 0)
+    assert read(tmp_path, 'manifest.json')['version'] == version
+
+    client.post('/api/tutor/profile', json={
+        'subject': 'Export History', 'price_per_hour': 500, 'availability': 'Weekdays 6-9 PM',
+        'whatsapp_number': '0712345678', 'location': 'Parklands', 'bio': '', 'county': 'Kilifi',
+    })
+    written, unchanged, removed = export_directory.export(str(tmp_path), app_module)
+    # all.json, the Kilifi shard and the new subject; the old subject shard goes away
+    assert (written, removed) == (3, 1)
+    assert not (tmp_path / 'subject' / 'export-geography.json').exists()
+    assert [t['name'] for t in read(tmp_path, 'subject/export-history.json')] == ['Export Mover']
+
+
+def test_dashboard_points_at_the_export(app_module, signup, monkeypatch):
+    monkeypatch.setattr(app_module, 'DIRECTORY_URL', 'https://cdn.test/directory')
+    assert b'data-directory-url="https://cdn.test/directory"' in signup().get('/dashboard').data
@@ -0,0 +1,59 @@
+from fuzzy import FuzzyIndex, TrigramIndex, trigrams, words
+
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams('cat') == {'  c', ' ca', 'cat', 'at '}
+    assert words("Murang'a  South") == ['murang', 'a', 'south']
+
+
+def test_misspellings_find_the_closest_values():
+    index = TrigramIndex([('Mathematics', 1), ('Chemistry', 2), ('Physics', 3), ('Mathematics', 4)])
+    [(value, score)] = index.similar('mathematcs')
+    assert value == 'Mathematics' and 0.3 <= score < 1
+    assert index.similar('chemestry')[0][0] == 'Chemistry'
+    assert index.similar('geography') == []
+    assert index.tutor_ids(['Mathematics']) == {1, 4}
+    assert len(index) == 3
+
+
+def test_every_query_word_counts():
+    index = TrigramIndex([('John Kamau', 1), ('Jane Kamau', 2), ('John Otieno', 3)])
+    assert index.similar('kamua')[0][0] in ('John Kamau', 'Jane Kamau')
+    assert index.similar('john kamua')[0][0] == 'John Kamau'
+    assert index.similar('kamua', limit=1) == index.similar('kamua')[:1]
+
+
+def test_contains_matches_substrings():
+    index = TrigramIndex([('Applied Mathematics', 1), ('Mathematics', 2), ('Music', 3), ('Art', 4)])
+    assert index.contains('MATH') == ['Applied Mathematics', 'Mathematics']
+    assert index.contains('applied math') == ['Applied Mathematics']
+    assert index.contains('ar') == ['Art']
+    assert index.contains('zzz') == []
+    assert index.contains('') == []
+
+
+def test_best_scores_take_the_best_field_per_tutor():
+    index = FuzzyIndex(
+        subjects=[('Chemistry', 1), ('Biology', 2)],
+        names=[('Chemi Wanjiru', 2)],
+        locations=[('Nairobi', 1)],
+    )
+    scores = index.best_scores('chemistry')
+    assert scores[1] == 1.0
+    assert 0 < scores[2] < 1
+    assert index.best_scores('nairobi') == {1: 1.0}
+
+
+def test_typos_in_search_filters_and_queries(app_module, signup):
+    signup('tutor', name='Fuzzy Harpist', subject='Harpsichord Performance', location='Lodwar')
+    signup('tutor', name='Fuzzy Bystander', subject='Harpsichord Performance', bio='Baroque keyboards')
+    student = signup()
+
+    def search(**args):
+        return student.get('/api/tutors/search', query_string=args).get_json()
+
+    assert {row['name'] for row in search(subject='harpsicord performence')} == {'Fuzzy Harpist', 'Fuzzy Bystander'}
+    # Without embeddings the query ranks by trigram similarity; tutors without a hit stay, after the rest
+    rows = search(subject='Harpsichord Performance', query='harpist')
+    assert [row['name'] for row in rows] == ['Fuzzy Harpist', 'Fuzzy Bystander']
+    assert rows[0]['match_score'] > 0 and rows[1]['match_score'] == 0
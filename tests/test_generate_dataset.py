@@ -0,0 +1,45 @@
+import sqlite3
+
+from generate_dataset import generate
+
+TABLES = ('user', 'tutor', 'tutor_availability', 'connection', 'payment', 'session')
+
+
+def build(path, seed=42):
+    return generate(str(path), tutors=20, students=50, payments=300, seed=seed, batch_size=64, progress=lambda _: None)
+
+
+def dump(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return {table: conn.execute(f'SELECT * FROM "{table}" ORDER BY 1').fetchall() for table in TABLES}
+    finally:
+        conn.close()
+
+
+def test_same_seed_same_rows(app_module, tmp_path):
+    counts = build(tmp_path / 'a.db')
+    build(tmp_path / 'b.db')
+    build(tmp_path / 'c.db', seed=7)
+
+    assert (counts['user'], counts['tutor'], counts['payment']) == (70, 20, 300)
+    assert counts['session'] > 0 and counts['tutor_availability'] > 0
+    assert dump(tmp_path / 'a.db') == dump(tmp_path / 'b.db')
+    assert dump(tmp_path / 'a.db')['payment'] != dump(tmp_path / 'c.db')['payment']
+
+
+def test_generated_rows_are_consistent(app_module, tmp_path):
+    build(tmp_path / 'a.db')
+    conn = sqlite3.connect(str(tmp_path / 'a.db'))
+    try:
+        # Indexes dropped for the load are back
+        assert conn.execute("SELECT count(*) FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL").fetchone()[0]
+        assert conn.execute("SELECT count(*) FROM session JOIN payment ON payment.id = session.payment_id "
+                            "WHERE payment.status != 'completed'").fetchone()[0] == 0
+        assert conn.execute("SELECT count(*) FROM connection GROUP BY student_id, tutor_id HAVING count(*) > 1").fetchall() == []
+        assert conn.execute("SELECT count(*) FROM tutor JOIN user ON user.id = tutor.user_id "
+                            "WHERE user.user_type != 'tutor'").fetchone()[0] == 0
+        assert conn.execute("SELECT sum(total_sessions) FROM tutor").fetchone()[0] == conn.execute(
+            "SELECT count(*) FROM session WHERE status = 'completed'").fetchone()[0]
+    finally:
+        conn.close()
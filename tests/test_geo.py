@@ -0,0 +1,66 @@
+import pytest
+
+import geo
+from geo import PlaceIndex, TutorPlaces, load_place_index
+
+PLACES = [
+    ('county', 'Nairobi', 'Nairobi', -1.2864, 36.8172),
+    ('county', 'Kiambu', 'Kiambu', -1.1714, 36.8356),
+    ('county', 'Mombasa', 'Mombasa', -4.0435, 39.6682),
+    ('constituency', 'Westlands', 'Nairobi', -1.2676, 36.8108),
+    ('constituency', 'Kiambu', 'Kiambu', -1.1700, 36.8300),
+]
+
+
+@pytest.fixture(params=['numpy', 'lists'])
+def place_index(request, monkeypatch):
+    if request.param == 'lists':
+        monkeypatch.setattr(geo, 'np', None)
+    elif geo.np is None:
+        pytest.skip('NumPy is not installed')
+    return PlaceIndex(PLACES)
+
+
+def test_resolve_prefers_counties_for_bare_names(place_index):
+    assert place_index.resolve('kiambu') == 1
+    assert place_index.resolve('Kiambu', county='Kiambu') == 4
+    assert place_index.resolve('westlands') == 3
+    assert place_index.resolve('Atlantis') is None
+    assert place_index.tutor_place('Nairobi', 'Westlands') == 3
+    assert place_index.tutor_place('Mombasa', 'Nyali') == 2
+    assert place_index.tutor_place('Atlantis', None) == geo.UNKNOWN
+
+
+def test_nearest_orders_by_distance_and_skips_unknown_places(place_index):
+    places = TutorPlaces(place_index, [
+        (10, 'Mombasa', None), (11, 'Nairobi', 'Westlands'), (12, 'Kiambu', None), (13, 'Atlantis', None),
+    ])
+    nearest = places.nearest(place_index.resolve('Nairobi'), 10)
+    assert [tutor_id for tutor_id, _ in nearest] == [11, 12, 10]
+    assert nearest[0][1] == pytest.approx(2.2, abs=0.2)
+    assert nearest[2][1] == pytest.approx(440, abs=10)
+
+    assert [tutor_id for tutor_id, _ in places.nearest(0, 2)] == [11, 12]
+    assert [tutor_id for tutor_id, _ in places.nearest(0, 10, candidate_ids={10, 13})] == [10]
+    assert places.nearest(0, 10, candidate_ids=set()) == []
+
+
+def test_bundled_places_load():
+    index = load_place_index()
+    assert index is load_place_index()
+    assert index.resolve('Nairobi') is not None and index.resolve('Mombasa') is not None
+
+
+def test_search_near_ranks_by_distance(app_module, signup):
+    for county in ('Mombasa', 'Kiambu', 'Nyeri'):
+        signup('tutor', name=f'{county} Geo Tutor', county=county, sub_county='', constituency='',
+               subject='Geo Surveying')
+    student = signup()
+
+    response = student.get('/api/tutors/search', query_string={'subject': 'Geo Surveying', 'near': 'Nairobi'})
+    rows = response.get_json()
+    assert [row['name'] for row in rows] == ['Kiambu Geo Tutor', 'Nyeri Geo Tutor', 'Mombasa Geo Tutor']
+    assert rows[0]['distance_km'] < rows[1]['distance_km'] < rows[2]['distance_km']
+
+    response = student.get('/api/tutors/search', query_string={'near': 'Atlantis'})
+    assert response.status_code == 400
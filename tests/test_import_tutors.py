@@ -0,0 +1,79 @@
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from import_tutors import load_checkpoint, read_records, save_checkpoint, validate, write_batch
+
+RECORD = {
+    'name': 'Imported Tutor', 'email': 'Imported@School.test', 'password': 'secret123', 'phone': '0712345678',
+    'county': 'nairobi city', 'sub_county': 'westlands', 'constituency': 'westlands', 'location': 'parklands',
+    'subject': 'Import Studies', 'price_per_hour': '1,200', 'availability': '2-4pm weekdays',
+}
+
+
+def test_read_records_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / 'tutors.csv'
+    csv_path.write_text('\ufeffName,E-mail,Price Per Hour\nAmina,a@x.test,500\n', encoding='utf-8')
+    assert list(read_records(str(csv_path))) == [(1, {'name': 'Amina', 'e_mail': 'a@x.test', 'price_per_hour': '500'})]
+
+    jsonl_path = tmp_path / 'tutors.jsonl'
+    jsonl_path.write_text('{"Name": "Amina"}\n\nnot json\n[1, 2]\n', encoding='utf-8')
+    assert list(read_records(str(jsonl_path))) == [(1, {'name': 'Amina'}), (2, None), (3, None)]
+
+
+def test_validate():
+    seen = {'taken@school.test'}
+    row, reason = validate(RECORD, seen)
+    assert reason is None
+    assert (row['email'], row['price_per_hour'], row['bio']) == ('imported@school.test', 1200.0, '')
+    assert validate(RECORD, seen) == (None, 'email already registered')
+    assert validate(dict(RECORD, email='taken@school.test'), seen) == (None, 'email already registered')
+    assert validate(dict(RECORD, email='nobody'), seen) == (None, 'invalid email')
+    assert validate(dict(RECORD, price_per_hour='free'), seen) == (None, 'invalid price_per_hour')
+    assert validate(dict(RECORD, price_per_hour='0'), seen) == (None, 'invalid price_per_hour')
+    assert validate(dict(RECORD, subject=' ', phone=None), seen) == (None, 'missing phone, subject')
+    assert validate(None, seen) == (None, 'unreadable record')
+
+
+def test_checkpoints_belong_to_one_source(tmp_path):
+    path = str(tmp_path / 'tutors.csv.checkpoint')
+    assert load_checkpoint(path, 'tutors.csv') == 0
+    save_checkpoint(path, 'tutors.csv', 1500)
+    assert load_checkpoint(path, 'tutors.csv') == 1500
+    with pytest.raises(SystemExit):
+        load_checkpoint(path, 'other.csv')
+
+
+def test_write_batch_matches_signup(app_module, signup):
+    row, _ = validate(RECORD, set())
+    password = row.pop('password')
+    with app_module.app.app_context():
+        write_batch(app_module, [row], [generate_password_hash(password, method='pbkdf2:sha256:1000')])
+        app_module.db.session.commit()
+    app_module.directory_generation.bump()
+
+    client = app_module.app.test_client()
+    assert client.post('/login', json={'email': 'imported@school.test', 'password': 'secret123'}).get_json()['success']
+    [tutor] = client.get('/api/tutors/search', query_string={
+        'subject': 'Import Studies', 'county': 'Nairobi', 'available_at': 'Tuesday 15:00',
+    }).get_json()
+    assert (tutor['name'], tutor['whatsapp_number']) == ('Imported Tutor', '0712345678')
+
+
+def test_tutor_signup_is_all_or_nothing(app_module, signup):
+    client = app_module.app.test_client()
+    response = client.post('/signup', json={
+        'name': 'Half Tutor', 'email': 'half@test.local', 'password': 'password123', 'user_type': 'tutor',
+        'phone': '0712345678', 'county': 'Nairobi', 'sub_county': 'Westlands', 'constituency': 'Westlands',
+        'location': 'Parklands', 'price_per_hour': 500, 'availability': 'Weekends',
+    })
+    assert response.status_code == 400
+    with app_module.app.app_context():
+        assert app_module.User.query.filter_by(email='half@test.local').first() is None
+
+    signup(email='twice@test.local')
+    again = app_module.app.test_client().post('/signup', json={
+        'name': 'Twice', 'email': 'twice@test.local', 'password': 'password123', 'user_type': 'student',
+        'phone': '0712345678', 'county': 'Nairobi', 'sub_county': 'Westlands',
+    })
+    assert again.get_json() == {'success': False, 'message': 'Email already registered'}
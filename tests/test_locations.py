@@ -0,0 +1,52 @@
+from locations import normalize_county, normalize_place, place_key, price_bucket_label, structured_location
+
+
+def test_counties_resolve_to_their_canonical_names():
+    assert normalize_county('nairobi city') == 'Nairobi'
+    assert normalize_county('MURANGA') == "Murang'a"
+    assert normalize_county('taita taveta') == 'Taita-Taveta'
+    assert normalize_county('  homa   bay ') == 'Homa Bay'
+    # Unknown names are still tidied
+    assert normalize_county('atlantis  county') == 'Atlantis County'
+    assert normalize_county('') is None
+
+
+def test_places_and_keys():
+    assert normalize_place('  westlands  ') == 'Westlands'
+    assert normalize_place('KILIMANI estate') == 'Kilimani Estate'
+    assert normalize_place(None) is None
+    assert place_key("Murang'a") == place_key('muranga') == 'muranga'
+
+
+def test_structured_location():
+    assert structured_location('nairobi', 'westlands', ' WESTLANDS ', 'parklands') == {
+        'county': 'Nairobi', 'sub_county': 'Westlands', 'constituency': 'Westlands', 'area': 'Parklands',
+    }
+
+
+def test_price_bucket_labels():
+    assert price_bucket_label(0, 500) == '0-499'
+    assert price_bucket_label(5000, None) == '5000+'
+
+
+def test_search_filters_on_the_structured_columns(app_module, signup):
+    signup('tutor', name='Laikipia Tutor', county='laikipia', sub_county='laikipia east', constituency='LAIKIPIA  east',
+           subject='Locations Biology')
+    signup('tutor', name='Embu Tutor', county='Embu', sub_county='Manyatta', constituency='Manyatta',
+           subject='Locations Biology')
+    student = signup()
+
+    def names(**args):
+        response = student.get('/api/tutors/search', query_string=dict(subject='Locations Biology', **args))
+        return sorted(row['name'] for row in response.get_json())
+
+    assert names(county='LAIKIPIA') == ['Laikipia Tutor']
+    assert names(sub_county='Laikipia East') == ['Laikipia Tutor']
+    assert names(constituency='laikipia  east') == ['Laikipia Tutor']
+    # A known place name in the free-text location box becomes an exact column lookup
+    assert names(location='manyatta') == ['Embu Tutor']
+    assert names() == ['Embu Tutor', 'Laikipia Tutor']
+
+    facets = student.get('/api/tutors/facets').get_json()
+    assert {'value': 'Laikipia', 'count': 1} in facets['counties']
+    assert {'county': 'Laikipia', 'value': 'Laikipia East', 'count': 1} in facets['sub_counties']
@@ -0,0 +1,68 @@
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from passwords import HashPolicy, HasherBusy, PasswordHasher
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+def test_policy_detects_hashes_made_with_other_parameters():
+    policy = HashPolicy(FAST)
+    assert policy.prefix == 'pbkdf2:sha256:1000'
+    assert not policy.needs_rehash(generate_password_hash('secret', method=FAST))
+    assert policy.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:2000'))
+    assert policy.needs_rehash(None)
+    # Werkzeug's defaults are expanded before comparing
+    assert HashPolicy('pbkdf2').prefix.startswith('pbkdf2:sha256:')
+
+
+def test_inline_hashing_without_workers():
+    hasher = PasswordHasher(HashPolicy(FAST), workers=0)
+    pwhash = hasher.hash('secret')
+    assert hasher.verify(pwhash, 'secret') and not hasher.verify(pwhash, 'wrong')
+    assert [check_password_hash(h, p) for h, p in zip(hasher.hash_many(['a', 'b']), 'ab')] == [True, True]
+
+
+def test_pool_hashing_and_backpressure():
+    hasher = PasswordHasher(HashPolicy(FAST), workers=1, max_pending=1, timeout=30)
+    try:
+        pwhash = hasher.hash('secret')
+        assert pwhash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(pwhash, 'secret')
+        assert len(hasher.hash_many(['a', 'b', 'c'], chunksize=2)) == 3
+
+        # With the only slot taken, callers are turned away instead of queueing
+        hasher._slots.acquire()
+        with pytest.raises(HasherBusy):
+            hasher.hash('secret')
+        hasher._slots.release()
+        assert hasher.verify(pwhash, 'secret')
+    finally:
+        hasher.shutdown(wait=True)
+
+
+def test_login_upgrades_hashes_from_an_older_policy(app_module, signup):
+    signup(email='rehash@test.local')
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='rehash@test.local').first()
+        user.password_hash = generate_password_hash('password123', method='pbkdf2:sha256:2000')
+        app_module.db.session.commit()
+
+    client = app_module.app.test_client()
+    assert not client.post('/login', json={'email': 'rehash@test.local', 'password': 'wrong'}).get_json()['success']
+    assert client.post('/login', json={'email': 'rehash@test.local', 'password': 'password123'}).get_json()['success']
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(email='rehash@test.local').first()
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+
+
+def test_busy_hasher_answers_503(app_module, monkeypatch):
+    def busy(*args):
+        raise HasherBusy('Password hashing queue is full')
+
+    monkeypatch.setattr(app_module.password_hasher, 'hash', busy)
+    response = app_module.app.test_client().post('/signup', json={
+        'name': 'Busy', 'email': 'busy@test.local', 'password': 'password123', 'user_type': 'student',
+        'phone': '0712345678', 'county': 'Nairobi', 'sub_county': 'Westlands',
+    })
+    assert response.status_code == 503 and response.headers['Retry-After'] == '2'
@@ -0,0 +1,83 @@
+import pytest
+
+import principals
+from directory_snapshot import DirectoryGeneration
+from principals import Principal, PrincipalCache
+
+ROW = (7, 'Achieng', 'achieng@test.local', 'student', 'Kisumu', 'Kisumu Central', 'Kisumu Central', 'Milimani')
+
+
+class Rows:
+    def __init__(self):
+        self.loads = []
+        self.rows = {7: ROW, 8: (8,) + ROW[1:], 9: (9,) + ROW[1:]}
+
+    def __call__(self, user_id):
+        self.loads.append(user_id)
+        return self.rows.get(user_id)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principals.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_cache(tmp_path, rows, **options):
+    return PrincipalCache(rows, DirectoryGeneration(str(tmp_path / 'principal_version')), **options)
+
+
+def test_principal_is_a_read_only_user():
+    principal = Principal(ROW)
+    assert (principal.id, principal.user_type, principal.get_id()) == (7, 'student', '7')
+    assert principal.is_authenticated
+    with pytest.raises(AttributeError):
+        principal.name = 'Someone else'
+
+
+def test_entries_are_reused_until_the_ttl_runs_out(tmp_path, clock):
+    rows = Rows()
+    cache = make_cache(tmp_path, rows, ttl=60)
+    assert cache.get(7).name == 'Achieng'
+    assert cache.get(7) is cache.get(7)
+    clock[0] += 61
+    cache.get(7)
+    assert rows.loads == [7, 7]
+    assert (cache.hits, cache.misses) == (2, 2)
+    # Unknown users aren't cached
+    assert cache.get(42) is None and cache.get(42) is None
+    assert rows.loads == [7, 7, 42, 42]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    rows = Rows()
+    cache = make_cache(tmp_path, rows, max_entries=2)
+    cache.get(7), cache.get(8), cache.get(7), cache.get(9)
+    cache.get(7)
+    cache.get(8)
+    assert rows.loads == [7, 8, 9, 8]
+
+
+def test_invalidation_reaches_other_workers(tmp_path, clock):
+    rows = Rows()
+    here, there = make_cache(tmp_path, rows), make_cache(tmp_path, rows)
+    here.get(7), there.get(7)
+    here.invalidate(7)
+    here.get(7), there.get(7)
+    assert rows.loads == [7, 7, 7, 7]
+
+
+def test_a_zero_ttl_disables_caching(tmp_path):
+    rows = Rows()
+    cache = make_cache(tmp_path, rows, ttl=0)
+    cache.get(7), cache.get(7)
+    assert rows.loads == [7, 7]
+
+
+def test_logged_in_requests_use_the_cache(app_module, signup):
+    client = signup(name='Cached Student')
+    client.get('/api/sessions')
+    hits = app_module.principal_cache.hits
+    assert client.get('/api/sessions').status_code == 200
+    assert app_module.principal_cache.hits == hits + 1
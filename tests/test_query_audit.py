@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from query_audit import NPlusOneError, QueryAuditor, call_site, fingerprint
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM user\n WHERE id = 42 AND name = 'O''Brien'") == \
+        'SELECT * FROM user WHERE id = ? AND name = ?'
+    assert fingerprint('SELECT * FROM tutor WHERE id IN (?, ?,?)') == fingerprint('SELECT * FROM tutor WHERE id IN (?)')
+    assert fingerprint('SELECT price * 1.5 FROM tutor') == 'SELECT price * ? FROM tutor'
+
+
+def test_call_site_is_the_application_frame():
+    assert call_site().startswith('tests/test_query_audit.py:')
+    assert call_site().endswith(' in test_call_site_is_the_application_frame')
+
+
+def make_app(mode=None, slow_ms=None, testing=True):
+    app = Flask(__name__)
+    app.testing = testing
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)'))
+        conn.execute(text("INSERT INTO item (name) VALUES ('a'), ('b'), ('c'), ('d'), ('e')"))
+    auditor = QueryAuditor(mode=mode, threshold=5, slow_ms=slow_ms)
+    auditor.init_app(app)
+    auditor.instrument_engine(engine)
+
+    @app.route('/loop')
+    def loop():
+        with engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text('SELECT id FROM item'))]
+            names = [conn.execute(text('SELECT name FROM item WHERE id = :id'), {'id': i}).scalar() for i in ids]
+        return ','.join(names)
+
+    @app.route('/batch')
+    def batch():
+        with engine.connect() as conn:
+            return ','.join(conn.execute(text('SELECT name FROM item ORDER BY id')).scalars())
+
+    return app
+
+
+def test_repeated_statements_fail_requests_under_testing():
+    client = make_app().test_client()
+    with pytest.raises(NPlusOneError) as error:
+        client.get('/loop')
+    message = str(error.value)
+    assert 'Possible N+1 in GET /loop' in message
+    assert '5x at tests/test_query_audit.py:' in message and 'SELECT name FROM item WHERE id = ?' in message
+    assert client.get('/batch').data == b'a,b,c,d,e'
+
+
+def test_warn_and_off_modes(caplog):
+    with caplog.at_level(logging.WARNING):
+        assert make_app(mode='warn').test_client().get('/loop').status_code == 200
+    assert 'Possible N+1 in GET /loop' in caplog.text
+    caplog.clear()
+    assert make_app(testing=False).test_client().get('/loop').status_code == 200
+    assert 'N+1' not in caplog.text
+    with pytest.raises(ValueError):
+        QueryAuditor(mode='loud')
+
+
+def test_slow_queries_are_logged_with_their_plan_once(caplog):
+    client = make_app(mode='off', slow_ms=0).test_client()
+    with caplog.at_level(logging.WARNING):
+        client.get('/batch')
+        client.get('/batch')
+    slow = [record.getMessage() for record in caplog.records if 'SELECT name FROM item ORDER BY id' in record.getMessage()]
+    assert len(slow) == 2
+    assert '(GET /batch)' in slow[0] and '\n  plan: ' in slow[0]
+    assert 'plan:' not in slow[1]
+
+
+def test_the_app_raises_on_n_plus_one_under_testing(app_module, signup):
+    auditor = app_module.query_auditor
+    assert auditor.current_mode() == 'raise'
+    for n in range(5):
+        signup('tutor', name=f'Audited Tutor {n}')
+    db, Tutor, User = app_module.db, app_module.Tutor, app_module.User
+    with app_module.app.test_request_context('/audited'):
+        auditor._start()
+        # One name lookup per tutor instead of a join
+        for tutor in Tutor.query.limit(5).all():
+            db.session.execute(db.select(User.name).where(User.id == tutor.user_id)).scalar()
+        with pytest.raises(NPlusOneError, match='Possible N\\+1 in GET /audited'):
+            auditor._finish(app_module.app.response_class())
@@ -0,0 +1,92 @@
+import pytest
+from flask import Flask
+
+from ratelimit import Limit, MemoryBackend, RateLimiter, SQLiteBackend, parse_limit, parse_limits
+
+
+def test_parse_limit():
+    limit = parse_limit('30/minute')
+    assert (limit.capacity, limit.period, limit.by) == (30, 60, 'ip')
+    assert parse_limit(' 5 / 10 minutes ').period == 600
+    assert parse_limit('1000/day').rate == pytest.approx(1000 / 86400)
+    for value in ('', 'often', '5/fortnight', '-1/minute'):
+        with pytest.raises(ValueError):
+            parse_limit(value)
+
+
+def test_parse_limits_overrides_defaults_and_keeps_their_identity():
+    defaults = {'login': Limit(5, 60), 'chatbot': Limit(30, 60, by='user')}
+    limits = parse_limits('chatbot=10/minute, search=100/hour:user,', defaults)
+    assert (limits['chatbot'].capacity, limits['chatbot'].by) == (10, 'user')
+    assert (limits['search'].period, limits['search'].by) == (3600, 'user')
+    assert limits['login'] is defaults['login']
+    with pytest.raises(ValueError):
+        parse_limits('login=5/minute:session', defaults)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == 'memory' else SQLiteBackend(str(tmp_path / 'buckets.db'))
+
+
+def test_buckets_allow_a_burst_then_refill(backend):
+    limit = Limit(3, 60)
+    assert [backend.take('k', limit, now=1000)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, _, retry_after = backend.take('k', limit, now=1000)
+    assert not allowed and retry_after == pytest.approx(20)
+    # One token every 20 seconds
+    assert backend.take('k', limit, now=1021)[0]
+    assert not backend.take('k', limit, now=1021)[0]
+    assert backend.take('other', limit, now=1021)[0]
+
+
+def test_memory_backend_evicts_the_least_recently_used():
+    backend = MemoryBackend(max_keys=2)
+    limit = Limit(1, 60)
+    backend.take('a', limit, now=0)
+    backend.take('b', limit, now=0)
+    backend.take('a', limit, now=0)
+    backend.take('c', limit, now=0)
+    # 'b' was evicted, so it starts over with a full bucket
+    assert backend.take('b', limit, now=0)[0]
+    assert not backend.take('c', limit, now=0)[0]
+
+
+class BrokenBackend:
+    def take(self, key, limit, now=None):
+        raise OSError('disk I/O error')
+
+
+def make_app(backend, proxy_hops=0):
+    app = Flask(__name__)
+    limiter = RateLimiter(backend, {'ping': Limit(2, 60)}, proxy_hops=proxy_hops)
+
+    @app.route('/ping', methods=['GET', 'POST'])
+    @limiter.limit('ping', methods=('POST',))
+    def ping():
+        return 'pong'
+
+    return app.test_client()
+
+
+def test_limited_routes_answer_429_with_retry_after():
+    client = make_app(MemoryBackend())
+    assert [client.post('/ping').status_code for _ in range(3)] == [200, 200, 429]
+    limited = client.post('/ping')
+    assert limited.headers['Retry-After'] == '30'
+    assert limited.headers['X-RateLimit-Limit'] == '2;w=60'
+    # Only POST is limited
+    assert client.get('/ping').status_code == 200
+
+
+def test_clients_behind_a_proxy_get_their_own_buckets():
+    client = make_app(MemoryBackend(), proxy_hops=1)
+    for _ in range(2):
+        client.post('/ping', headers={'X-Forwarded-For': '10.0.0.1'})
+    assert client.post('/ping', headers={'X-Forwarded-For': '10.0.0.1'}).status_code == 429
+    assert client.post('/ping', headers={'X-Forwarded-For': '10.0.0.2'}).status_code == 200
+
+
+def test_a_broken_backend_fails_open():
+    client = make_app(BrokenBackend())
+    assert [client.post('/ping').status_code for _ in range(3)] == [200, 200, 200]
@@ -0,0 +1,39 @@
+from recommendations import MAX_TUTORS_PER_STUDENT, count_pairs, rebuild
+
+
+def test_count_pairs_counts_each_ordered_pair_per_student():
+    counts = count_pairs([(1, 10), (1, 11), (1, 10), (2, 10), (2, 11), (2, 12), (3, 12)])
+    assert counts == {(10, 11): 2, (11, 10): 2, (10, 12): 1, (12, 10): 1, (11, 12): 1, (12, 11): 1}
+
+
+def test_count_pairs_caps_prolific_students():
+    counts = count_pairs([(1, tutor_id) for tutor_id in range(MAX_TUTORS_PER_STUDENT + 20)])
+    assert len(counts) == MAX_TUTORS_PER_STUDENT * (MAX_TUTORS_PER_STUDENT - 1)
+
+
+def test_similar_tutors_follow_connections_and_match_a_rebuild(app_module, signup):
+    for name in ('Algebra', 'Geometry', 'Calculus', 'Statistics'):
+        signup('tutor', name=f'Recommended {name}', subject='Recommendation Maths')
+    first = signup()
+    ids = {row['name'].split()[1]: row['id'] for row in
+           first.get('/api/tutors/search', query_string={'subject': 'Recommendation Maths'}).get_json()}
+
+    first.post('/api/connect/bulk', json={'tutor_ids': [ids['Algebra'], ids['Geometry'], ids['Calculus']]})
+    second = signup()
+    second.post('/api/connect', json={'tutor_id': ids['Algebra']})
+    second.post('/api/connect', json={'tutor_id': ids['Calculus']})
+    second.post('/api/connect', json={'tutor_id': ids['Statistics']})
+
+    similar = first.get(f"/api/tutors/{ids['Algebra']}/similar").get_json()
+    assert [(row['name'], row['shared_students']) for row in similar][0] == ('Recommended Calculus', 2)
+    assert {row['name'] for row in similar} == {'Recommended Calculus', 'Recommended Geometry', 'Recommended Statistics'}
+
+    # The batch rebuild agrees with the pairs recorded one connection at a time
+    Cooccurrence, db = app_module.TutorCooccurrence, app_module.db
+    with app_module.app.app_context():
+        def matrix():
+            return set(db.session.execute(db.select(Cooccurrence.tutor_id, Cooccurrence.other_id, Cooccurrence.count)))
+        incremental = matrix()
+        rebuild(db.session, app_module.Connection, app_module.Payment, Cooccurrence)
+        db.session.commit()
+        assert matrix() == incremental
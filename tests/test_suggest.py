@@ -0,0 +1,35 @@
+from suggest import PrefixIndex, SuggestIndex
+
+
+def test_prefixes_match_any_word_heaviest_first():
+    index = PrefixIndex([('Mathematics', 5), ('Music', 9), ('Applied Mathematics', 2), ('Chemistry', 1)])
+    assert index.lookup('m') == ['Music', 'Mathematics', 'Applied Mathematics']
+    assert index.lookup('MATH') == ['Mathematics', 'Applied Mathematics']
+    assert index.lookup('ap') == ['Applied Mathematics']
+    assert index.lookup('m', limit=1) == ['Music']
+    assert index.lookup('zz') == []
+    assert index.lookup('  ') == []
+
+
+def test_weights_add_up_and_blanks_are_skipped():
+    index = PrefixIndex([('Physics', 1), ('Physics ', 4), ('Phonics', 3), ('', 10), (None, 10)])
+    assert index.lookup('ph') == ['Physics', 'Phonics']
+    assert len(index) == 2
+
+
+def test_ties_break_alphabetically_and_punctuation_is_ignored():
+    index = PrefixIndex([('Nairobi West', 1), ('Nairobi', 1), ("Murang'a", 1)])
+    assert index.lookup('nai') == ['Nairobi', 'Nairobi West']
+    assert index.lookup('west') == ['Nairobi West']
+    assert index.lookup("murang'") == ["Murang'a"]
+    assert SuggestIndex([], [], [('John Kamau', 3)]).lookup('name', 'kam') == ['John Kamau']
+
+
+def test_suggest_endpoint(app_module, signup):
+    signup('tutor', name='Suggested Tutor', subject='Xylophone Lessons', county='Marsabit', sub_county='Saku')
+    student = signup()
+
+    assert student.get('/api/suggest', query_string={'prefix': 'xylo'}).get_json() == ['Xylophone Lessons']
+    assert student.get('/api/suggest', query_string={'field': 'location', 'prefix': 'mars'}).get_json() == ['Marsabit']
+    assert 'Suggested Tutor' in student.get('/api/suggest', query_string={'field': 'name', 'prefix': 'sugg'}).get_json()
+    assert student.get('/api/suggest', query_string={'field': 'bio', 'prefix': 'x'}).status_code == 400
@@ -0,0 +1,27 @@
+import json
+
+import tutor_serializer
+from tutor_serializer import TUTOR_FIELDS, dumps, row_to_dict, rows_to_dicts
+
+
+def test_rows_map_onto_the_listing_fields():
+    row = (4, 'Amina', 'Physics', 800.0, 'Weekends', '0712345678', 'Nairobi', '', 4.5, 12)
+    assert rows_to_dicts([row]) == [dict(zip(TUTOR_FIELDS, row))]
+    assert row_to_dict(row, score=0.9)['score'] == 0.9
+
+
+def test_dumps_with_and_without_orjson(monkeypatch):
+    data = [{'id': 1, 'name': 'Wanjiru', 'price_per_hour': 500.0}]
+    assert json.loads(dumps(data)) == data
+    monkeypatch.setattr(tutor_serializer, 'orjson', None)
+    assert dumps(data) == b'[{"id":1,"name":"Wanjiru","price_per_hour":500.0}]'
+
+
+def test_listings_return_exactly_the_listing_fields(app_module, signup):
+    signup('tutor', name='Serialized Tutor', subject='Serialization Studies')
+    student = signup()
+    [listed] = [row for row in student.get('/api/tutors').get_json() if row['name'] == 'Serialized Tutor']
+    assert set(listed) == set(TUTOR_FIELDS)
+    assert student.get(f"/api/tutors/{listed['id']}").get_json() == listed
+    [found] = student.get('/api/tutors/search', query_string={'subject': 'Serialization Studies'}).get_json()
+    assert {field: found[field] for field in TUTOR_FIELDS} == listed
@@ -0,0 +1,61 @@
+"""
+Shared fast path for turning tutor listings into JSON.
+
+Listings select only the columns the API returns, via SQLAlchemy Core, so
+rows come back as plain tuples instead of ORM instances tracked by the
+session's identity map. JSON is encoded with orjson when it is installed.
+"""
+
+import json
+
+from flask import current_app
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Field order matches the column order of tutor_select()
+TUTOR_FIELDS = (
+    'id', 'name', 'subject', 'price_per_hour', 'availability',
+    'whatsapp_number', 'location', 'bio', 'rating', 'total_sessions'
+)
+
+
+def tutor_select(Tutor, User):
+    """Core SELECT of exactly the listing columns, joined to the tutor's user"""
+    return (
+        select(
+            Tutor.id, User.name, Tutor.subject, Tutor.price_per_hour, Tutor.availability,
+            Tutor.whatsapp_number, Tutor.location, Tutor.bio, Tutor.rating, Tutor.total_sessions
+        )
+        .join(User, User.id == Tutor.user_id)
+    )
+
+
+def fetch_rows(session, stmt):
+    """Execute a tutor_select() statement and return plain tuples"""
+    return [tuple(row) for row in session.execute(stmt)]
+
+
+def row_to_dict(row, **extra):
+    data = dict(zip(TUTOR_FIELDS, row))
+    if extra:
+        data.update(extra)
+    return data
+
+
+def rows_to_dicts(rows):
+    return [dict(zip(TUTOR_FIELDS, row)) for row in rows]
+
+
+def dumps(data):
+    """Encode to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')